@@ -7,7 +7,12 @@
 """
 
 from app.core.file_handler import FileHandler
-from app.core.query_engine import QueryEngine
+from app.core.file_cache import FileCache
+from app.core.parallel_loader import ParallelLoader
+from app.core.query_engine import QueryEngine, QueryTask
+from app.core.result_set import ResultSet, DataFrameResult, PagedResult, StreamingResult
+from app.core.result_cache import ResultCache
 from app.core.exporter import Exporter
 
-__all__ = ['FileHandler', 'QueryEngine', 'Exporter'] 
\ No newline at end of file
+__all__ = ['FileHandler', 'FileCache', 'ParallelLoader', 'QueryEngine', 'QueryTask', 'ResultSet', 'DataFrameResult',
+           'PagedResult', 'StreamingResult', 'ResultCache', 'Exporter'] 
\ No newline at end of file
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+压缩文件模块
+识别压缩格式，以流的方式解压读取压缩文件和zip压缩包中的成员，不解压到磁盘
+"""
+
+import io
+import os
+import bz2
+import gzip
+import zipfile
+from typing import BinaryIO, List, Optional, Tuple
+
+# 压缩文件扩展名 -> 压缩格式
+COMPRESSION_EXTENSIONS = {
+    '.gz': 'gzip',
+    '.zst': 'zstd',
+    '.bz2': 'bz2'
+}
+
+# DuckDB可以直接读取的压缩格式，其他格式由Python解压
+DUCKDB_COMPRESSIONS = ['gzip', 'zstd']
+
+# 压缩包扩展名，压缩包中每个成员文件注册为一张表
+ARCHIVE_EXTENSIONS = ['.zip']
+
+
+def split_compression(file_path: str) -> Tuple[str, Optional[str]]:
+    """
+    拆分文件路径中的压缩扩展名
+    
+    Args:
+        file_path: 文件路径，如 data.csv.gz
+    
+    Returns:
+        Tuple[str, Optional[str]]: (去掉压缩扩展名的路径, 压缩格式)，未压缩时压缩格式为None
+    """
+    root, ext = os.path.splitext(file_path)
+    compression = COMPRESSION_EXTENSIONS.get(ext.lower())
+    if compression is None:
+        return file_path, None
+    return root, compression
+
+
+def open_binary(file_path: str, member: Optional[str] = None) -> BinaryIO:
+    """
+    以二进制流打开文件，压缩文件边读取边解压
+    
+    Args:
+        file_path: 文件路径
+        member: zip压缩包中的成员名，为None时打开文件本身
+    
+    Returns:
+        BinaryIO: 解压后的数据流
+    """
+    if member is not None:
+        # 压缩包关闭后，已打开的成员流仍可以继续读取
+        with zipfile.ZipFile(file_path) as archive:
+            return archive.open(member)
+    
+    compression = split_compression(file_path)[1]
+    if compression == 'gzip':
+        return gzip.open(file_path, 'rb')
+    if compression == 'bz2':
+        return bz2.open(file_path, 'rb')
+    if compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("读取zst压缩文件需要安装zstandard: pip install zstandard")
+        return zstandard.ZstdDecompressor().stream_reader(open(file_path, 'rb'), closefd=True)
+    return open(file_path, 'rb')
+
+
+def open_text(file_path: str, encoding: str = 'utf-8', member: Optional[str] = None) -> io.TextIOWrapper:
+    """
+    以文本流打开文件，压缩文件边读取边解压
+    
+    Args:
+        file_path: 文件路径
+        encoding: 文本编码
+        member: zip压缩包中的成员名
+    
+    Returns:
+        io.TextIOWrapper: 文本流
+    """
+    return io.TextIOWrapper(open_binary(file_path, member), encoding=encoding)
+
+
+def list_archive_members(file_path: str, extensions: List[str]) -> List[str]:
+    """
+    列出压缩包中可以读取的成员文件
+    
+    Args:
+        file_path: 压缩包路径
+        extensions: 可以读取的文件扩展名，如['.csv', '.json']
+    
+    Returns:
+        List[str]: 成员名列表，按压缩包中的顺序排列
+    """
+    with zipfile.ZipFile(file_path) as archive:
+        return [
+            info.filename for info in archive.infolist()
+            if not info.is_dir()
+            and not info.filename.startswith('__MACOSX/')
+            and os.path.splitext(info.filename)[1].lower() in extensions
+        ]
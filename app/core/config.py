@@ -7,6 +7,7 @@
 """
 
 import os
+import copy
 import json
 from typing import Dict, Any, Optional
 
@@ -18,6 +19,49 @@ DEFAULT_CONFIG = {
         "default_page_size": 100,  # 默认分页大小
     },
     
+    # 文件加载配置
+    "loading": {
+        "csv_reader": "duckdb",  # CSV读取方式：'duckdb'(原生读取，不经过pandas), 'pandas'
+        "lazy_load": False,      # 延迟加载：添加文件时只读取元数据，首次查询时才读取数据
+        "watch_files": True,     # 监视已加载文件的变化，变化后在后台重新加载
+        "watch_interval": 2000,  # 检查文件变化的间隔(毫秒)
+        "materialize_tables": True,  # 经过pandas解析的数据写入DuckDB原生表后释放DataFrame，只保留一份数据
+    },
+    
+    # 文件缓存配置：需要经过pandas解析的文件转换为Parquet缓存，文件未变化时直接读取
+    "cache": {
+        "enabled": True,                   # 是否启用缓存
+        "directory": "~/.queryx/cache",    # 缓存目录
+        "max_size_mb": 2048,               # 缓存容量上限(MB)，超出时淘汰最久未使用的缓存
+    },
+    
+    # 查询结果缓存配置：相同的查询且引用的表未变化时直接返回缓存的结果
+    "result_cache": {
+        "enabled": True,      # 是否启用结果缓存
+        "max_size_mb": 256,   # 缓存容量上限(MB)，超出时淘汰最久未使用的结果
+    },
+    
+    # 抽样模式配置：查询中最大的表按比例抽样读取，结果为近似值
+    "sampling": {
+        "method": "bernoulli",  # 抽样方法：'bernoulli'(按行), 'reservoir'(蓄水池), 'system'(按数据块，最快但小比例时偏差大)
+        "percent": 1,           # 抽样百分比
+        "seed": 42,             # 随机种子，相同种子重复执行结果相同，为空时每次抽样不同
+        "min_rows": 100000,     # 行数少于该值的表不抽样
+    },
+    
+    # 性能配置：DuckDB的资源限制，空值或0使用DuckDB默认值
+    "performance": {
+        "memory_limit": "",                # 内存上限，如 4GB，默认为物理内存的80%
+        "threads": 0,                      # 线程数，默认为CPU核数
+        "temp_directory": "",              # 内存不足时换出数据的临时目录
+        "preserve_insertion_order": True,  # 是否保持结果的插入顺序，关闭后大数据量查询占用内存更少
+    },
+    
+    # 会话配置：已加载的表保存在会话数据库文件中，下次启动时直接恢复，不重新解析文件
+    "session": {
+        "path": "",  # 当前会话数据库文件，为空时使用内存数据库
+    },
+    
     # SQL格式化配置
     "sql_format": {
         "keyword_case": "upper",       # 关键字大小写：'upper', 'lower', 'capitalize'
@@ -36,7 +80,7 @@ class ConfigManager:
     def __init__(self):
         """初始化配置管理器"""
         self.config_path = os.path.expanduser("~/.queryx/config.json")
-        self.config = DEFAULT_CONFIG.copy()
+        self.config = copy.deepcopy(DEFAULT_CONFIG)  # 深拷贝，加载配置文件时不修改默认值
         self.load_config()
     
     def load_config(self) -> None:
@@ -104,6 +148,24 @@ class ConfigManager:
             Dict[str, Any]: SQL格式化配置选项字典
         """
         return self.config.get("sql_format", DEFAULT_CONFIG["sql_format"])
+    
+    def get_performance_options(self) -> Dict[str, Any]:
+        """
+        获取性能配置选项
+        
+        Returns:
+            Dict[str, Any]: 性能配置选项字典
+        """
+        return self.config.get("performance", DEFAULT_CONFIG["performance"])
+    
+    def get_sampling_options(self) -> Dict[str, Any]:
+        """
+        获取抽样模式配置选项
+        
+        Returns:
+            Dict[str, Any]: 抽样模式配置选项字典
+        """
+        return self.config.get("sampling", DEFAULT_CONFIG["sampling"])
 
 # 创建全局配置管理器实例
 config_manager = ConfigManager() 
\ No newline at end of file
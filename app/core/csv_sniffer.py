@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+CSV格式探测模块
+在有限的采样数据上一次性探测CSV文件的编码、分隔符、引号和表头，
+完整解析只按探测结果执行一次，探测结果按文件指纹缓存
+"""
+
+import os
+import csv
+import codecs
+import random
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, Optional, Any
+
+from app.core.compression import split_compression, open_binary
+
+# 依次尝试的编码，latin-1可以解码任意字节，作为最后的选择
+CANDIDATE_ENCODINGS = ['utf-8', 'gbk', 'gb18030', 'latin-1']
+
+# 候选分隔符
+CANDIDATE_DELIMITERS = [',', '\t', ';', '|']
+
+# DuckDB原生支持的编码（Python编码名 -> DuckDB编码名），其他编码由pandas读取
+DUCKDB_ENCODINGS = {
+    'utf-8': 'utf-8',
+    'utf-8-sig': 'utf-8',
+    'utf-16': 'utf-16',
+    'latin-1': 'latin-1'
+}
+
+HEAD_SIZE = 64 * 1024   # 采样文件开头64KB
+BLOCK_SIZE = 16 * 1024  # 随机采样块大小
+BLOCK_COUNT = 4         # 随机采样块数量
+STREAM_SAMPLE_SIZE = 256 * 1024  # 压缩文件无法随机读取，采样解压后开头的256KB
+
+
+def read_sample(file_path: str, member: Optional[str] = None) -> List[bytes]:
+    """
+    读取文件的采样数据：文件开头加上若干随机位置的数据块，每块只保留完整的行
+    
+    压缩文件和压缩包成员只采样解压后的开头部分
+    
+    Args:
+        file_path: 文件路径
+        member: zip压缩包中的成员名
+    
+    Returns:
+        List[bytes]: 采样数据块，第一块为文件开头
+    """
+    if member is not None or split_compression(file_path)[1] is not None:
+        with open_binary(file_path, member) as f:
+            head = f.read(STREAM_SAMPLE_SIZE)
+        if len(head) < STREAM_SAMPLE_SIZE:
+            return [head]
+        return [head[:head.rfind(b'\n') + 1] or head]
+    
+    file_size = os.path.getsize(file_path)
+    with open(file_path, 'rb') as f:
+        head = f.read(HEAD_SIZE)
+        if file_size <= HEAD_SIZE:
+            return [head]
+        
+        # 截断到最后一个完整行，避免在多字节字符中间截断
+        blocks = [head[:head.rfind(b'\n') + 1] or head]
+        
+        # 以文件大小为随机种子，同一文件每次采样的位置相同
+        rng = random.Random(file_size)
+        for _ in range(BLOCK_COUNT):
+            f.seek(rng.randrange(HEAD_SIZE, file_size))
+            block = f.read(BLOCK_SIZE)
+            start, end = block.find(b'\n') + 1, block.rfind(b'\n') + 1
+            if 0 < start < end:
+                blocks.append(block[start:end])
+        return blocks
+
+
+def detect_encoding(blocks: List[bytes]) -> str:
+    """
+    探测采样数据的编码
+    
+    Args:
+        blocks: 采样数据块
+    
+    Returns:
+        str: Python编码名
+    """
+    head = blocks[0]
+    if head.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if head.startswith(codecs.BOM_UTF16_LE) or head.startswith(codecs.BOM_UTF16_BE):
+        return 'utf-16'
+    
+    for encoding in CANDIDATE_ENCODINGS:
+        try:
+            for block in blocks:
+                block.decode(encoding)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return 'latin-1'
+
+
+def _is_number(value: str) -> bool:
+    """判断字段是否为数值"""
+    try:
+        float(value.replace(',', ''))
+        return True
+    except ValueError:
+        return False
+
+
+def detect_dialect(lines: List[str]) -> Dict[str, Any]:
+    """
+    探测分隔符、引号和表头
+    
+    分隔符取各行字段数一致且字段数最多的候选分隔符；
+    第一行的数值字段分布与数据行相同时认为没有表头
+    
+    Args:
+        lines: 采样的文本行
+    
+    Returns:
+        Dict[str, Any]: {'delimiter': 分隔符, 'quotechar': 引号, 'header': 是否有表头}
+    """
+    lines = [line for line in lines if line.strip()]
+    if not lines:
+        return {'delimiter': ',', 'quotechar': '"', 'header': True}
+    
+    # 引号：没有双引号且有行以单引号开头时使用单引号
+    single_quoted = any(line.startswith("'") for line in lines)
+    quotechar = "'" if single_quoted and not any('"' in line for line in lines) else '"'
+    
+    best_delimiter, best_score = ',', (0, 0)
+    for delimiter in CANDIDATE_DELIMITERS:
+        counts = Counter(len(row) for row in csv.reader(lines, delimiter=delimiter, quotechar=quotechar))
+        field_count, frequency = counts.most_common(1)[0]
+        if field_count <= 1:
+            continue
+        # 优先选择字段数一致的行最多的分隔符，其次是字段数多的
+        score = (frequency, field_count)
+        if score > best_score:
+            best_delimiter, best_score = delimiter, score
+    
+    rows = list(csv.reader(lines[:100], delimiter=best_delimiter, quotechar=quotechar))
+    header = True
+    if len(rows) > 1:
+        signature = lambda row: tuple(_is_number(value) for value in row)
+        data_signature = Counter(signature(row) for row in rows[1:]).most_common(1)[0][0]
+        first_signature = signature(rows[0])
+        if first_signature == data_signature and any(first_signature):
+            header = False
+    
+    return {'delimiter': best_delimiter, 'quotechar': quotechar, 'header': header}
+
+
+@lru_cache(maxsize=256)
+def _detect_format(file_path: str, file_size: int, mtime_ns: int, member: Optional[str]) -> Dict[str, Any]:
+    """按文件指纹缓存的格式探测，参数中的大小和修改时间只用作缓存键"""
+    blocks = read_sample(file_path, member)
+    encoding = detect_encoding(blocks)
+    
+    lines = []
+    for block in blocks:
+        text = block.decode(encoding, errors='replace')
+        lines.extend(text.splitlines())
+    
+    csv_format = detect_dialect(lines)
+    csv_format['encoding'] = encoding
+    return csv_format
+
+
+def detect_csv_format(file_path: str, member: Optional[str] = None) -> Dict[str, Any]:
+    """
+    探测CSV文件的格式，文件未变化时直接返回缓存的结果
+    
+    Args:
+        file_path: 文件路径
+        member: zip压缩包中的成员名
+    
+    Returns:
+        Dict[str, Any]: {'encoding': 编码, 'delimiter': 分隔符, 'quotechar': 引号, 'header': 是否有表头}
+    """
+    stat = os.stat(file_path)
+    return dict(_detect_format(os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns, member))
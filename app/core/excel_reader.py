@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Excel读取模块
+根据已安装的库选择最快的读取引擎，按工作表读取数据
+"""
+
+import importlib.util
+import os
+import pandas as pd
+from typing import Dict, List, Optional
+
+# 各扩展名在没有calamine时使用的引擎（引擎名与模块名相同）
+FALLBACK_ENGINES = {
+    '.xls': 'xlrd',
+    '.xlsx': 'openpyxl',
+    '.xlsm': 'openpyxl',
+}
+
+
+def _is_installed(module_name: str) -> bool:
+    """
+    检查模块是否已安装
+    
+    Args:
+        module_name: 模块名
+    
+    Returns:
+        bool: 已安装返回True
+    """
+    return importlib.util.find_spec(module_name) is not None
+
+
+def get_excel_engine(file_path: str) -> Optional[str]:
+    """
+    选择读取Excel文件的引擎
+    
+    安装python-calamine时使用calamine（Rust实现，比openpyxl快一个数量级，
+    也能读取旧版.xls），否则按扩展名选择：.xls使用xlrd，.xlsx/.xlsm使用openpyxl；
+    对应的库未安装或扩展名未知时交给pandas自行判断
+    
+    Args:
+        file_path: 文件路径
+    
+    Returns:
+        Optional[str]: pandas的engine参数，None表示使用pandas默认引擎
+    """
+    if _is_installed("python_calamine"):
+        return "calamine"
+    fallback = FALLBACK_ENGINES.get(os.path.splitext(file_path)[1].lower())
+    if fallback and _is_installed(fallback):
+        return fallback
+    return None
+
+
+def read_excel_headers(file_path: str) -> Dict[str, List[str]]:
+    """
+    读取所有工作表的表头，不解析数据行
+    
+    Args:
+        file_path: 文件路径
+    
+    Returns:
+        Dict[str, List[str]]: {工作表名: 列名列表}，按工作表顺序排列
+    """
+    headers = {}
+    with pd.ExcelFile(file_path, engine=get_excel_engine(file_path)) as workbook:
+        for sheet_name in workbook.sheet_names:
+            header = workbook.parse(sheet_name, nrows=0)
+            headers[str(sheet_name)] = [str(col) for col in header.columns]
+    return headers
+
+
+def read_excel_sheet(file_path: str, sheet_name: str) -> pd.DataFrame:
+    """
+    读取一个工作表的数据
+    
+    Args:
+        file_path: 文件路径
+        sheet_name: 工作表名
+    
+    Returns:
+        pd.DataFrame: 工作表数据
+    """
+    return pd.read_excel(file_path, sheet_name=sheet_name, engine=get_excel_engine(file_path))
+
+
+def read_excel_sheets(file_path: str, sheet_names: List[str]) -> Dict[str, pd.DataFrame]:
+    """
+    读取多个工作表的数据，工作簿只打开一次
+    
+    Args:
+        file_path: 文件路径
+        sheet_names: 工作表名列表
+    
+    Returns:
+        Dict[str, pd.DataFrame]: {工作表名: 数据}
+    """
+    with pd.ExcelFile(file_path, engine=get_excel_engine(file_path)) as workbook:
+        return {sheet_name: workbook.parse(sheet_name) for sheet_name in sheet_names}
\ No newline at end of file
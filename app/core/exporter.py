@@ -9,7 +9,7 @@
 import os
 import json
 import pandas as pd
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional, Iterable
 
 
 class Exporter:
@@ -89,5 +89,70 @@ class Exporter:
             
             return True, f"成功导出到JSON文件: {os.path.basename(file_path)}"
         
+        except Exception as e:
+            return False, f"导出JSON失败: {str(e)}" 
+    
+    @staticmethod
+    def export_batches_to_csv(batches: Iterable[pd.DataFrame], file_path: str,
+                              encoding: str = 'utf-8') -> Tuple[bool, str]:
+        """
+        分批导出为CSV格式，逐批写入文件，不构建完整的数据框
+        
+        Args:
+            batches: 数据批次
+            file_path: 导出文件路径
+            encoding: 文件编码，默认utf-8
+        
+        Returns:
+            Tuple[bool, str]: (是否成功, 成功/错误信息)
+        """
+        try:
+            # 确保文件扩展名为.csv
+            if not file_path.lower().endswith('.csv'):
+                file_path += '.csv'
+            
+            # 第一批写入表头，之后的批次追加
+            with open(file_path, 'w', encoding=encoding, newline='') as f:
+                for i, batch in enumerate(batches):
+                    batch.to_csv(f, index=False, header=(i == 0))
+            
+            return True, f"成功导出到CSV文件: {os.path.basename(file_path)}"
+        
+        except Exception as e:
+            return False, f"导出CSV失败: {str(e)}"
+    
+    @staticmethod
+    def export_batches_to_json(batches: Iterable[pd.DataFrame], file_path: str) -> Tuple[bool, str]:
+        """
+        分批导出为JSON格式（记录数组），逐批写入文件，不构建完整的数据框
+        
+        Args:
+            batches: 数据批次
+            file_path: 导出文件路径
+        
+        Returns:
+            Tuple[bool, str]: (是否成功, 成功/错误信息)
+        """
+        try:
+            # 确保文件扩展名为.json
+            if not file_path.lower().endswith('.json'):
+                file_path += '.json'
+            
+            with open(file_path, 'w', encoding='utf-8') as f:
+                f.write('[')
+                first = True
+                for batch in batches:
+                    if batch.empty:
+                        continue
+                    # 每条记录一行，批次之间用逗号连接
+                    records = batch.to_json(orient='records', force_ascii=False, lines=True)
+                    for line in records.splitlines():
+                        f.write('\n    ' if first else ',\n    ')
+                        f.write(line)
+                        first = False
+                f.write('\n]\n' if not first else ']\n')
+            
+            return True, f"成功导出到JSON文件: {os.path.basename(file_path)}"
+        
         except Exception as e:
             return False, f"导出JSON失败: {str(e)}" 
\ No newline at end of file
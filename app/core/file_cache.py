@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+文件缓存模块
+将需要经过pandas解析的文件(Excel、嵌套JSON等)转换为Parquet保存在本地，
+文件未变化时直接读取缓存，无需重新解析
+"""
+
+import os
+import hashlib
+import duckdb
+import pandas as pd
+from typing import List, Optional
+
+from app.core.config import config_manager
+
+
+def write_parquet(df: pd.DataFrame, file_path: str, threads: Optional[int] = None) -> None:
+    """
+    将数据框写入Parquet文件，先写入临时文件再替换，避免读取到不完整的文件
+    
+    Args:
+        df: 数据框
+        file_path: Parquet文件路径
+        threads: DuckDB线程数，为None时使用DuckDB默认值（CPU核数）
+    """
+    tmp_path = f"{file_path}.{os.getpid()}.tmp"
+    config = {'threads': threads} if threads else {}
+    conn = duckdb.connect(database=':memory:', read_only=False, config=config)
+    try:
+        conn.register("queryx_cache_frame", df)
+        conn.execute("COPY (SELECT * FROM queryx_cache_frame) TO ? (FORMAT PARQUET)", [tmp_path])
+        os.replace(tmp_path, file_path)
+    finally:
+        conn.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+class FileCache:
+    """Parquet文件缓存，按文件路径、大小、修改时间和内容哈希查找，超出容量时淘汰最久未使用的缓存"""
+    
+    SAMPLE_SIZE = 1024 * 1024  # 计算内容哈希时读取文件头尾各1MB
+    
+    write_threads = None  # 写入Parquet的DuckDB线程数，并行加载的子进程中为1，避免多个进程争用CPU
+    
+    @property
+    def enabled(self) -> bool:
+        """是否启用缓存"""
+        return bool(config_manager.get_config("cache", "enabled", True))
+    
+    @property
+    def cache_dir(self) -> str:
+        """缓存目录"""
+        return os.path.expanduser(config_manager.get_config("cache", "directory", "~/.queryx/cache"))
+    
+    @property
+    def max_size(self) -> int:
+        """缓存容量上限（字节）"""
+        return int(config_manager.get_config("cache", "max_size_mb", 2048)) * 1024 * 1024
+    
+    def get_key(self, file_path: str, part: str = "") -> str:
+        """
+        计算文件的缓存键
+        
+        由绝对路径、文件大小、修改时间和内容采样哈希组成，
+        只读取文件头尾，不需要读取整个文件
+        
+        Args:
+            file_path: 文件路径
+            part: 文件中的数据部分（如Excel工作表名），整个文件为空字符串
+        
+        Returns:
+            str: 缓存键
+        """
+        stat = os.stat(file_path)
+        digest = hashlib.sha1()
+        identity = f"{os.path.abspath(file_path)}:{stat.st_size}:{stat.st_mtime_ns}"
+        if part:
+            identity += f":{part}"
+        digest.update(identity.encode('utf-8'))
+        with open(file_path, 'rb') as f:
+            digest.update(f.read(self.SAMPLE_SIZE))
+            if stat.st_size > self.SAMPLE_SIZE * 2:
+                f.seek(-self.SAMPLE_SIZE, os.SEEK_END)
+                digest.update(f.read(self.SAMPLE_SIZE))
+        return digest.hexdigest()
+    
+    def get_cache_path(self, key: str) -> str:
+        """
+        获取缓存文件路径
+        
+        Args:
+            key: 缓存键
+        
+        Returns:
+            str: 缓存文件路径
+        """
+        return os.path.join(self.cache_dir, f"{key}.parquet")
+    
+    def lookup(self, file_path: str, part: str = "") -> Optional[str]:
+        """
+        查找文件的缓存
+        
+        Args:
+            file_path: 文件路径
+            part: 文件中的数据部分（如Excel工作表名）
+        
+        Returns:
+            Optional[str]: 缓存的Parquet文件路径，未命中或未启用缓存时返回None
+        """
+        if not self.enabled:
+            return None
+        try:
+            cache_path = self.get_cache_path(self.get_key(file_path, part))
+            if not os.path.exists(cache_path):
+                return None
+            # 更新修改时间，作为最近使用时间
+            os.utime(cache_path)
+            return cache_path
+        except OSError:
+            return None
+    
+    def store(self, file_path: str, df: pd.DataFrame, part: str = "") -> Optional[str]:
+        """
+        将文件数据写入缓存，写入失败不影响文件加载
+        
+        Args:
+            file_path: 原始文件路径
+            df: 文件数据
+            part: 文件中的数据部分（如Excel工作表名）
+        
+        Returns:
+            Optional[str]: 缓存的Parquet文件路径，未启用缓存或写入失败时返回None
+        """
+        if not self.enabled:
+            return None
+        
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            cache_path = self.get_cache_path(self.get_key(file_path, part))
+            write_parquet(df, cache_path, self.write_threads)
+            self.evict(keep=[cache_path])
+            return cache_path
+        except Exception as e:
+            print(f"写入文件缓存失败: {str(e)}")
+            return None
+    
+    def evict(self, keep: Optional[List[str]] = None) -> None:
+        """
+        缓存超出容量上限时，按最近使用时间淘汰最旧的缓存
+        
+        Args:
+            keep: 不淘汰的缓存文件路径
+        """
+        if not os.path.isdir(self.cache_dir):
+            return
+        
+        keep = set(keep or [])
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.parquet'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, stat.st_size, path))
+        
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            if path in keep:
+                continue
+            try:
+                os.remove(path)
+                total_size -= size
+            except OSError:
+                pass
+    
+    def get_size(self) -> int:
+        """
+        获取缓存占用的空间
+        
+        Returns:
+            int: 字节数
+        """
+        if not os.path.isdir(self.cache_dir):
+            return 0
+        return sum(os.path.getsize(os.path.join(self.cache_dir, name))
+                   for name in os.listdir(self.cache_dir) if name.endswith('.parquet'))
+    
+    def clear(self) -> None:
+        """清空缓存"""
+        if not os.path.isdir(self.cache_dir):
+            return
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.parquet'):
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
\ No newline at end of file
@@ -3,13 +3,317 @@
 
 """
 文件处理模块
-负责加载和处理不同格式的文件(Excel, CSV, JSON)
+负责加载和处理不同格式的文件(Excel, CSV, JSON, JSON Lines, Parquet, Arrow IPC/Feather, DuckDB数据库)，
+支持gz/zst/bz2压缩文件和zip压缩包
 """
 
+import io
 import os
+import glob
 import json
+import hashlib
+import threading
+from collections import Counter
+import duckdb
 import pandas as pd
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional, Any
+
+# 检查文件是否只追加了数据时比对的原有末尾字节数
+TAIL_CHECK_SIZE = 4096
+
+# 保存到会话数据库的数据源信息，DataFrame、Arrow数据集和读取函数不保存
+SESSION_SOURCE_KEYS = ['source_sql', 'attach', 'lazy', 'columns', 'version', 'part', 'cached', 'rows']
+
+# pyarrow为可选依赖，安装后支持读取Arrow IPC/Feather文件
+try:
+    import pyarrow.dataset as pyarrow_dataset
+except ImportError:
+    pyarrow_dataset = None
+
+from app.core.config import config_manager
+from app.core.file_cache import FileCache
+from app.core.excel_reader import read_excel_headers, read_excel_sheet
+from app.core.csv_sniffer import DUCKDB_ENCODINGS, detect_csv_format
+from app.core.compression import (
+    ARCHIVE_EXTENSIONS, DUCKDB_COMPRESSIONS, split_compression, open_binary, open_text, list_archive_members
+)
+
+
+def sql_string_literal(value: str) -> str:
+    """
+    将字符串转换为SQL字符串字面量
+    
+    Args:
+        value: 原始字符串
+        
+    Returns:
+        str: 使用单引号包裹并转义后的字符串
+    """
+    return "'" + value.replace("'", "''") + "'"
+
+
+# JSON Lines文件扩展名，每行一条记录
+JSON_LINES_EXTENSIONS = ['.jsonl', '.ndjson']
+
+# 文本数据文件扩展名，可以压缩，也可以作为zip压缩包的成员
+DATA_EXTENSIONS = ['.csv', '.json'] + JSON_LINES_EXTENSIONS
+
+# Excel文件扩展名
+EXCEL_EXTENSIONS = ['.xlsx', '.xls', '.xlsm']
+
+# 列式文件和数据库文件扩展名，由DuckDB直接扫描，不复制数据
+PARQUET_EXTENSIONS = ['.parquet']
+ARROW_EXTENSIONS = ['.arrow', '.feather', '.ipc']
+DATABASE_EXTENSIONS = ['.duckdb', '.ddb']
+
+# pandas逐块解析JSON时每块的记录数
+JSON_CHUNK_SIZE = 50000
+
+# 可以将多个文件作为一张表读取的文件格式（DuckDB多文件扫描）
+FILE_SET_READERS = {
+    '.csv': 'read_csv_auto',
+    '.json': 'read_json_auto',
+    '.jsonl': 'read_json_auto',
+    '.ndjson': 'read_json_auto',
+    '.parquet': 'read_parquet'
+}
+
+
+def is_file_set(path: str) -> bool:
+    """
+    判断路径是否表示一组文件（文件夹或通配符）
+    
+    Args:
+        path: 文件路径、文件夹路径或通配符
+    
+    Returns:
+        bool: 是否为一组文件
+    """
+    return os.path.isdir(path) or glob.has_magic(path)
+
+
+def resolve_file_set(path: str) -> Tuple[Optional[str], str]:
+    """
+    获取一组文件的通配符和文件格式
+    
+    Args:
+        path: 文件夹路径或通配符
+    
+    Returns:
+        Tuple[Optional[str], str]: (通配符, 扩展名)，文件夹中匹配其下数量最多的CSV/JSON/JSON Lines/Parquet文件（含子文件夹），
+            压缩文件（如.csv.gz）的扩展名为去掉压缩扩展名后的扩展名，没有可读取的文件时通配符为None
+    """
+    if not os.path.isdir(path):
+        return path, os.path.splitext(split_compression(path)[0])[1].lower()
+    
+    # 按完整后缀统计（.csv和.csv.gz分别统计），只统计DuckDB可以直接读取的压缩格式
+    counts = Counter()
+    for _, _, names in os.walk(path):
+        for name in names:
+            data_name, compression = split_compression(name.lower())
+            file_ext = os.path.splitext(data_name)[1]
+            if file_ext in FILE_SET_READERS and compression in [None] + DUCKDB_COMPRESSIONS:
+                counts[(file_ext, name.lower()[len(data_name):])] += 1
+    if not counts:
+        return None, ""
+    
+    file_ext, compression_ext = counts.most_common(1)[0][0]
+    return os.path.join(path, '**', f'*{file_ext}{compression_ext}'), file_ext
+
+
+def csv_scan_options(csv_format: Dict[str, Any]) -> Optional[str]:
+    """
+    将探测到的CSV格式转换为DuckDB read_csv_auto的参数
+    
+    Args:
+        csv_format: CSV格式，见detect_csv_format
+    
+    Returns:
+        Optional[str]: 参数语句，DuckDB不支持该编码时返回None
+    """
+    encoding = DUCKDB_ENCODINGS.get(csv_format['encoding'])
+    if encoding is None:
+        return None
+    return (f"encoding={sql_string_literal(encoding)}, delim={sql_string_literal(csv_format['delimiter'])}, "
+            f"quote={sql_string_literal(csv_format['quotechar'])}, header={str(csv_format['header']).lower()}")
+
+
+def read_csv_with_pandas(file_path: str, csv_format: Optional[Dict[str, Any]] = None,
+                         member: Optional[str] = None) -> pd.DataFrame:
+    """
+    使用pandas按探测到的编码、分隔符、引号和表头读取CSV文件，只解析一次，压缩文件边解压边解析
+    
+    Args:
+        file_path: 文件路径
+        csv_format: CSV格式，见detect_csv_format，为None时自动探测
+        member: zip压缩包中的成员名
+    
+    Returns:
+        pd.DataFrame: 文件数据
+    """
+    if csv_format is None:
+        csv_format = detect_csv_format(file_path, member)
+    
+    with open_binary(file_path, member) as f:
+        df = pd.read_csv(
+            f,
+            encoding=csv_format['encoding'],
+            sep=csv_format['delimiter'],
+            quotechar=csv_format['quotechar'],
+            header=0 if csv_format['header'] else None
+        )
+    # 没有表头时与DuckDB的列名保持一致
+    if not csv_format['header']:
+        df.columns = [f"column{i}" for i in range(len(df.columns))]
+    return df
+
+
+def detect_json_format(file_path: str, member: Optional[str] = None) -> str:
+    """
+    检测JSON文件的格式
+    
+    Args:
+        file_path: 文件路径
+        member: zip压缩包中的成员名
+    
+    Returns:
+        str: 'array'（顶层为数组）、'newline_delimited'（每行一条记录）或'object'（顶层为对象）
+    """
+    data_name = member if member is not None else split_compression(file_path)[0]
+    if os.path.splitext(data_name)[1].lower() in JSON_LINES_EXTENSIONS:
+        return 'newline_delimited'
+    
+    # 压缩文件不能回退读取位置，只顺序读取开头部分
+    with open_text(file_path, 'utf-8', member) as f:
+        head = f.read(1024)
+        if head.lstrip().startswith('['):
+            return 'array'
+        
+        # 扩展名为.json的JSON Lines文件：第一行是完整的对象，下一行开始另一个对象
+        text = head.lstrip()
+        while text.count('\n') < 2:
+            block = f.read(64 * 1024)
+            if not block:
+                break
+            text += block
+    lines = text.split('\n')
+    first_line = lines[0].strip()
+    second_line = lines[1].strip() if len(lines) > 1 else ''
+    try:
+        json.loads(first_line)
+    except ValueError:
+        return 'object'
+    return 'newline_delimited' if second_line.startswith('{') else 'object'
+
+
+def iter_json_array(file_path: str, chunk_size: int = JSON_CHUNK_SIZE, block_size: int = 1024 * 1024,
+                    member: Optional[str] = None):
+    """
+    流式解析顶层为数组的JSON文件，每次只持有一块记录，不需要一次读入整个文件
+    
+    Args:
+        file_path: 文件路径
+        chunk_size: 每块的记录数
+        block_size: 每次读取的字符数
+        member: zip压缩包中的成员名
+    
+    Yields:
+        List[Any]: 一块记录
+    """
+    decoder = json.JSONDecoder()
+    with open_text(file_path, 'utf-8', member) as f:
+        buffer = f.read(block_size).lstrip()
+        if not buffer.startswith('['):
+            raise ValueError("JSON文件顶层不是数组")
+        buffer = buffer[1:]
+        eof = False
+        records = []
+        
+        while True:
+            # 跳过记录之间的空白和逗号
+            pos = 0
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+            buffer = buffer[pos:]
+            
+            if not buffer and not eof:
+                block = f.read(block_size)
+                eof = not block
+                buffer = block
+                continue
+            if not buffer or buffer[0] == ']':
+                break
+            
+            try:
+                record, end = decoder.raw_decode(buffer)
+            except ValueError:
+                record, end = None, -1
+            # 记录可能被读取块截断（数字在末尾截断时也能解析），需要读取更多内容
+            if end < 0 or (end == len(buffer) and not eof):
+                if eof:
+                    raise ValueError("JSON文件格式不完整")
+                block = f.read(block_size)
+                eof = not block
+                buffer += block
+                continue
+            
+            records.append(record)
+            buffer = buffer[end:]
+            if len(records) >= chunk_size:
+                yield records
+                records = []
+        
+        if records:
+            yield records
+
+
+def read_json_with_pandas(file_path: str, json_format: Optional[str] = None,
+                          member: Optional[str] = None) -> pd.DataFrame:
+    """
+    使用pandas读取JSON文件，数组和JSON Lines逐块解析，顶层为对象时嵌套结构展开为列
+    
+    Args:
+        file_path: 文件路径
+        json_format: JSON格式，见detect_json_format，为None时自动检测
+        member: zip压缩包中的成员名
+    
+    Returns:
+        pd.DataFrame: 文件数据
+    """
+    if json_format is None:
+        json_format = detect_json_format(file_path, member)
+    
+    # 逐块解析为DataFrame，避免一次性创建所有记录的Python对象
+    if json_format == 'newline_delimited':
+        with open_text(file_path, 'utf-8', member) as f:
+            chunks = list(pd.read_json(f, lines=True, chunksize=JSON_CHUNK_SIZE))
+    elif json_format == 'array':
+        chunks = [pd.DataFrame(records) for records in iter_json_array(file_path, member=member)]
+    else:
+        with open_text(file_path, 'utf-8', member) as f:
+            data = json.load(f)
+        # 如果是字典，需要处理嵌套结构
+        return pd.json_normalize(data)
+    
+    if not chunks:
+        return pd.DataFrame()
+    return pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+
+
+def read_archive_member(file_path: str, member: str) -> pd.DataFrame:
+    """
+    从zip压缩包中流式读取一个成员文件，不解压到磁盘
+    
+    Args:
+        file_path: 压缩包路径
+        member: 成员名
+    
+    Returns:
+        pd.DataFrame: 成员文件数据
+    """
+    if os.path.splitext(member)[1].lower() == '.csv':
+        return read_csv_with_pandas(file_path, member=member)
+    return read_json_with_pandas(file_path, member=member)
 
 
 class FileHandler:
@@ -17,82 +321,916 @@ class FileHandler:
     
     def __init__(self):
         """初始化文件处理器"""
-        self.loaded_files = {}  # 存储已加载的文件 {文件路径: DataFrame}
+        self.loaded_files = {}  # 存储已加载的文件 {文件路径: {"table_name": 主表名, "tables": {表名: 数据源}, "version": 版本}}
         self.file_info = {}     # 存储文件信息 {文件路径: {"name": 文件名, "type": 文件类型, "size": 文件大小}}
+        self.conn = None        # 用于探测文件结构的DuckDB连接，按需创建
+        self.cache = FileCache()  # 需要经过pandas解析的文件的Parquet缓存
+        self.lock = threading.RLock()  # 后台重新加载变化的文件时，保护探测连接和已加载文件
+        self.deferred_updates = set()  # 读取工作表或成员文件后行数已更新、界面尚未刷新的文件路径
     
-    def load_file(self, file_path: str) -> Tuple[bool, str]:
+    def load_file(self, file_path: str, prepared: Optional[Dict[str, Any]] = None) -> Tuple[bool, str]:
         """
         加载文件
         
         Args:
             file_path: 文件路径
+            prepared: 并行加载时子进程的预处理结果（Excel表头等），解析的数据已写入文件缓存，
+                未启用缓存时包含解析的数据
             
         Returns:
             Tuple[bool, str]: (是否成功, 成功/错误信息)
         """
+        with self.lock:
+            return self._load_file(file_path, prepared)
+    
+    def _load_file(self, file_path: str, prepared: Optional[Dict[str, Any]]) -> Tuple[bool, str]:
+        """加载文件，见load_file"""
+        # 文件夹或通配符匹配的多个文件作为一张表
+        if is_file_set(file_path):
+            return self.load_file_set(file_path)
+        
         if not os.path.exists(file_path):
             return False, f"文件不存在: {file_path}"
         
         file_name = os.path.basename(file_path)
-        file_ext = os.path.splitext(file_name)[1].lower()
-        base_name = os.path.splitext(file_name)[0]
+        base_name, file_ext, compression = self.split_file_name(file_name)
         file_size = os.path.getsize(file_path) / 1024  # KB
         
         # 检查是否存在同名但不同后缀的文件
         for existing_path in self.loaded_files.keys():
             existing_file_name = os.path.basename(existing_path)
-            existing_base_name = os.path.splitext(existing_file_name)[0]
-            existing_ext = os.path.splitext(existing_file_name)[1].lower()
+            existing_base_name, existing_ext, existing_compression = self.split_file_name(existing_file_name)
+            existing_ext = (existing_ext, existing_compression)
             
             # 如果基本名称相同但扩展名不同，则报错
-            if existing_base_name == base_name and existing_ext != file_ext:
+            if existing_base_name == base_name and existing_ext != (file_ext, compression):
                 return False, f"已存在同名但不同格式的文件: {existing_file_name}。不允许添加同名不同格式的文件。"
         
+        # 延迟加载模式：只收集表头、列类型等元数据，首次查询时才真正读取数据
+        lazy = bool(config_manager.get_config("loading", "lazy_load", False))
+        
+        # 数据源版本：文件内容或加载方式变化时版本随之变化，查询引擎据此增量注册
+        fingerprint = self.get_file_fingerprint(file_path)
+        version = f"{fingerprint}:{'lazy' if lazy else 'eager'}"
+        
+        # 文件未变化时无需重新解析
+        if file_path in self.loaded_files and self.loaded_files[file_path]['version'] == version:
+            return True, f"文件未变化，无需重新加载: {file_name}"
+        
         try:
+            # 表名由文件名生成
+            table_name = self.make_table_name(base_name)
+            prepared = prepared or {}
+            
             # 根据文件扩展名选择加载方法
-            if file_ext in ['.xlsx', '.xls', '.xlsm']:
-                df = pd.read_excel(file_path)
-            elif file_ext == '.csv':
-                df = pd.read_csv(file_path, encoding='utf-8')
-                # 尝试不同编码
-                if df.empty or len(df.columns) <= 1:
-                    df = pd.read_csv(file_path, encoding='gbk')
-            elif file_ext == '.json':
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                # 如果是列表数据，直接转为DataFrame
-                if isinstance(data, list):
-                    df = pd.DataFrame(data)
-                # 如果是字典，需要处理嵌套结构
-                else:
-                    df = pd.json_normalize(data)
+            if file_ext in EXCEL_EXTENSIONS and compression is None:
+                # Excel文件每个工作表一张表，首次查询或预览该表时才解析
+                headers = prepared.get('excel_headers')
+                if headers is None:
+                    headers = read_excel_headers(file_path)
+                tables = self._load_parts(file_path, table_name, version, lazy, headers, prepared.get('parts'))
+            elif file_ext in ARCHIVE_EXTENSIONS and compression is None:
+                # zip压缩包每个成员文件一张表，首次查询或预览该表时才从压缩包中流式读取
+                members = list_archive_members(file_path, DATA_EXTENSIONS)
+                tables = self._load_parts(file_path, table_name, version, lazy, {member: [] for member in members},
+                                          prepared.get('parts'))
+            elif file_ext in DATA_EXTENSIONS:
+                tables = {table_name: self._load_table(file_path, file_ext, version, lazy, prepared.get('dataframe'))}
+            elif file_ext in PARQUET_EXTENSIONS and compression is None:
+                tables = {table_name: self._load_parquet(file_path, version)}
+            elif file_ext in ARROW_EXTENSIONS and compression is None:
+                tables = {table_name: self._load_arrow(file_path, version)}
+            elif file_ext in DATABASE_EXTENSIONS and compression is None:
+                # 数据库中的每张表和视图各注册为一张表
+                tables = self._load_database(file_path, table_name, version)
             else:
-                return False, f"不支持的文件格式: {file_ext}"
+                return False, f"不支持的文件格式: {file_name[len(base_name):]}"
             
-            # 存储加载的文件
-            table_name = os.path.splitext(file_name)[0]
-            # 替换表名中的特殊字符
-            table_name = ''.join(c if c.isalnum() else '_' for c in table_name)
+            if not tables:
+                return False, f"文件中没有可读取的数据: {file_name}"
             
+            # 存储加载的文件
             self.loaded_files[file_path] = {
-                'dataframe': df,
-                'table_name': table_name
+                'table_name': next(iter(tables)),  # 主表名（第一张表）
+                'tables': tables,                   # {表名: 数据源}，Excel文件每个工作表、zip压缩包每个成员一张表
+                'version': version,                 # 文件版本指纹
+                'fingerprint': fingerprint,         # 文件指纹，监视文件变化时比对
+                'tail': self._make_tail_info(file_path, file_ext, compression, tables)  # 只追加数据时增量读取的位置
             }
             
-            # 存储文件信息
+            # 存储文件信息（原生读取的文件行数在注册到查询引擎后由DuckDB统计，延迟加载的文件不统计行数）
+            sources = list(tables.values())
             self.file_info[file_path] = {
                 'name': file_name,
-                'type': file_ext[1:].upper(),  # 去掉点号
+                'type': file_name[len(base_name) + 1:].upper(),  # 去掉点号，压缩文件包含压缩扩展名，如CSV.GZ
                 'size': f"{file_size:.2f} KB",
-                'rows': len(df),
-                'columns': len(df.columns)
+                'rows': self._get_source_rows(sources[0]) if len(sources) == 1 else None,
+                'columns': len(sources[0]['columns']) if len(sources) == 1 else None,
+                'lazy': all(source['lazy'] for source in sources)  # 数据在首次查询时才读取，不统计行数
             }
             
-            return True, f"成功加载文件: {file_name}"
+            # 多个工作表、成员文件或数据库表时记录每张表的信息
+            is_archive = file_ext in ARCHIVE_EXTENSIONS
+            if len(tables) > 1:
+                part_type = 'TABLE' if file_ext in DATABASE_EXTENSIONS else 'SHEET'
+                self.file_info[file_path]['tables'] = [
+                    {
+                        'table_name': name,
+                        'name': source['part'],
+                        'type': os.path.splitext(source['part'])[1][1:].upper() if is_archive else part_type,
+                        'rows': self._get_source_rows(source),
+                        'columns': len(source['columns']) or None  # 压缩包成员在读取前列数未知
+                    }
+                    for name, source in tables.items()
+                ]
+            
+            cached = any(source.get('cached') for source in sources)
+            return True, (f"成功加载文件: {file_name}"
+                          + (f" ({len(tables)} 个{'文件' if is_archive else '表' if part_type == 'TABLE' else '工作表'})"
+                             if len(tables) > 1 else "")
+                          + (" (延迟加载)" if lazy else "")
+                          + (" (缓存)" if cached else ""))
+        
+        except Exception as e:
+            return False, f"加载文件出错: {str(e)}"
+    
+    def load_file_set(self, path: str) -> Tuple[bool, str]:
+        """
+        将文件夹或通配符匹配的多个同结构文件加载为一张表
+        
+        由DuckDB多文件扫描读取，附加来源文件名列（filename）和Hive分区列（如year=2024/month=01），
+        按列名合并各文件。表注册为视图，按分区列或文件名过滤时只读取匹配的文件
+        
+        Args:
+            path: 文件夹路径或通配符（如 data/sales_*.csv、data/**/*.csv）
+        
+        Returns:
+            Tuple[bool, str]: (是否成功, 成功/错误信息)
+        """
+        pattern, file_ext = resolve_file_set(path)
+        if pattern is None:
+            return False, f"文件夹中没有可合并读取的文件(CSV/JSON): {path}"
+        if file_ext not in FILE_SET_READERS or split_compression(pattern)[1] not in [None] + DUCKDB_COMPRESSIONS:
+            return False, f"不支持合并读取的文件格式: {file_ext or path}"
+        
+        file_paths = sorted(p for p in glob.glob(pattern, recursive=True) if os.path.isfile(p))
+        if not file_paths:
+            return False, f"没有匹配的文件: {pattern}"
+        
+        # 匹配的文件增减或任一文件变化时版本随之变化
+        fingerprint = self._get_file_set_fingerprint(file_paths)
+        version = f"{pattern}:{fingerprint}"
+        
+        name = os.path.basename(os.path.normpath(path)) if os.path.isdir(path) else os.path.basename(pattern)
+        if path in self.loaded_files and self.loaded_files[path]['version'] == version:
+            return True, f"文件未变化，无需重新加载: {name}"
+        
+        # 表名由文件夹名或通配符中的固定部分生成，如 sales_*.csv 生成 sales
+        base_name = name if os.path.isdir(path) else self.split_file_name(name)[0]
+        table_name = self.make_table_name(base_name).strip('_') or 'files'
+        existing_path = self.get_table_names().get(table_name)
+        if existing_path is not None and existing_path != path:
+            return False, f"表名已存在: {table_name}"
+        
+        try:
+            source_sql, columns = self._inspect_file_set(pattern, file_ext, file_paths[0])
+            if source_sql is None:
+                return False, f"无法读取文件: {file_paths[0]}"
+            
+            self.loaded_files[path] = {
+                'table_name': table_name,
+                'tables': {table_name: self._make_source(path, version, True, source_sql=source_sql, columns=columns)},
+                'version': version,
+                'fingerprint': fingerprint,
+                'tail': None  # 视图查询时扫描文件，变化后重新探测结构即可
+            }
+            
+            file_size = sum(os.path.getsize(file_path) for file_path in file_paths) / 1024  # KB
+            self.file_info[path] = {
+                'name': name,
+                'type': f"{file_ext[1:].upper()}×{len(file_paths)}",
+                'size': f"{file_size:.2f} KB",
+                'rows': None,  # 查询时才扫描文件
+                'columns': len(columns),
+                'lazy': True,
+                'files': len(file_paths)
+            }
+            return True, f"成功加载 {len(file_paths)} 个文件为表 {table_name}: {name}"
         
         except Exception as e:
             return False, f"加载文件出错: {str(e)}"
     
+    def _inspect_file_set(self, pattern: str, file_ext: str,
+                          sample_path: str) -> Tuple[Optional[str], List[Tuple[str, str]]]:
+        """
+        使用DuckDB探测多文件扫描的结构
+        
+        Args:
+            pattern: 通配符
+            file_ext: 文件扩展名
+            sample_path: 匹配的第一个文件，用于检查列名冲突
+        
+        Returns:
+            Tuple[Optional[str], List[Tuple[str, str]]]: (DuckDB扫描语句, 列信息)，无法读取时扫描语句为None
+        """
+        reader = FILE_SET_READERS[file_ext]
+        
+        # 同一组CSV文件按第一个文件探测编码、分隔符和表头
+        options = ""
+        if file_ext == '.csv':
+            csv_options = csv_scan_options(detect_csv_format(sample_path))
+            if csv_options is None:
+                return None, []
+            options = f", {csv_options}"
+        
+        sample_columns = self._describe_source(f"{reader}({sql_string_literal(sample_path)}{options})")
+        if not sample_columns:
+            return None, []
+        
+        # 文件中已有filename列时，来源文件名列改用其他名称
+        filename_column = 'filename'
+        while filename_column in {col for col, _ in sample_columns}:
+            filename_column = f"_{filename_column}"
+        
+        options += f", filename={sql_string_literal(filename_column)}, hive_partitioning=true, union_by_name=true"
+        source_sql = f"{reader}({sql_string_literal(pattern)}{options})"
+        columns = self._describe_source(source_sql)
+        if not columns:
+            return None, []
+        return source_sql, columns
+    
+    @staticmethod
+    def split_file_name(file_name: str) -> Tuple[str, str, Optional[str]]:
+        """
+        拆分文件名
+        
+        Args:
+            file_name: 文件名
+        
+        Returns:
+            Tuple[str, str, Optional[str]]: (基本名称, 扩展名, 压缩格式)，如 data.csv.gz 返回 ('data', '.csv', 'gzip')
+        """
+        data_name, compression = split_compression(file_name)
+        base_name, file_ext = os.path.splitext(data_name)
+        return base_name, file_ext.lower(), compression
+    
+    @staticmethod
+    def make_table_name(name: str) -> str:
+        """
+        生成表名，替换表名中的特殊字符
+        
+        Args:
+            name: 文件名或工作表名
+        
+        Returns:
+            str: 表名
+        """
+        return ''.join(c if c.isalnum() else '_' for c in name)
+    
+    def _make_source(self, file_path: str, version: str, lazy: bool, df: Optional[pd.DataFrame] = None,
+                     source_sql: Optional[str] = None, loader: Optional[Any] = None,
+                     columns: Optional[List[Tuple[str, str]]] = None, part: Optional[str] = None,
+                     cached: bool = False, arrow: Optional[Any] = None, attach: Optional[Dict[str, str]] = None,
+                     rows: Optional[int] = None, append: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        创建表的数据源
+        
+        Args:
+            file_path: 文件路径
+            version: 数据源版本指纹
+            lazy: 是否启用延迟加载
+            df: 已读取的数据
+            source_sql: DuckDB原生扫描语句
+            loader: 延迟读取数据的函数
+            columns: 列信息 [(列名, 类型)]，为None时从df获取
+            part: 文件中的数据部分（Excel工作表名或zip压缩包成员名）
+            cached: 是否读取自文件缓存
+            arrow: Arrow数据集（内存映射），由DuckDB直接扫描
+            attach: 需要附加的DuckDB数据库文件 {'alias': 别名, 'path': 路径}
+            rows: 不扫描数据即可得到的行数（如Parquet元数据中的行数）
+            append: 文件只追加了数据时的新增部分 {'base_version': 追加前的版本, 'dataframe': 新增的行}
+        
+        Returns:
+            Dict[str, Any]: 数据源
+        """
+        if columns is None:
+            columns = [(str(col), str(dtype)) for col, dtype in df.dtypes.items()] if df is not None else []
+        
+        return {
+            'dataframe': df,
+            'source_sql': source_sql,       # DuckDB原生扫描语句，为None时使用dataframe或arrow
+            'arrow': arrow,                 # Arrow数据集，由DuckDB直接扫描，不读入内存
+            'attach': attach,               # 扫描语句引用的DuckDB数据库文件
+            'lazy': lazy and df is None,    # 是否延迟加载（注册为视图或首次查询时读取）
+            'loader': loader,               # 延迟读取数据的函数，返回DataFrame
+            'columns': columns,             # 列信息 [(列名, 类型)]
+            'version': version,             # 数据源版本指纹
+            'file_path': file_path,         # 所属文件
+            'part': part,                   # Excel工作表名、zip压缩包成员名或数据库中的表名
+            'cached': cached,               # 是否读取自文件缓存
+            'rows': rows,                   # 不扫描数据即可得到的行数
+            'append': append                # 新增的行，已注册追加前版本的原生表时只插入这些行
+        }
+    
+    @staticmethod
+    def _get_source_rows(source: Dict[str, Any]) -> Optional[int]:
+        """
+        获取数据源的行数，不扫描数据
+        
+        Args:
+            source: 数据源
+        
+        Returns:
+            Optional[int]: 行数，需要扫描数据才能得到时返回None
+        """
+        if source['dataframe'] is not None:
+            return len(source['dataframe'])
+        return source.get('rows')
+    
+    def _lookup_cache(self, file_path: str, part: str = "") -> Tuple[Optional[str], List[Tuple[str, str]]]:
+        """
+        查找文件缓存
+        
+        Args:
+            file_path: 文件路径
+            part: 文件中的数据部分（Excel工作表名或zip压缩包成员名）
+        
+        Returns:
+            Tuple[Optional[str], List[Tuple[str, str]]]: (缓存的扫描语句, 列信息)，未命中时扫描语句为None
+        """
+        cache_path = self.cache.lookup(file_path, part)
+        if cache_path is None:
+            return None, []
+        
+        source_sql = f"read_parquet({sql_string_literal(cache_path)})"
+        columns = self._describe_source(source_sql)
+        if not columns:
+            return None, []
+        return source_sql, columns
+    
+    def _load_table(self, file_path: str, file_ext: str, version: str, lazy: bool,
+                    df: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
+        """
+        加载CSV、JSON或JSON Lines文件
+        
+        Args:
+            file_path: 文件路径
+            file_ext: 文件扩展名
+            version: 数据源版本指纹
+            lazy: 是否启用延迟加载
+            df: 并行加载时子进程已解析的数据
+        
+        Returns:
+            Dict[str, Any]: 数据源
+        """
+        if df is not None:
+            return self._make_source(file_path, version, lazy, df=df)
+        
+        # 优先读取缓存，文件未变化时无需重新解析
+        source_sql, columns = self._lookup_cache(file_path)
+        if source_sql is not None:
+            return self._make_source(file_path, version, lazy, source_sql=source_sql, columns=columns, cached=True)
+        
+        if file_ext == '.csv':
+            # 优先使用DuckDB原生读取，不经过pandas
+            if lazy or config_manager.get_config("loading", "csv_reader", "duckdb") == "duckdb":
+                source_sql, columns = self._inspect_csv(file_path)
+            
+            if source_sql is None:
+                df = read_csv_with_pandas(file_path, detect_csv_format(file_path))
+        else:
+            # 顶层为数组的JSON和JSON Lines由DuckDB流式扫描，内存占用不随文件大小增长
+            try:
+                json_format = detect_json_format(file_path)
+            except ImportError:
+                # 未安装zstandard时无法采样zst文件，由DuckDB自行识别格式
+                json_format = 'auto'
+            if json_format != 'object':
+                source_sql, columns = self._inspect_json(file_path, json_format)
+            
+            if source_sql is None:
+                df = read_json_with_pandas(file_path, json_format)
+        
+        if df is not None:
+            # 经过pandas解析的数据写入缓存，下次加载时直接读取
+            self.cache.store(file_path, df)
+            return self._make_source(file_path, version, lazy, df=df)
+        
+        return self._make_source(file_path, version, lazy, source_sql=source_sql, columns=columns)
+    
+    def _make_part_table_name(self, table_name: str, label: str, single: bool, tables: Dict[str, Any]) -> str:
+        """
+        生成文件中一个数据部分的表名
+        
+        Args:
+            table_name: 文件表名
+            label: 部分名（工作表名、成员文件名或数据库表名）
+            single: 文件是否只有这一个部分
+            tables: 已生成的表，部分名只有特殊字符不同时追加序号
+        
+        Returns:
+            str: 只有一个部分时为文件表名，否则为"文件表名__部分名"
+        """
+        name = table_name if single else f"{table_name}__{self.make_table_name(label)}"
+        unique_name, index = name, 1
+        while unique_name in tables:
+            index += 1
+            unique_name = f"{name}_{index}"
+        return unique_name
+    
+    def _load_parquet(self, file_path: str, version: str) -> Dict[str, Any]:
+        """
+        加载Parquet文件，注册为文件上的视图，查询时只读取需要的列和行组
+        
+        Args:
+            file_path: 文件路径
+            version: 数据源版本指纹
+        
+        Returns:
+            Dict[str, Any]: 数据源
+        """
+        source_sql = f"read_parquet({sql_string_literal(file_path)})"
+        columns = self._describe_source(source_sql)
+        if not columns:
+            raise ValueError(f"无法读取Parquet文件: {os.path.basename(file_path)}")
+        
+        # 行数记录在文件元数据中，不需要扫描数据
+        rows = self._get_conn().execute(
+            "SELECT SUM(num_rows) FROM parquet_file_metadata(?)", [file_path]
+        ).fetchone()[0]
+        return self._make_source(file_path, version, True, source_sql=source_sql, columns=columns,
+                                 rows=int(rows) if rows is not None else None)
+    
+    def _load_arrow(self, file_path: str, version: str) -> Dict[str, Any]:
+        """
+        加载Arrow IPC/Feather文件，以内存映射的Arrow数据集注册，查询时只读取需要的列和记录批次
+        
+        Args:
+            file_path: 文件路径
+            version: 数据源版本指纹
+        
+        Returns:
+            Dict[str, Any]: 数据源
+        """
+        if pyarrow_dataset is None:
+            raise ImportError("读取Arrow IPC/Feather文件需要安装pyarrow: pip install pyarrow")
+        
+        dataset = pyarrow_dataset.dataset(file_path, format='ipc')
+        columns = [(field.name, str(field.type)) for field in dataset.schema]
+        return self._make_source(file_path, version, True, arrow=dataset, columns=columns,
+                                 rows=dataset.count_rows())
+    
+    def _load_database(self, file_path: str, table_name: str, version: str) -> Dict[str, Dict[str, Any]]:
+        """
+        加载DuckDB数据库文件，库中的每张表和视图注册为只读附加数据库上的视图
+        
+        Args:
+            file_path: 文件路径
+            table_name: 文件表名
+            version: 数据源版本指纹
+        
+        Returns:
+            Dict[str, Dict[str, Any]]: {表名: 数据源}，只有一张表时表名为文件表名，否则为"文件表名__表名"，
+                非main模式下的表为"文件表名__模式名_表名"
+        """
+        alias = f"queryx_db_{table_name}"
+        attach = {'alias': alias, 'path': os.path.abspath(file_path)}
+        conn = self._get_conn()
+        conn.execute(f"ATTACH {sql_string_literal(attach['path'])} AS \"{alias}\" (READ_ONLY)")
+        try:
+            objects = conn.execute(
+                "SELECT schema_name, table_name, true FROM duckdb_tables() WHERE database_name = ? "
+                "UNION ALL "
+                "SELECT schema_name, view_name, false FROM duckdb_views() WHERE database_name = ? AND NOT internal "
+                "ORDER BY 1, 2",
+                [alias, alias]
+            ).fetchall()
+            
+            tables = {}
+            for schema_name, object_name, is_table in objects:
+                part = object_name if schema_name == 'main' else f"{schema_name}.{object_name}"
+                unique_name = self._make_part_table_name(table_name, part, len(objects) == 1, tables)
+                source_sql = f'"{alias}"."{schema_name}"."{object_name}"'
+                # 表的行数由DuckDB从存储元数据得到，视图需要执行查询才能统计
+                rows = conn.execute(f"SELECT COUNT(*) FROM {source_sql}").fetchone()[0] if is_table else None
+                tables[unique_name] = self._make_source(
+                    file_path, f"{version}:{part}", True, source_sql=source_sql,
+                    columns=self._describe_source(source_sql) or [], part=part, attach=attach,
+                    rows=rows
+                )
+            return tables
+        finally:
+            conn.execute(f'DETACH DATABASE "{alias}"')
+    
+    def _load_parts(self, file_path: str, table_name: str, version: str, lazy: bool,
+                    headers: Dict[str, List[str]],
+                    frames: Optional[Dict[str, pd.DataFrame]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        加载包含多个数据部分的文件（Excel工作表、zip压缩包成员），每部分一张表，数据在首次查询或预览该表时才解析
+        
+        Args:
+            file_path: 文件路径
+            table_name: 文件表名
+            version: 数据源版本指纹
+            lazy: 是否启用延迟加载（影响已缓存部分的注册方式）
+            headers: {部分名: 列名列表}，列名未知时为空列表
+            frames: 并行加载时子进程已解析的数据 {部分名: 数据}
+        
+        Returns:
+            Dict[str, Dict[str, Any]]: {表名: 数据源}，只有一个部分时表名为文件表名，否则为"文件表名__部分名"，
+                压缩包成员按不含目录和扩展名的文件名命名
+        """
+        is_archive = self.split_file_name(file_path)[1] in ARCHIVE_EXTENSIONS
+        tables = {}
+        
+        for part, header in headers.items():
+            label = os.path.splitext(os.path.basename(part))[0] if is_archive else part
+            unique_name = self._make_part_table_name(table_name, label, len(headers) == 1, tables)
+            part_version = f"{version}:{part}"
+            
+            # 已缓存的部分直接读取Parquet
+            source_sql, columns = self._lookup_cache(file_path, part)
+            if source_sql is not None:
+                tables[unique_name] = self._make_source(
+                    file_path, part_version, lazy, source_sql=source_sql, columns=columns,
+                    part=part, cached=True
+                )
+            elif frames and part in frames:
+                tables[unique_name] = self._make_source(file_path, part_version, lazy, df=frames[part], part=part)
+            else:
+                # 列类型在读取数据前未知
+                tables[unique_name] = self._make_source(
+                    file_path, part_version, True,
+                    loader=lambda part=part: self._load_deferred(file_path, part),
+                    columns=[(col, '') for col in header], part=part
+                )
+        
+        return tables
+    
+    def get_file_fingerprint(self, file_path: str) -> str:
+        """
+        获取文件指纹，文件大小或修改时间变化时指纹随之变化
+        
+        Args:
+            file_path: 文件路径
+            
+        Returns:
+            str: 文件指纹
+        """
+        stat = os.stat(file_path)
+        return f"{os.path.abspath(file_path)}:{stat.st_size}:{stat.st_mtime_ns}"
+    
+    def _get_file_set_fingerprint(self, file_paths: List[str]) -> str:
+        """
+        获取一组文件的指纹，文件增减或任一文件变化时指纹随之变化
+        
+        Args:
+            file_paths: 已排序的文件路径列表
+        
+        Returns:
+            str: 文件组指纹
+        """
+        digest = hashlib.sha1()
+        for file_path in file_paths:
+            digest.update(self.get_file_fingerprint(file_path).encode('utf-8'))
+        return digest.hexdigest()
+    
+    def _get_current_fingerprint(self, path: str) -> str:
+        """
+        获取已加载的文件或文件组当前的指纹
+        
+        Args:
+            path: 文件路径、文件夹路径或通配符
+        
+        Returns:
+            str: 指纹，与加载时记录的指纹不同说明文件已变化
+        """
+        if not is_file_set(path):
+            return self.get_file_fingerprint(path)
+        pattern = resolve_file_set(path)[0]
+        if pattern is None:
+            return ""
+        return self._get_file_set_fingerprint(sorted(p for p in glob.glob(pattern, recursive=True) if os.path.isfile(p)))
+    
+    def check_changes(self) -> List[str]:
+        """
+        检查已加载的文件是否在磁盘上发生变化，只比较文件大小和修改时间，不读取内容
+        
+        Returns:
+            List[str]: 已变化的文件路径列表
+        """
+        changed = []
+        for path, info in list(self.loaded_files.items()):
+            try:
+                fingerprint = self._get_current_fingerprint(path)
+            except OSError:
+                # 文件被删除或正在被替换时暂不处理，恢复后再比较
+                continue
+            if fingerprint != info['fingerprint']:
+                changed.append(path)
+        return changed
+    
+    def reload_file(self, file_path: str) -> Tuple[bool, str]:
+        """
+        重新加载已变化的文件，可在后台线程中调用
+        
+        只在末尾追加了数据的CSV和JSON Lines文件只读取新增部分，其他情况完整重新加载
+        
+        Args:
+            file_path: 文件路径
+        
+        Returns:
+            Tuple[bool, str]: (是否成功, 成功/错误信息)
+        """
+        with self.lock:
+            if file_path not in self.loaded_files:
+                return False, f"文件未加载: {file_path}"
+            
+            name = self.file_info.get(file_path, {}).get('name', os.path.basename(file_path))
+            try:
+                appended = self._append_tail(file_path)
+            except Exception as e:
+                # 新增部分无法按原有结构解析时完整重新加载
+                print(f"读取文件新增部分失败，改为完整重新加载: {file_path}: {str(e)}")
+                appended = None
+            if appended is not None:
+                return True, f"文件已追加 {appended} 行: {name}"
+            
+            success, message = self._load_file(file_path, None)
+            if not success and file_path in self.loaded_files:
+                # 加载失败时保留原有数据，文件再次变化后才重试
+                try:
+                    self.loaded_files[file_path]['fingerprint'] = self._get_current_fingerprint(file_path)
+                except OSError:
+                    pass
+            return success, message
+    
+    def _make_tail_info(self, file_path: str, file_ext: str, compression: Optional[str],
+                        tables: Dict[str, Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        记录文件末尾的位置和内容校验，之后文件只追加了数据时从该位置读取新增部分
+        
+        只支持未压缩、已读入DuckDB原生表或DataFrame的CSV和JSON Lines文件；
+        视图查询时直接扫描文件，重新探测结构即可，不需要增量读取
+        
+        Args:
+            file_path: 文件路径
+            file_ext: 文件扩展名
+            compression: 压缩格式
+            tables: 文件的表
+        
+        Returns:
+            Optional[Dict[str, Any]]: {'offset': 已读取的字节数, 'check': 末尾内容校验, 'format': 解析格式}，
+                不支持增量读取时返回None
+        """
+        if compression is not None or len(tables) != 1 or file_ext not in DATA_EXTENSIONS:
+            return None
+        source = next(iter(tables.values()))
+        if source['lazy'] or source['cached'] or (source['dataframe'] is None and not source['source_sql']):
+            return None
+        
+        if file_ext == '.csv':
+            file_format = detect_csv_format(file_path)
+        elif file_ext in JSON_LINES_EXTENSIONS or detect_json_format(file_path) == 'newline_delimited':
+            file_format = 'json_lines'
+        else:
+            # 顶层为数组或对象的JSON追加数据时结尾也会变化
+            return None
+        
+        # 末尾没有换行时最后一行可能还未写完，无法确定新增部分从哪里开始
+        offset = os.path.getsize(file_path)
+        check = self._read_tail_check(file_path, offset)
+        if check is None:
+            return None
+        return {'offset': offset, 'check': check, 'format': file_format}
+    
+    @staticmethod
+    def _read_tail_check(file_path: str, offset: int) -> Optional[str]:
+        """
+        计算文件中指定位置之前末尾内容的校验值
+        
+        Args:
+            file_path: 文件路径
+            offset: 位置（字节）
+        
+        Returns:
+            Optional[str]: 校验值，该位置之前不是完整的行时返回None
+        """
+        with open(file_path, 'rb') as f:
+            f.seek(max(0, offset - TAIL_CHECK_SIZE))
+            data = f.read(offset - f.tell())
+        if not data.endswith(b'\n'):
+            return None
+        return hashlib.sha1(data).hexdigest()
+    
+    def _append_tail(self, file_path: str) -> Optional[int]:
+        """
+        文件只在末尾追加了数据时，只读取新增的完整行并追加到原有数据
+        
+        原有末尾内容不变且文件变大时认为只追加了数据；新增的行按原有的列解析，
+        DataFrame数据源直接合并，DuckDB原生表由查询引擎插入新增的行，不重新读取整个文件
+        
+        Args:
+            file_path: 文件路径
+        
+        Returns:
+            Optional[int]: 追加的行数，文件不是只追加了数据时返回None
+        """
+        info = self.loaded_files[file_path]
+        tail = info.get('tail')
+        table_name, source = next(iter(info['tables'].items()))
+        if tail is None or (source['dataframe'] is None and not source['source_sql']):
+            # 从会话恢复或已写入原生表的pandas解析结果没有原数据，追加失败时无法回退，完整重新加载
+            return None
+        
+        offset = tail['offset']
+        if os.path.getsize(file_path) <= offset or self._read_tail_check(file_path, offset) != tail['check']:
+            return None
+        
+        # 只读取完整的行，最后一行还未写完时留到下次读取
+        with open(file_path, 'rb') as f:
+            f.seek(offset)
+            data = f.read()
+        data = data[:data.rfind(b'\n') + 1]
+        
+        column_names = [col for col, _ in source['columns']]
+        if not data.strip():
+            df = pd.DataFrame(columns=column_names)
+        elif tail['format'] == 'json_lines':
+            df = pd.read_json(io.BytesIO(data), lines=True)
+            if not set(df.columns) <= set(column_names):
+                return None
+        else:
+            csv_format = tail['format']
+            df = pd.read_csv(io.BytesIO(data), encoding=csv_format['encoding'], sep=csv_format['delimiter'],
+                             quotechar=csv_format['quotechar'], header=None)
+            if len(df.columns) != len(column_names):
+                return None
+            df.columns = column_names
+        
+        fingerprint = self.get_file_fingerprint(file_path)
+        version = f"{fingerprint}:{source['version'].rsplit(':', 1)[1]}"
+        append = {'base_version': source['version'], 'dataframe': df}
+        if source['dataframe'] is not None:
+            combined = pd.concat([source['dataframe'], df], ignore_index=True)
+            new_source = self._make_source(file_path, version, False, df=combined, append=append)
+        else:
+            new_source = self._make_source(file_path, version, False, source_sql=source['source_sql'],
+                                           columns=source['columns'], append=append)
+        
+        offset += len(data)
+        info.update(
+            tables={table_name: new_source},
+            version=version,
+            fingerprint=fingerprint,
+            tail={'offset': offset, 'check': self._read_tail_check(file_path, offset), 'format': tail['format']}
+        )
+        
+        file_info = self.file_info.get(file_path, {})
+        rows = file_info.get('rows')
+        self.update_file_info(file_path, size=f"{os.path.getsize(file_path) / 1024:.2f} KB",
+                              rows=rows + len(df) if rows is not None else None)
+        return len(df)
+    
+    def _get_conn(self) -> duckdb.DuckDBPyConnection:
+        """
+        获取用于探测文件结构的DuckDB连接
+        
+        Returns:
+            duckdb.DuckDBPyConnection: DuckDB连接
+        """
+        if self.conn is None:
+            self.conn = duckdb.connect(database=':memory:', read_only=False)
+        return self.conn
+    
+    def _describe_source(self, source_sql: str) -> Optional[List[Tuple[str, str]]]:
+        """
+        使用DuckDB获取扫描语句的列信息，只读取采样数据，不解析整个文件
+        
+        Args:
+            source_sql: DuckDB扫描语句
+            
+        Returns:
+            Optional[List[Tuple[str, str]]]: 列信息 [(列名, 类型)]，无法读取时返回None
+        """
+        try:
+            rows = self._get_conn().execute(f"DESCRIBE SELECT * FROM {source_sql}").fetchall()
+        except Exception:
+            return None
+        return [(row[0], row[1]) for row in rows]
+    
+    def _inspect_csv(self, file_path: str) -> Tuple[Optional[str], List[Tuple[str, str]]]:
+        """
+        使用DuckDB探测CSV文件结构，编码、分隔符、引号和表头按采样探测的结果指定
+        
+        Args:
+            file_path: 文件路径
+            
+        Returns:
+            Tuple[Optional[str], List[Tuple[str, str]]]: (DuckDB扫描语句, 列信息)，无法原生读取时扫描语句为None
+        """
+        # DuckDB不能直接读取的压缩格式（如bz2）交给pandas处理
+        if split_compression(file_path)[1] not in [None] + DUCKDB_COMPRESSIONS:
+            return None, []
+        
+        try:
+            # DuckDB不支持的编码（如gbk）交给pandas处理
+            options = csv_scan_options(detect_csv_format(file_path))
+            if options is None:
+                return None, []
+            options = f", {options}"
+        except ImportError:
+            # 未安装zstandard时无法采样zst文件，由DuckDB自行探测格式
+            options = ""
+        
+        source_sql = f"read_csv_auto({sql_string_literal(file_path)}{options})"
+        columns = self._describe_source(source_sql)
+        if not columns:
+            return None, []
+        
+        return source_sql, columns
+    
+    def _inspect_json(self, file_path: str, json_format: str) -> Tuple[Optional[str], List[Tuple[str, str]]]:
+        """
+        使用DuckDB探测JSON文件结构，仅支持顶层为数组的JSON和JSON Lines
+        
+        Args:
+            file_path: 文件路径
+            json_format: JSON格式，'array'、'newline_delimited'或'auto'
+            
+        Returns:
+            Tuple[Optional[str], List[Tuple[str, str]]]: (DuckDB扫描语句, 列信息)，无法原生读取时扫描语句为None
+        """
+        # DuckDB不能直接读取的压缩格式（如bz2）交给pandas处理
+        if split_compression(file_path)[1] not in [None] + DUCKDB_COMPRESSIONS:
+            return None, []
+        
+        source_sql = f"read_json_auto({sql_string_literal(file_path)}, format={sql_string_literal(json_format)})"
+        columns = self._describe_source(source_sql)
+        if not columns:
+            return None, []
+        
+        return source_sql, columns
+    
+    def _load_deferred(self, file_path: str, part: str) -> pd.DataFrame:
+        """
+        读取Excel工作表或zip压缩包成员的数据，在首次查询或预览该表时由查询引擎调用
+        
+        Args:
+            file_path: 文件路径
+            part: 工作表名或压缩包成员名
+            
+        Returns:
+            pd.DataFrame: 数据
+        """
+        if self.split_file_name(file_path)[1] in ARCHIVE_EXTENSIONS:
+            df = read_archive_member(file_path, part)
+        else:
+            df = read_excel_sheet(file_path, part)
+        self.cache.store(file_path, df, part)
+        
+        # 在查询线程中调用，界面线程可能同时重新加载、移除文件或保存会话
+        with self.lock:
+            if file_path in self.loaded_files:
+                tables = self.loaded_files[file_path]['tables']
+                for name, source in tables.items():
+                    if source['part'] == part:
+                        source['dataframe'] = df
+                        source['columns'] = [(str(col), str(dtype)) for col, dtype in df.dtypes.items()]
+                        if len(tables) == 1:
+                            self.update_file_info(file_path, rows=len(df), columns=len(df.columns))
+                        else:
+                            for table_info in self.file_info.get(file_path, {}).get('tables', []):
+                                if table_info['table_name'] == name:
+                                    table_info.update(rows=len(df), columns=len(df.columns))
+                        self.deferred_updates.add(file_path)
+        
+        return df
+    
+    def pop_deferred_updates(self) -> List[str]:
+        """
+        取出读取工作表或成员文件后行数已更新的文件，由界面刷新文件列表
+        
+        Returns:
+            List[str]: 文件路径列表
+        """
+        with self.lock:
+            file_paths = list(self.deferred_updates)
+            self.deferred_updates.clear()
+            return file_paths
+    
+    def update_file_info(self, file_path: str, **info: Any) -> None:
+        """
+        更新文件信息
+        
+        Args:
+            file_path: 文件路径
+            **info: 要更新的信息项，如rows、columns
+        """
+        with self.lock:
+            if file_path in self.file_info:
+                self.file_info[file_path].update(info)
+    
     def remove_file(self, file_path: str) -> None:
         """
         从已加载列表中移除文件
@@ -100,11 +1238,79 @@ class FileHandler:
         Args:
             file_path: 文件路径
         """
-        if file_path in self.loaded_files:
-            del self.loaded_files[file_path]
+        with self.lock:
+            if file_path in self.loaded_files:
+                del self.loaded_files[file_path]
+            
+            if file_path in self.file_info:
+                del self.file_info[file_path]
+    
+    def get_session_state(self) -> Dict[str, Dict[str, Any]]:
+        """
+        获取已加载文件的状态，保存到会话数据库后，下次打开会话时文件未变化则不重新解析
         
-        if file_path in self.file_info:
-            del self.file_info[file_path]
+        Returns:
+            Dict[str, Dict[str, Any]]: {文件路径: 状态}，状态可序列化为JSON
+        """
+        with self.lock:
+            return {
+                path: {
+                    'info': self.file_info.get(path, {}),
+                    'table_name': info['table_name'],
+                    'version': info['version'],
+                    'fingerprint': info['fingerprint'],
+                    'tail': info['tail'],
+                    'tables': {
+                        name: {key: source[key] for key in SESSION_SOURCE_KEYS}
+                        for name, source in info['tables'].items()
+                    }
+                }
+                for path, info in self.loaded_files.items()
+            }
+    
+    def restore_file(self, file_path: str, state: Dict[str, Any], table_versions: Dict[str, str]) -> bool:
+        """
+        从会话数据库保存的状态恢复文件，不重新解析文件
+        
+        Args:
+            file_path: 文件路径
+            state: get_session_state保存的文件状态
+            table_versions: 会话数据库中已有的表 {表名: 版本}
+        
+        Returns:
+            bool: 是否已恢复，文件已变化或会话中缺少无法重新扫描的表时返回False，需要重新加载文件
+        """
+        with self.lock:
+            try:
+                if self._get_current_fingerprint(file_path) != state['fingerprint']:
+                    return False
+            except OSError:
+                return False
+            
+            tables = {}
+            for name, saved in state['tables'].items():
+                part = saved['part']
+                deferred = part is not None and not saved['source_sql'] and not saved['attach']
+                if table_versions.get(name) != saved['version'] and not saved['source_sql'] and not deferred:
+                    # 经过pandas解析的数据只保存在会话中，会话中没有时需要重新解析文件
+                    return False
+                
+                loader = (lambda part=part: self._load_deferred(file_path, part)) if deferred else None
+                tables[name] = self._make_source(
+                    file_path, saved['version'], saved['lazy'], source_sql=saved['source_sql'], loader=loader,
+                    columns=[tuple(col) for col in saved['columns']], part=part, cached=saved['cached'],
+                    attach=saved['attach'], rows=saved['rows']
+                )
+            
+            self.loaded_files[file_path] = {
+                'table_name': state['table_name'],
+                'tables': tables,
+                'version': state['version'],
+                'fingerprint': state['fingerprint'],
+                'tail': state['tail']
+            }
+            self.file_info[file_path] = state['info']
+            return True
     
     def get_loaded_files(self) -> Dict:
         """
@@ -122,13 +1328,37 @@ class FileHandler:
         Returns:
             Dict[str, str]: {表名: 文件路径}
         """
-        return {info['table_name']: path for path, info in self.loaded_files.items()}
+        return {name: path for path, info in self.loaded_files.items() for name in info['tables']}
     
     def get_dataframes(self) -> Dict[str, pd.DataFrame]:
         """
-        获取所有数据框和对应的表名
+        获取所有数据框和对应的表名（不包含DuckDB原生读取的文件）
         
         Returns:
             Dict[str, pd.DataFrame]: {表名: DataFrame}
         """
-        return {info['table_name']: info['dataframe'] for path, info in self.loaded_files.items()} 
\ No newline at end of file
+        return {name: source['dataframe'] for name, source in self.get_table_sources().items()
+                if source['dataframe'] is not None}
+    
+    def get_table_sources(self) -> Dict[str, Dict[str, Any]]:
+        """
+        获取所有表的数据源
+        
+        Returns:
+            Dict[str, Dict[str, Any]]: {表名: 数据源}，数据源包含dataframe、source_sql、lazy、loader和columns
+        """
+        return {name: source for path, info in self.loaded_files.items() for name, source in info['tables'].items()}
+    
+    def get_file_tables(self, file_path: str) -> Dict[str, Dict[str, Any]]:
+        """
+        获取一个文件的所有表
+        
+        Args:
+            file_path: 文件路径
+        
+        Returns:
+            Dict[str, Dict[str, Any]]: {表名: 数据源}，文件未加载时为空字典
+        """
+        if file_path not in self.loaded_files:
+            return {}
+        return dict(self.loaded_files[file_path]['tables']) 
\ No newline at end of file
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+内存占用统计模块
+汇总每张表和每个查询结果的存储方式与内存占用，用于查看数据在哪里、占用了多少内存
+"""
+
+import os
+from typing import Dict, Optional, Any
+
+import pandas as pd
+
+from app.core.result_set import ResultSet, DataFrameResult, PagedResult, FilteredResult
+
+# psutil为可选依赖，安装后显示进程的常驻内存
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# 存储方式 -> 显示名称
+STORAGE_LABELS = {
+    'native': 'DuckDB原生表',
+    'dataframe': 'pandas DataFrame',
+    'arrow': 'Arrow数据集（内存映射）',
+    'view': '视图（查询时扫描文件）',
+    'pending': '尚未读取',
+    'result': 'DuckDB临时表'
+}
+
+
+def dataframe_size(df: pd.DataFrame) -> int:
+    """
+    统计DataFrame占用的内存，包括字符串等对象列的实际内容
+    
+    Args:
+        df: 数据框
+    
+    Returns:
+        int: 字节数
+    """
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def _describe_result(name: str, result: ResultSet) -> Dict[str, Any]:
+    """
+    获取查询结果的存储方式和数据量
+    
+    Args:
+        name: 结果名称
+        result: 结果集
+    
+    Returns:
+        Dict[str, Any]: 明细项，DuckDB临时表中的结果由调用方分摊内存
+    """
+    item = {'category': '查询结果', 'name': name, 'rows': result.row_count, 'columns': len(result.columns),
+            'size': None, 'estimated': False}
+    if isinstance(result, DataFrameResult):
+        item['storage'] = 'dataframe'
+        item['size'] = dataframe_size(result.df)
+        if result._paged is not None:
+            # 过滤排序时数据框已复制到独立的内存数据库
+            item['size'] *= 2
+    elif isinstance(result, (PagedResult, FilteredResult)):
+        item['storage'] = 'result'
+    else:
+        item['storage'] = 'dataframe'
+    return item
+
+
+def build_memory_report(engine: Any, results: Optional[Dict[str, ResultSet]] = None) -> Dict[str, Any]:
+    """
+    汇总内存占用明细
+    
+    DuckDB不提供单张表的内存占用，原生表和保存在DuckDB临时表中的结果按行数×列数分摊DuckDB中表数据占用的内存，
+    为估算值；DataFrame按pandas统计的实际占用计算；Arrow数据集为内存映射的文件，视图查询时才扫描文件，均不常驻内存
+    
+    Args:
+        engine: 查询引擎
+        results: {名称: 结果集}，如结果面板当前显示的结果，同一结果集只统计一次
+    
+    Returns:
+        Dict[str, Any]: {'items': 明细项列表, 'duckdb': (内存占用, 换出到磁盘的字节数, 内存上限)或None,
+            'result_cache': (缓存的结果数, 字节数), 'process': 进程常驻内存字节数或None}，
+            明细项为 {'category': '表'或'查询结果', 'name': 名称, 'storage': 存储方式, 'rows': 行数,
+            'columns': 列数, 'size': 字节数或None, 'estimated': 是否为估算值}
+    """
+    tables, table_memory = engine.get_table_storage()
+    items = []
+    for table in tables:
+        item = {'category': '表', 'name': table['table_name'], 'storage': table['storage'],
+                'rows': table['rows'], 'columns': table['columns'], 'size': None, 'estimated': False}
+        if table['storage'] == 'dataframe':
+            item['size'] = dataframe_size(table['data'])
+        elif table['storage'] in ('arrow', 'view', 'pending'):
+            item['size'] = 0
+        items.append(item)
+    
+    seen = set()
+    for name, result in (results or {}).items():
+        if result is None or id(result) in seen:
+            continue
+        seen.add(id(result))
+        items.append(_describe_result(name, result))
+    
+    # 原生表和DuckDB临时表中的结果按数据量分摊表数据占用的内存
+    shared = [item for item in items if item['storage'] in ('native', 'result')]
+    weights = [(item['rows'] or 0) * max(item['columns'] or 1, 1) for item in shared]
+    total_weight = sum(weights)
+    for item, weight in zip(shared, weights):
+        if table_memory is not None:
+            item['size'] = int(table_memory * weight / total_weight) if total_weight else 0
+            item['estimated'] = True
+    
+    process = None
+    if psutil is not None:
+        try:
+            process = psutil.Process(os.getpid()).memory_info().rss
+        except Exception:
+            process = None
+    
+    cache = engine.result_cache
+    return {
+        'items': items,
+        'duckdb': engine.get_memory_usage(),
+        'result_cache': (len(cache.entries), cache.size),
+        'process': process
+    }
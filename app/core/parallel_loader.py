@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+并行加载模块
+批量添加文件时，在多个进程中并行解析需要pandas解析的文件（Excel工作表、zip压缩包成员、DuckDB不能原生读取的CSV/JSON），
+解析结果以Parquet写入文件缓存，主进程随后直接读取缓存注册为表；DuckDB可以原生读取的文件由主进程直接注册
+"""
+
+import os
+import duckdb
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple, Optional, Any
+
+from app.core.config import config_manager
+from app.core.compression import ARCHIVE_EXTENSIONS, list_archive_members
+from app.core.excel_reader import read_excel_headers, read_excel_sheets
+from app.core.file_handler import (
+    FileHandler, DATA_EXTENSIONS, EXCEL_EXTENSIONS, read_archive_member
+)
+
+
+def prepare_file(file_path: str, lazy: bool) -> Dict[str, Any]:
+    """
+    在子进程中预处理文件，完成耗时的解析工作
+    
+    解析结果写入文件缓存，主进程加载时直接读取Parquet；未启用缓存或写入失败时把解析的数据传回主进程。
+    DuckDB可以原生读取的CSV/JSON不在子进程中读取，由主进程注册扫描语句，只扫描一次文件，也保留只追加数据时的增量读取；
+    延迟加载时只读取Excel表头和需要pandas解析的文件，其余数据在首次查询时读取。
+    多个进程同时运行，子进程中的DuckDB只使用一个线程
+    
+    Args:
+        file_path: 文件路径
+        lazy: 是否启用延迟加载
+    
+    Returns:
+        Dict[str, Any]: 预处理结果，excel_headers为Excel各工作表表头，
+            parts为未写入缓存的工作表或压缩包成员 {部分名: 数据}，dataframe为未写入缓存的文件数据
+    """
+    # 文件夹、通配符和不存在的文件由主进程处理
+    if not os.path.isfile(file_path):
+        return {}
+    
+    handler = FileHandler()
+    handler.conn = duckdb.connect(database=':memory:', read_only=False, config={'threads': 1})
+    handler.cache.write_threads = 1
+    _, file_ext, compression = handler.split_file_name(os.path.basename(file_path))
+    
+    if compression is None and file_ext in EXCEL_EXTENSIONS + ARCHIVE_EXTENSIONS:
+        is_archive = file_ext in ARCHIVE_EXTENSIONS
+        if is_archive:
+            headers = {member: [] for member in list_archive_members(file_path, DATA_EXTENSIONS)}
+        else:
+            headers = read_excel_headers(file_path)
+        result = {} if is_archive else {'excel_headers': headers}
+        if lazy:
+            return result
+        
+        # 每个工作表或成员文件写入各自的缓存
+        pending = [part for part in headers if handler.cache.lookup(file_path, part) is None]
+        if is_archive:
+            frames = {member: read_archive_member(file_path, member) for member in pending}
+        else:
+            frames = read_excel_sheets(file_path, pending) if pending else {}
+        result['parts'] = {part: df for part, df in frames.items() if handler.cache.store(file_path, df, part) is None}
+        return result
+    
+    if file_ext not in DATA_EXTENSIONS:
+        return {}
+    
+    # 与主进程相同的读取方式，需要pandas解析的数据由_load_table写入缓存；DuckDB原生读取的文件只探测结构
+    source = handler._load_table(file_path, file_ext, "", lazy)
+    if source['dataframe'] is None or handler.cache.lookup(file_path) is not None:
+        return {}
+    return {'dataframe': source['dataframe']}
+
+
+class ParallelLoader:
+    """并行加载器，在进程池中预处理多个文件，主线程轮询已完成的文件"""
+    
+    def __init__(self, max_workers: Optional[int] = None):
+        """
+        初始化并行加载器
+        
+        Args:
+            max_workers: 最大进程数，默认为CPU核数
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.executor = None
+        self.futures = {}  # {Future: 文件路径}
+        self.total = 0
+    
+    def start(self, file_paths: List[str]) -> None:
+        """
+        提交文件到进程池开始预处理
+        
+        Args:
+            file_paths: 文件路径列表
+        """
+        lazy = bool(config_manager.get_config("loading", "lazy_load", False))
+        
+        self.total = len(file_paths)
+        self.executor = ProcessPoolExecutor(max_workers=min(self.max_workers, max(1, len(file_paths))))
+        for file_path in file_paths:
+            future = self.executor.submit(prepare_file, file_path, lazy)
+            self.futures[future] = file_path
+    
+    def poll(self) -> List[Tuple[str, Optional[Dict[str, Any]], str]]:
+        """
+        获取已完成预处理的文件
+        
+        Returns:
+            List[Tuple[str, Optional[Dict[str, Any]], str]]: [(文件路径, 预处理结果, 错误信息)]，
+                预处理失败时结果为None，由主线程按普通方式加载
+        """
+        done = []
+        for future in [f for f in self.futures if f.done()]:
+            file_path = self.futures.pop(future)
+            try:
+                done.append((file_path, future.result(), ""))
+            except Exception as e:
+                done.append((file_path, None, str(e)))
+        
+        if not self.futures:
+            self.shutdown()
+        return done
+    
+    def is_done(self) -> bool:
+        """
+        是否所有文件都已完成预处理
+        
+        Returns:
+            bool: 是否完成
+        """
+        return not self.futures
+    
+    def get_progress(self) -> Tuple[int, int]:
+        """
+        获取进度
+        
+        Returns:
+            Tuple[int, int]: (已完成文件数, 文件总数)
+        """
+        return self.total - len(self.futures), self.total
+    
+    def shutdown(self) -> None:
+        """关闭进程池，取消尚未开始的任务"""
+        for future in self.futures:
+            future.cancel()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+        self.futures = {}
\ No newline at end of file
@@ -6,10 +6,24 @@
 使用DuckDB执行SQL查询
 """
 
+import os
+import re
+import json
 import time
+import threading
 import duckdb
 import pandas as pd
-from typing import Dict, List, Tuple, Optional, Any
+from typing import Dict, List, Tuple, Optional, Any, Callable
+
+from app.core.config import config_manager
+from app.core.result_set import ResultSet, DataFrameResult, PagedResult, StreamingResult
+from app.core.result_cache import ResultCache, is_read_only_query, result_data_size
+from app.core.query_profiler import profile_query
+from app.core.query_sampler import sample_query, DEFAULT_SAMPLE_METHOD
+from app.core.file_handler import sql_string_literal
+
+# 会话数据库中保存表版本和文件状态的模式，与用户的表分开
+SESSION_SCHEMA = 'queryx'
 
 
 class QueryEngine:
@@ -18,10 +32,25 @@ class QueryEngine:
     def __init__(self):
         """初始化查询引擎"""
         self.conn = duckdb.connect(database=':memory:', read_only=False)
+        self.database = None  # 会话数据库文件路径，为None时使用内存数据库
         self.query_history = []  # 存储查询历史
         self.last_result = None  # 存储最近一次查询结果
         self.execution_time = 0  # 存储查询执行时间(毫秒)
+        self.cache_hit = False  # 最近一次查询是否命中结果缓存
+        self.sample_info = None  # 最近一次查询的抽样信息，见query_sampler.sample_query，未抽样时为None
+        self.result_cache = ResultCache()  # 按规范化SQL和引用表版本缓存的查询结果
         self.registered_tables = set()  # 存储已注册的表名
+        self.table_versions = {}  # 存储已注册表的数据源版本 {表名: 版本指纹}
+        self.pending_tables = {}  # 存储尚未读取数据的延迟加载表 {表名: 数据源}
+        self.registered_frames = {}  # 存储以DataFrame或Arrow数据集注册的表 {表名: 数据}，后台查询游标需要重新注册
+        self.attached_tables = {}  # 存储DuckDB数据库文件中的表 {表名: 数据库别名}，不再使用的数据库自动分离
+        self.lock = threading.RLock()  # 保护主连接，后台查询使用独立游标
+        self.apply_settings()
+    
+    @property
+    def materialize_tables(self) -> bool:
+        """经过pandas解析的DataFrame是否在注册时写入DuckDB原生表"""
+        return bool(config_manager.get_config("loading", "materialize_tables", True))
     
     def register_dataframes(self, dataframes: Dict[str, pd.DataFrame]) -> None:
         """
@@ -30,27 +59,232 @@ class QueryEngine:
         Args:
             dataframes: {表名: DataFrame} 字典
         """
-        # 获取当前要注册的表名集合
-        current_tables = set(dataframes.keys())
+        # 以DataFrame对象标识作为版本，同一对象不会重复注册
+        self.register_tables({
+            name: {'dataframe': df, 'version': f"df:{id(df)}"} for name, df in dataframes.items()
+        })
+    
+    def register_tables(self, tables: Dict[str, Dict[str, Any]]) -> Dict[str, str]:
+        """
+        增量注册表到DuckDB，只处理新增、变化和已移除的表
+        
+        Args:
+            tables: {表名: 数据源} 字典，数据源格式见register_table
+            
+        Returns:
+            Dict[str, str]: 注册失败的表 {表名: 错误信息}
+        """
+        errors = {}
         
-        # 找出需要删除的表（已注册但不在当前dataframes中的表）
-        tables_to_remove = self.registered_tables - current_tables
+        # 删除不再需要的表（已注册但不在当前tables中的表）
+        for table_name in self.registered_tables - set(tables.keys()):
+            self.remove_table(table_name)
         
-        # 删除不再需要的表
-        for table_name in tables_to_remove:
-            self._drop_table(table_name)
+        # 注册新增或版本变化的表
+        for table_name, source in tables.items():
+            success, message = self.register_table(table_name, source)
+            if not success:
+                errors[table_name] = message
+        
+        return errors
+    
+    def register_table(self, table_name: str, source: Dict[str, Any]) -> Tuple[bool, str]:
+        """
+        注册单个表到DuckDB，版本未变化时不做任何操作
+        
+        Args:
+            table_name: 表名
+            source: 数据源字典，包含以下键：
+                dataframe: DataFrame或None
+                source_sql: DuckDB扫描语句或None
+                lazy: 是否延迟加载，为True时扫描语句注册为视图，查询时才读取文件
+                arrow: Arrow数据集或None，由DuckDB直接扫描（投影和过滤条件下推），不复制数据
+                attach: DuckDB数据库文件 {'alias': 别名, 'path': 路径}，注册视图前以只读方式附加
+                loader: 延迟读取数据的函数，首次查询该表时调用，返回DataFrame
+                columns: 延迟加载表的列信息 [(列名, 类型)]
+                version: 数据源版本指纹，相同版本不会重复注册
+                append: 文件只追加了数据时的新增部分 {'base_version': 追加前的版本, 'dataframe': 新增的行}，
+                    已注册追加前版本的原生表时只插入新增的行
+            
+        Returns:
+            Tuple[bool, str]: (是否成功, 错误信息)
+        """
+        version = source.get('version')
+        if version is not None and self.table_versions.get(table_name) == version:
+            return True, ""
         
-        # 注册或更新当前的表
-        for table_name, df in dataframes.items():
+        with self.lock:
+            if self._append_rows(table_name, source):
+                self.table_versions[table_name] = version
+                self._save_table_state(table_name)
+                return True, ""
+            
             # 如果表已存在，先删除
             if table_name in self.registered_tables:
+                self.remove_table(table_name)
+            elif self.database is not None:
+                # 会话文件中可能残留没有记录的同名表
                 self._drop_table(table_name)
             
-            # 注册新表
-            self.conn.register(table_name, df)
+            source_sql = source.get('source_sql')
+            attach = source.get('attach')
+            try:
+                if attach:
+                    # 数据库文件以只读方式附加，同一文件的多张表共用
+                    self.conn.execute(f"ATTACH IF NOT EXISTS {sql_string_literal(attach['path'])} "
+                                      f"AS \"{attach['alias']}\" (READ_ONLY)")
+                    self.attached_tables[table_name] = attach['alias']
+                
+                if source_sql and source.get('lazy'):
+                    # 注册为文件上的视图，查询时才扫描文件
+                    self.conn.execute(f'CREATE VIEW "{table_name}" AS SELECT * FROM {source_sql}')
+                elif source_sql:
+                    # 由DuckDB直接读取文件到原生表中
+                    self.conn.execute(f'CREATE TABLE "{table_name}" AS SELECT * FROM {source_sql}')
+                elif source.get('arrow') is not None:
+                    # Arrow数据集按需扫描，不读入内存
+                    self._register_frame(table_name, source['arrow'])
+                elif source.get('loader') and source.get('dataframe') is None:
+                    # 首次查询该表时才读取数据
+                    self.pending_tables[table_name] = source
+                else:
+                    # 注册新表
+                    self._register_frame(table_name, source['dataframe'], materialize=self.materialize_tables)
+                    if table_name not in self.registered_frames:
+                        self._release_dataframe(source)
+            except Exception as e:
+                self._detach_unused(table_name)
+                return False, str(e)
+            
+            self.registered_tables.add(table_name)
+            self.table_versions[table_name] = version
+            if table_name not in self.pending_tables:
+                self._save_table_state(table_name)
+            return True, ""
+    
+    def _register_frame(self, table_name: str, data: Any, materialize: bool = False) -> None:
+        """
+        注册DataFrame或Arrow数据集，打开会话时写入会话数据库，之后不再需要原数据
+        
+        Args:
+            table_name: 表名
+            data: DataFrame或Arrow数据集
+            materialize: 未打开会话时是否也写入DuckDB原生表，查询时不再需要把pandas数据转换为DuckDB格式
+        """
+        if self.database is None and not materialize:
+            self.conn.register(table_name, data)
+            self.registered_frames[table_name] = data
+            return
         
-        # 更新已注册表集合
-        self.registered_tables = current_tables
+        self.conn.register('__queryx_frame', data)
+        try:
+            self.conn.execute(f'CREATE TABLE "{table_name}" AS SELECT * FROM __queryx_frame')
+        finally:
+            self.conn.unregister('__queryx_frame')
+    
+    @staticmethod
+    def _release_dataframe(source: Dict[str, Any]) -> None:
+        """
+        数据已写入原生表后释放数据源中的DataFrame，只保留一份数据
+        
+        Args:
+            source: 数据源字典，记录行数后将dataframe置为None
+        """
+        df = source.get('dataframe')
+        if df is not None:
+            source['rows'] = len(df)
+            source['dataframe'] = None
+    
+    def get_dataframe_tables(self) -> List[str]:
+        """
+        获取以DataFrame注册的表，这些表可以转换为原生表
+        
+        Returns:
+            List[str]: 表名列表
+        """
+        with self.lock:
+            return [name for name, data in self.registered_frames.items() if isinstance(data, pd.DataFrame)]
+    
+    def materialize_table(self, table_name: str, source: Optional[Dict[str, Any]] = None) -> Tuple[bool, str]:
+        """
+        将以DataFrame注册的表写入DuckDB原生表，之后查询不再需要转换pandas数据
+        
+        Args:
+            table_name: 表名
+            source: 表的数据源，写入后释放其中的DataFrame
+        
+        Returns:
+            Tuple[bool, str]: (是否成功, 成功/错误信息)
+        """
+        with self.lock:
+            df = self.registered_frames.get(table_name)
+            if not isinstance(df, pd.DataFrame):
+                return False, f"表 {table_name} 不是以DataFrame注册的表"
+            
+            self.conn.unregister(table_name)
+            del self.registered_frames[table_name]
+            try:
+                self._register_frame(table_name, df, materialize=True)
+            except Exception as e:
+                self._register_frame(table_name, df)
+                return False, f"转换为原生表失败: {str(e)}"
+        
+        if source is not None:
+            self._release_dataframe(source)
+        return True, f"已将表 {table_name} 转换为原生表"
+    
+    def _append_rows(self, table_name: str, source: Dict[str, Any]) -> bool:
+        """
+        将文件新增的行插入已注册的原生表，不重新读取整个文件
+        
+        Args:
+            table_name: 表名
+            source: 数据源字典
+        
+        Returns:
+            bool: 是否已插入，为False时需要重新注册整个表
+        """
+        append = source.get('append')
+        if (append is None or table_name not in self.registered_tables
+                or self.table_versions.get(table_name) != append['base_version']
+                or table_name in self.registered_frames or table_name in self.pending_tables):
+            return False
+        
+        # 新增的行只需插入一次，之后重新注册时读取整个文件
+        source['append'] = None
+        try:
+            self.conn.register('__queryx_append', append['dataframe'])
+            try:
+                self.conn.execute(f'INSERT INTO "{table_name}" BY NAME SELECT * FROM __queryx_append')
+            finally:
+                self.conn.unregister('__queryx_append')
+        except Exception as e:
+            # 新增的行与表结构不兼容时重新注册整个表
+            print(f"追加数据失败，重新读取文件: {str(e)}")
+            return False
+        return True
+    
+    def _load_pending_tables(self, query: str) -> None:
+        """
+        读取查询语句中引用的延迟加载表
+        
+        Args:
+            query: SQL查询语句
+        """
+        for table_name in list(self.pending_tables.keys()):
+            # 按标识符匹配表名，误匹配只会导致提前读取
+            if re.search(rf'(?<!\w){re.escape(table_name)}(?!\w)', query, re.IGNORECASE):
+                source = self.pending_tables.pop(table_name, None)
+                if source is None:
+                    continue
+                
+                # 读取数据可能较慢，不占用主连接
+                df = source['loader']()
+                with self.lock:
+                    self._register_frame(table_name, df, materialize=self.materialize_tables)
+                    self._save_table_state(table_name)
+                    if table_name not in self.registered_frames:
+                        self._release_dataframe(source)
     
     def remove_table(self, table_name: str) -> bool:
         """
@@ -62,12 +296,33 @@ class QueryEngine:
         Returns:
             bool: 是否成功移除
         """
-        if table_name in self.registered_tables:
-            success = self._drop_table(table_name)
-            if success:
-                self.registered_tables.remove(table_name)
-            return success
-        return False
+        with self.lock:
+            if table_name in self.registered_tables:
+                success = self._drop_table(table_name)
+                if success:
+                    self.registered_tables.remove(table_name)
+                    self.table_versions.pop(table_name, None)
+                    self.pending_tables.pop(table_name, None)
+                    self.registered_frames.pop(table_name, None)
+                    self._detach_unused(table_name)
+                    self._delete_table_state(table_name)
+                return success
+            return False
+    
+    def _detach_unused(self, table_name: str) -> None:
+        """
+        表移除后，分离不再有表使用的数据库文件
+        
+        Args:
+            table_name: 已移除的表名
+        """
+        alias = self.attached_tables.pop(table_name, None)
+        if alias is None or alias in self.attached_tables.values():
+            return
+        try:
+            self.conn.execute(f'DETACH DATABASE IF EXISTS "{alias}"')
+        except Exception as e:
+            print(f"分离数据库失败: {str(e)}")
     
     def _drop_table(self, table_name: str) -> bool:
         """
@@ -91,15 +346,362 @@ class QueryEngine:
             except Exception:
                 return False
     
-    def execute_query(self, query: str) -> Tuple[bool, Any, str]:
+    def open_session(self, database: Optional[str]) -> Tuple[bool, str]:
+        """
+        打开会话数据库文件，已注册的表写入该文件，下次打开时直接恢复，内存不足时DuckDB将数据换出到磁盘
+        
+        当前连接上注册的表全部清除，会话中保存的表恢复为已注册状态
+        
+        Args:
+            database: 会话数据库文件路径，为None时关闭会话，使用内存数据库
+        
+        Returns:
+            Tuple[bool, str]: (是否成功, 成功/错误信息)
+        """
+        with self.lock:
+            try:
+                conn = duckdb.connect(database=database or ':memory:', read_only=False)
+            except Exception as e:
+                return False, f"打开会话失败: {str(e)}"
+            
+            old_conn = self.conn
+            self.conn = conn
+            self.database = database
+            self.registered_tables = set()
+            self.table_versions = {}
+            self.pending_tables = {}
+            self.registered_frames = {}
+            self.attached_tables = {}
+            self.result_cache.clear()
+            try:
+                old_conn.close()
+            except Exception:
+                pass
+            
+            self.apply_settings()
+            if database is None:
+                return True, "已关闭会话"
+            
+            try:
+                self._restore_session()
+            except Exception as e:
+                return False, f"读取会话失败: {str(e)}"
+            return True, f"已打开会话: {os.path.basename(database)} ({len(self.registered_tables)} 个表)"
+    
+    def _restore_session(self) -> None:
+        """读取会话数据库中保存的表，重新附加表引用的数据库文件"""
+        self.conn.execute(f"CREATE SCHEMA IF NOT EXISTS {SESSION_SCHEMA}")
+        self.conn.execute(f"CREATE TABLE IF NOT EXISTS {SESSION_SCHEMA}.tables "
+                          f"(table_name VARCHAR PRIMARY KEY, version VARCHAR, attach VARCHAR)")
+        self.conn.execute(f"CREATE TABLE IF NOT EXISTS {SESSION_SCHEMA}.files (file_path VARCHAR PRIMARY KEY, state VARCHAR)")
+        
+        existing = {row[0] for row in self.conn.execute(
+            "SELECT table_name FROM duckdb_tables() WHERE database_name = current_database() AND schema_name = 'main' "
+            "UNION ALL SELECT view_name FROM duckdb_views() WHERE database_name = current_database() "
+            "AND schema_name = 'main' AND NOT internal"
+        ).fetchall()}
+        
+        for table_name, version, attach in self.conn.execute(
+                f"SELECT table_name, version, attach FROM {SESSION_SCHEMA}.tables").fetchall():
+            if table_name not in existing:
+                continue
+            if attach:
+                attach = json.loads(attach)
+                try:
+                    self.conn.execute(f"ATTACH IF NOT EXISTS {sql_string_literal(attach['path'])} "
+                                      f"AS \"{attach['alias']}\" (READ_ONLY)")
+                except Exception as e:
+                    # 数据库文件已不可用，视图在重新加载文件时重建
+                    print(f"附加数据库失败: {str(e)}")
+                    continue
+                self.attached_tables[table_name] = attach['alias']
+            self.registered_tables.add(table_name)
+            self.table_versions[table_name] = version
+    
+    def _save_table_state(self, table_name: str) -> None:
+        """
+        在会话数据库中记录表的版本
+        
+        Args:
+            table_name: 表名
+        """
+        if self.database is None:
+            return
+        alias = self.attached_tables.get(table_name)
+        attach = None
+        if alias is not None:
+            path = self.conn.execute("SELECT path FROM duckdb_databases() WHERE database_name = ?", [alias]).fetchone()
+            attach = json.dumps({'alias': alias, 'path': path[0]}) if path else None
+        self.conn.execute(f"INSERT OR REPLACE INTO {SESSION_SCHEMA}.tables VALUES (?, ?, ?)",
+                          [table_name, self.table_versions.get(table_name), attach])
+    
+    def _delete_table_state(self, table_name: str) -> None:
+        """
+        从会话数据库中删除表的记录
+        
+        Args:
+            table_name: 表名
+        """
+        if self.database is None:
+            return
+        self.conn.execute(f"DELETE FROM {SESSION_SCHEMA}.tables WHERE table_name = ?", [table_name])
+    
+    def save_session_files(self, files: Dict[str, Dict[str, Any]]) -> None:
+        """
+        在会话数据库中保存已加载文件的状态，未打开会话时不做任何操作
+        
+        Args:
+            files: {文件路径: 状态}，见FileHandler.get_session_state
+        """
+        if self.database is None:
+            return
+        with self.lock:
+            self.conn.execute("BEGIN TRANSACTION")
+            try:
+                self.conn.execute(f"DELETE FROM {SESSION_SCHEMA}.files")
+                for file_path, state in files.items():
+                    self.conn.execute(f"INSERT INTO {SESSION_SCHEMA}.files VALUES (?, ?)",
+                                      [file_path, json.dumps(state, ensure_ascii=False)])
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+    
+    def load_session_files(self) -> Dict[str, Dict[str, Any]]:
+        """
+        读取会话数据库中保存的文件状态
+        
+        Returns:
+            Dict[str, Dict[str, Any]]: {文件路径: 状态}，未打开会话时为空字典
+        """
+        if self.database is None:
+            return {}
+        with self.lock:
+            rows = self.conn.execute(f"SELECT file_path, state FROM {SESSION_SCHEMA}.files ORDER BY rowid").fetchall()
+        return {file_path: json.loads(state) for file_path, state in rows}
+    
+    def create_session(self, database: str, files: Dict[str, Dict[str, Any]]) -> Tuple[bool, str]:
+        """
+        新建会话数据库文件，当前已读入的表写入该文件后打开新会话
+        
+        文件上的视图不复制，由调用方重新注册
+        
+        Args:
+            database: 会话数据库文件路径，已存在时覆盖
+            files: 已加载文件的状态，见FileHandler.get_session_state
+        
+        Returns:
+            Tuple[bool, str]: (是否成功, 成功/错误信息)
+        """
+        with self.lock:
+            try:
+                for path in (database, f"{database}.wal"):
+                    if os.path.exists(path):
+                        os.remove(path)
+                
+                self.conn.execute(f"ATTACH {sql_string_literal(database)} AS queryx_new_session")
+                try:
+                    base_tables = {row[0] for row in self.conn.execute(
+                        "SELECT table_name FROM duckdb_tables() WHERE database_name = current_database() "
+                        "AND schema_name = 'main'"
+                    ).fetchall()}
+                    schema = f"queryx_new_session.{SESSION_SCHEMA}"
+                    self.conn.execute(f"CREATE SCHEMA {schema}")
+                    self.conn.execute(f"CREATE TABLE {schema}.tables "
+                                      f"(table_name VARCHAR PRIMARY KEY, version VARCHAR, attach VARCHAR)")
+                    self.conn.execute(f"CREATE TABLE {schema}.files (file_path VARCHAR PRIMARY KEY, state VARCHAR)")
+                    
+                    for table_name in self.registered_tables:
+                        if table_name in base_tables or table_name in self.registered_frames:
+                            self.conn.execute(f'CREATE TABLE queryx_new_session.main."{table_name}" '
+                                              f'AS SELECT * FROM "{table_name}"')
+                            self.conn.execute(f"INSERT INTO {schema}.tables VALUES (?, ?, NULL)",
+                                              [table_name, self.table_versions.get(table_name)])
+                    for file_path, state in files.items():
+                        self.conn.execute(f"INSERT INTO {schema}.files VALUES (?, ?)",
+                                          [file_path, json.dumps(state, ensure_ascii=False)])
+                finally:
+                    self.conn.execute("DETACH queryx_new_session")
+            except Exception as e:
+                return False, f"新建会话失败: {str(e)}"
+            
+            return self.open_session(database)
+    
+    def compact_session(self) -> Tuple[bool, str]:
+        """
+        压缩会话数据库文件：复制到新文件后替换原文件，回收删除和替换表后留下的空间
+        
+        Returns:
+            Tuple[bool, str]: (是否成功, 成功/错误信息)
+        """
+        database = self.database
+        if database is None:
+            return False, "当前没有打开会话"
+        
+        with self.lock:
+            # 尚未读取数据的延迟加载表不在会话文件中，重新打开后保留
+            pending = {name: (source, self.table_versions.get(name)) for name, source in self.pending_tables.items()}
+            size_before = os.path.getsize(database)
+            compact_path = f"{database}.compact"
+            
+            # 关闭会话文件后复制
+            self.open_session(None)
+            error = None
+            try:
+                if os.path.exists(compact_path):
+                    os.remove(compact_path)
+                self.conn.execute(f"ATTACH {sql_string_literal(database)} AS queryx_compact_src (READ_ONLY)")
+                self.conn.execute(f"ATTACH {sql_string_literal(compact_path)} AS queryx_compact_dst")
+                self.conn.execute("COPY FROM DATABASE queryx_compact_src TO queryx_compact_dst")
+                self.conn.execute("DETACH queryx_compact_src")
+                self.conn.execute("DETACH queryx_compact_dst")
+                os.replace(compact_path, database)
+            except Exception as e:
+                error = str(e)
+                if os.path.exists(compact_path):
+                    os.remove(compact_path)
+            
+            success, message = self.open_session(database)
+            for name, (source, version) in pending.items():
+                self.pending_tables[name] = source
+                self.registered_tables.add(name)
+                self.table_versions[name] = version
+            
+            if error is not None:
+                return False, f"压缩会话失败: {error}"
+            if not success:
+                return False, message
+            size_after = os.path.getsize(database)
+            return True, f"会话已压缩: {size_before / 1024 / 1024:.2f} MB → {size_after / 1024 / 1024:.2f} MB"
+    
+    def apply_settings(self, options: Optional[Dict[str, Any]] = None) -> Tuple[bool, str]:
+        """
+        应用性能配置：内存上限、线程数、临时目录和是否保持插入顺序，空值恢复DuckDB默认值
+        
+        Args:
+            options: 性能配置，为None时读取配置文件中的performance配置
+        
+        Returns:
+            Tuple[bool, str]: (是否成功, 成功/错误信息)
+        """
+        if options is None:
+            options = config_manager.get_performance_options()
+        
+        statements = []
+        memory_limit = str(options.get('memory_limit') or '').strip()
+        statements.append(f"SET memory_limit = {sql_string_literal(memory_limit)}" if memory_limit
+                          else "RESET memory_limit")
+        threads = int(options.get('threads') or 0)
+        statements.append(f"SET threads = {threads}" if threads > 0 else "RESET threads")
+        temp_directory = os.path.expanduser(str(options.get('temp_directory') or '').strip())
+        statements.append(f"SET temp_directory = {sql_string_literal(temp_directory)}" if temp_directory
+                          else "RESET temp_directory")
+        preserve_order = bool(options.get('preserve_insertion_order', True))
+        statements.append(f"SET preserve_insertion_order = {str(preserve_order).lower()}")
+        
+        errors = []
+        with self.lock:
+            for statement in statements:
+                try:
+                    self.conn.execute(statement)
+                except Exception as e:
+                    errors.append(str(e))
+        if errors:
+            return False, f"应用性能设置失败: {'; '.join(errors)}"
+        return True, "性能设置已生效"
+    
+    def get_memory_usage(self) -> Optional[Tuple[int, int, str]]:
+        """
+        获取DuckDB当前的内存占用
+        
+        Returns:
+            Optional[Tuple[int, int, str]]: (内存占用字节数, 换出到磁盘的字节数, 内存上限)，
+                主连接正在注册表等操作时不等待，返回None
+        """
+        if not self.lock.acquire(blocking=False):
+            return None
+        try:
+            memory, temporary = self.conn.execute(
+                "SELECT sum(memory_usage_bytes), sum(temporary_storage_bytes) FROM duckdb_memory()"
+            ).fetchone()
+            limit = self.conn.execute("SELECT current_setting('memory_limit')").fetchone()[0]
+        except Exception:
+            return None
+        finally:
+            self.lock.release()
+        return int(memory or 0), int(temporary or 0), limit
+    
+    def get_table_storage(self) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """
+        获取已注册表的存储方式和数据量，用于统计内存占用明细
+        
+        Returns:
+            Tuple[List[Dict[str, Any]], Optional[int]]: (表列表, DuckDB中表数据占用的内存字节数)，
+                表信息为 {'table_name': 表名, 'storage': 存储方式, 'rows': 行数, 'columns': 列数,
+                'data': 以DataFrame或Arrow数据集注册的数据，其他存储方式为None}，
+                存储方式为native（原生表）、dataframe、arrow、view（文件或数据库上的视图）或pending（尚未读取）；
+                DuckDB版本不支持统计内存时字节数为None
+        """
+        with self.lock:
+            native = {row[0]: (row[1], row[2]) for row in self.conn.execute(
+                "SELECT table_name, estimated_size, column_count FROM duckdb_tables() "
+                "WHERE database_name = current_database() AND schema_name = 'main'"
+            ).fetchall()}
+            try:
+                table_memory = self.conn.execute(
+                    "SELECT sum(memory_usage_bytes) FROM duckdb_memory() "
+                    "WHERE tag IN ('BASE_TABLE', 'IN_MEMORY_TABLE', 'OVERFLOW_STRINGS')"
+                ).fetchone()[0]
+                table_memory = int(table_memory or 0)
+            except Exception:
+                table_memory = None
+            
+            tables = []
+            for table_name in sorted(self.registered_tables):
+                data = self.registered_frames.get(table_name)
+                rows, columns = native.get(table_name, (None, None))
+                if table_name in self.pending_tables:
+                    storage = 'pending'
+                elif isinstance(data, pd.DataFrame):
+                    storage = 'dataframe'
+                    rows, columns = data.shape
+                elif data is not None:
+                    storage = 'arrow'
+                    columns = len(data.schema.names)
+                elif table_name in native:
+                    storage = 'native'
+                else:
+                    storage = 'view'
+                tables.append({'table_name': table_name, 'storage': storage, 'rows': rows, 'columns': columns,
+                               'data': data})
+        return tables, table_memory
+    
+    def close(self) -> None:
+        """关闭数据库连接，会话数据库中的数据写入文件"""
+        with self.lock:
+            try:
+                self.conn.close()
+            except Exception as e:
+                print(f"关闭数据库连接失败: {str(e)}")
+    
+    def execute_query(self, query: str, connection: Optional[duckdb.DuckDBPyConnection] = None,
+                      paged: bool = False,
+                      stream_callback: Optional[Callable[[ResultSet], None]] = None,
+                      sample: bool = False) -> Tuple[bool, Any, str]:
         """
         执行SQL查询
         
         Args:
             query: SQL查询语句
+            connection: 执行查询使用的游标，为None时使用主连接
+            paged: 是否返回分页结果，为True时结果保存在游标的临时表中，按页读取
+            stream_callback: 流式结果回调，分页模式下提供时边执行边填充结果，
+                结果集创建后立即回调，调用方可在查询完成前显示已读取的行
+            sample: 是否以抽样模式执行，查询中最大的表按抽样配置抽样读取，结果为近似值，
+                抽样信息保存在sample_info中
             
         Returns:
-            Tuple[bool, Any, str]: (是否成功, 结果DataFrame或None, 成功/错误信息)
+            Tuple[bool, Any, str]: (是否成功, 结果DataFrame或PagedResult或None, 成功/错误信息)
         """
         if not query.strip():
             return False, None, "查询语句不能为空"
@@ -114,20 +716,274 @@ class QueryEngine:
             # 记录开始时间
             start_time = time.time()
             
+            # 抽样模式下改写查询，最大的表按比例抽样读取
+            self.sample_info = self._sample_query(query) if sample else None
+            sampled = self.sample_info is not None and not self.sample_info['skipped']
+            sample_note = f"抽样 {self.sample_info['percent']:g}%，近似结果" if sampled else ""
+            executed_query = self.sample_info['query'] if sampled else query
+            
+            # 相同的查询且引用的表未变化时直接返回缓存的结果，不固定随机种子的抽样查询不缓存
+            cache_key = self.result_cache.make_key(executed_query, self._get_referenced_versions(query))
+            if sampled and self.sample_info['seed'] is None:
+                cache_key = None
+            cached = self.result_cache.get(cache_key) if cache_key is not None else None
+            self.cache_hit = cached is not None
+            if cache_key is None and not is_read_only_query(query):
+                # 语句可能修改已注册的表，表版本不会随之变化，清空缓存
+                self.result_cache.clear()
+            if cached is not None:
+                result = self._result_from_cache(cached, paged, connection)
+                self.execution_time = (time.time() - start_time) * 1000
+                self.last_result = result
+                note = "，".join(filter(None, ["缓存命中", sample_note]))
+                return True, result, (f"查询成功（{note}），耗时: {self.execution_time:.2f}ms，"
+                                      f"返回 {len(result)} 行数据")
+            
+            # 读取查询引用的延迟加载表
+            self._load_pending_tables(query)
+            
             # 执行查询
-            result = self.conn.execute(query).fetchdf()
+            if connection is None:
+                with self.lock:
+                    result = self.conn.execute(executed_query).fetchdf()
+            else:
+                self._register_frames(connection)
+                if paged and stream_callback is not None:
+                    result = self._stream_query(connection, executed_query, stream_callback)
+                elif paged:
+                    # 结果保存在DuckDB中，不构建完整的DataFrame
+                    result = PagedResult.create(connection, executed_query)
+                    if result is None:
+                        result = pd.DataFrame()
+                else:
+                    result = connection.execute(executed_query).fetchdf()
             
             # 计算执行时间(毫秒)
             self.execution_time = (time.time() - start_time) * 1000
             
             # 存储结果
             self.last_result = result
+            if cache_key is not None:
+                self._cache_result(cache_key, result)
             
-            return True, result, f"查询成功，耗时: {self.execution_time:.2f}ms，返回 {len(result)} 行数据"
+            status = f"查询成功（{sample_note}）" if sample_note else "查询成功"
+            return True, result, f"{status}，耗时: {self.execution_time:.2f}ms，返回 {len(result)} 行数据"
         
         except Exception as e:
             return False, None, f"查询执行错误: {str(e)}"
     
+    def profile_query(self, query: str, connection: Optional[duckdb.DuckDBPyConnection] = None
+                      ) -> Tuple[bool, Any, Optional[Dict[str, Any]], str]:
+        """
+        开启性能分析执行SQL查询，不使用结果缓存
+        
+        Args:
+            query: SQL查询语句
+            connection: 执行查询使用的游标，为None时使用主连接
+        
+        Returns:
+            Tuple[bool, Any, Optional[Dict[str, Any]], str]: (是否成功, 结果DataFrame或None,
+                性能分析结果或None, 成功/错误信息)，性能分析结果见query_profiler.profile_query
+        """
+        if not query.strip():
+            return False, None, None, "查询语句不能为空"
+        
+        # 记录查询历史
+        if query not in self.query_history:
+            self.query_history.append(query)
+            if len(self.query_history) > 20:  # 最多保留20条历史记录
+                self.query_history.pop(0)
+        
+        try:
+            self.cache_hit = False
+            self.sample_info = None
+            if not is_read_only_query(query):
+                self.result_cache.clear()
+            
+            # 读取查询引用的延迟加载表
+            self._load_pending_tables(query)
+            
+            if connection is None:
+                with self.lock:
+                    profile = profile_query(self.conn, query)
+            else:
+                self._register_frames(connection)
+                profile = profile_query(connection, query)
+            
+            result = profile.pop('result')
+            self.execution_time = profile['total'] * 1000
+            self.last_result = result
+            return True, result, profile, (f"性能分析完成，耗时: {self.execution_time:.2f}ms，"
+                                           f"返回 {len(result)} 行数据")
+        
+        except Exception as e:
+            return False, None, None, f"查询执行错误: {str(e)}"
+    
+    def _sample_query(self, query: str) -> Optional[Dict[str, Any]]:
+        """
+        按抽样配置把查询改写为抽样查询
+        
+        Args:
+            query: SQL查询语句
+        
+        Returns:
+            Optional[Dict[str, Any]]: 抽样信息，见query_sampler.sample_query，不需要抽样时返回None
+        """
+        options = config_manager.get_sampling_options()
+        seed = options.get("seed")
+        return sample_query(
+            query,
+            self._get_table_rows(),
+            float(options.get("percent", 1)),
+            method=options.get("method", DEFAULT_SAMPLE_METHOD),
+            seed=int(seed) if seed not in (None, "") else None,
+            min_rows=int(options.get("min_rows", 0))
+        )
+    
+    def _get_table_rows(self) -> Dict[str, Optional[int]]:
+        """
+        获取已注册表的行数，不扫描数据
+        
+        Returns:
+            Dict[str, Optional[int]]: {表名: 行数}，文件上的视图和Arrow数据集需要扫描才能得到行数，为None
+        """
+        with self.lock:
+            native = dict(self.conn.execute(
+                "SELECT table_name, estimated_size FROM duckdb_tables() "
+                "WHERE database_name = current_database() AND schema_name = 'main'"
+            ).fetchall())
+            rows = {}
+            for table_name in self.registered_tables:
+                data = self.registered_frames.get(table_name)
+                if table_name in self.pending_tables:
+                    rows[table_name] = self.pending_tables[table_name].get('rows')
+                elif isinstance(data, pd.DataFrame):
+                    rows[table_name] = len(data)
+                else:
+                    rows[table_name] = native.get(table_name)
+        return rows
+    
+    def _get_referenced_versions(self, query: str) -> Dict[str, str]:
+        """
+        获取查询引用的表及其版本
+        
+        Args:
+            query: SQL查询语句
+        
+        Returns:
+            Dict[str, str]: {表名: 版本指纹}，按标识符匹配表名，误匹配只会使缓存键多包含一张表
+        """
+        with self.lock:
+            versions = dict(self.table_versions)
+        return {
+            table_name: version for table_name, version in versions.items()
+            if re.search(rf'(?<!\w){re.escape(table_name)}(?!\w)', query, re.IGNORECASE)
+        }
+    
+    def _cache_result(self, cache_key: Any, result: Any) -> None:
+        """
+        将完整的查询结果写入结果缓存，超出单个结果容量上限的结果不复制也不读取
+        
+        Args:
+            cache_key: 缓存键
+            result: 查询结果DataFrame或结果集
+        """
+        cache = self.result_cache
+        try:
+            if isinstance(result, pd.DataFrame):
+                if cache.fits(result_data_size(result)):
+                    cache.put(cache_key, result.copy())
+            elif isinstance(result, PagedResult) and getattr(result, 'complete', True) and not result.closed:
+                # 先读取前若干行估算整个结果的大小，放得下时才读取全部结果为Arrow表
+                data = result.fetch_table(cache.SAMPLE_ROWS)
+                if len(data) < result.row_count:
+                    if not cache.fits(cache.estimate_size(data, result.row_count)):
+                        return
+                    data = result.fetch_table()
+                cache.put(cache_key, data)
+        except Exception as e:
+            print(f"缓存查询结果失败: {str(e)}")
+    
+    def _result_from_cache(self, cached: Any, paged: bool, connection: Optional[duckdb.DuckDBPyConnection]) -> Any:
+        """
+        由缓存的数据创建查询结果，缓存中的数据不能修改
+        
+        Args:
+            cached: 缓存的Arrow表或DataFrame
+            paged: 是否返回结果集
+            connection: 执行查询使用的游标，为None时使用主连接
+        
+        Returns:
+            Any: 结果DataFrame或结果集
+        """
+        if isinstance(cached, pd.DataFrame):
+            return DataFrameResult(cached) if paged else cached.copy()
+        if paged and connection is not None:
+            # Arrow表复制回DuckDB临时表，与直接执行查询的分页结果相同
+            return PagedResult.from_table(connection, cached)
+        # 经DuckDB转换，列类型与fetchdf的结果一致
+        if connection is None:
+            with self.lock:
+                df = self.conn.from_arrow(cached).fetchdf()
+        else:
+            df = connection.from_arrow(cached).fetchdf()
+        return DataFrameResult(df) if paged else df
+    
+    def _stream_query(self, connection: duckdb.DuckDBPyConnection, query: str,
+                      stream_callback: Callable[[ResultSet], None]) -> Any:
+        """
+        流式执行查询，结果逐批追加到独立结果游标的临时表中
+        
+        Args:
+            connection: 执行查询的游标
+            query: SQL查询语句
+            stream_callback: 结果集创建后的回调
+        
+        Returns:
+            Any: 流式结果集，语句没有返回结果时为空DataFrame
+        """
+        relation = connection.sql(query)
+        if relation is None:
+            return pd.DataFrame()
+        
+        # 执行游标在流式读取期间不能执行其他语句，结果保存在另一个游标中
+        with self.lock:
+            result_cursor = self.conn.cursor()
+        result = StreamingResult(result_cursor, relation)
+        stream_callback(result)
+        result.fill(relation)
+        return result
+    
+    def start_query(self, query: str, paged: bool = False, profile: bool = False,
+                    sample: bool = False) -> 'QueryTask':
+        """
+        在后台线程中执行SQL查询
+        
+        Args:
+            query: SQL查询语句
+            paged: 是否返回分页结果
+            profile: 是否开启性能分析，开启时返回DataFrame结果
+            sample: 是否以抽样模式执行
+            
+        Returns:
+            QueryTask: 查询任务，可轮询完成状态或取消
+        """
+        task = QueryTask(self, query, paged, profile, sample)
+        task.start()
+        return task
+    
+    def _register_frames(self, connection: duckdb.DuckDBPyConnection) -> None:
+        """
+        将以DataFrame注册的表注册到游标，DataFrame注册只对所在连接可见
+        
+        Args:
+            connection: 游标
+        """
+        with self.lock:
+            frames = list(self.registered_frames.items())
+        for table_name, df in frames:
+            connection.register(table_name, df)
+    
     def get_query_history(self) -> List[str]:
         """
         获取查询历史
@@ -147,9 +1003,15 @@ class QueryEngine:
         Returns:
             Optional[pd.DataFrame]: 表结构DataFrame
         """
+        # 延迟加载表尚未读取数据，使用加载时收集的列信息
+        if table_name in self.pending_tables:
+            columns = self.pending_tables[table_name].get('columns') or []
+            return pd.DataFrame(columns, columns=['name', 'type'])
+        
         try:
             # 使用DuckDB的PRAGMA语句获取表结构
-            schema = self.conn.execute(f'PRAGMA table_info("{table_name}")').fetchdf()
+            with self.lock:
+                schema = self.conn.execute(f'PRAGMA table_info("{table_name}")').fetchdf()
             return schema
         except Exception:
             return None
@@ -166,7 +1028,131 @@ class QueryEngine:
             Optional[pd.DataFrame]: 表数据预览
         """
         try:
-            preview = self.conn.execute(f'SELECT * FROM "{table_name}" LIMIT {limit}').fetchdf()
+            self._load_pending_tables(f'"{table_name}"')
+            with self.lock:
+                preview = self.conn.execute(f'SELECT * FROM "{table_name}" LIMIT {limit}').fetchdf()
             return preview
         except Exception:
-            return None 
\ No newline at end of file
+            return None 
+    
+    def get_row_count(self, table_name: str) -> Optional[int]:
+        """
+        获取表的行数
+        
+        Args:
+            table_name: 表名
+            
+        Returns:
+            Optional[int]: 行数，获取失败时返回None
+        """
+        try:
+            with self.lock:
+                return self.conn.execute(f'SELECT COUNT(*) FROM "{table_name}"').fetchone()[0]
+        except Exception:
+            return None
+
+
+class QueryTask:
+    """后台查询任务，在独立线程中使用独立游标执行查询，支持取消"""
+    
+    def __init__(self, engine: QueryEngine, query: str, paged: bool = False, profile: bool = False,
+                 sample: bool = False):
+        """
+        初始化查询任务
+        
+        Args:
+            engine: 查询引擎
+            query: SQL查询语句
+            paged: 是否返回分页结果，分页结果持有游标，由结果负责关闭
+            profile: 是否开启性能分析，开启时不返回分页结果
+            sample: 是否以抽样模式执行，性能分析始终使用全部数据
+        """
+        self.engine = engine
+        self.query = query
+        self.paged = paged and not profile
+        self.profile = profile
+        self.sample = sample and not profile
+        self.profile_result = None  # 性能分析结果，开启性能分析且查询成功时提供
+        with engine.lock:
+            self.cursor = engine.conn.cursor()  # 独立游标，取消时中断该游标上的查询
+        self.start_time = None
+        self.end_time = None
+        self.cancelled = False
+        self.result = None  # (是否成功, 结果DataFrame或None, 成功/错误信息)
+        self.partial_result = None  # 分页模式下查询完成前已可读取的流式结果
+        self.partial_displayed = False  # 流式结果是否已交给界面显示（之后由界面负责释放）
+        self._thread = threading.Thread(target=self._run, daemon=True)
+    
+    def start(self) -> None:
+        """启动查询线程"""
+        self.start_time = time.time()
+        self._thread.start()
+    
+    def _run(self) -> None:
+        """在后台线程中执行查询"""
+        result = None
+        try:
+            if self.cancelled:
+                self.result = (False, None, "查询已取消")
+                return
+            
+            if self.profile:
+                success, result, self.profile_result, message = self.engine.profile_query(
+                    self.query, connection=self.cursor
+                )
+            else:
+                stream_callback = self._on_stream_start if self.paged else None
+                success, result, message = self.engine.execute_query(
+                    self.query, connection=self.cursor, paged=self.paged, stream_callback=stream_callback,
+                    sample=self.sample
+                )
+            if self.cancelled:
+                # 流式结果由界面决定保留或释放
+                if isinstance(result, PagedResult) and result is not self.partial_result:
+                    result.close()
+                result = None
+                self.result = (False, None, "查询已取消")
+            else:
+                self.result = (success, result, message)
+        finally:
+            self.end_time = time.time()
+            # 分页结果继续使用游标读取数据，其余情况立即关闭游标
+            if not isinstance(result, PagedResult) or result.cursor is not self.cursor:
+                self.cursor.close()
+    
+    def _on_stream_start(self, result: ResultSet) -> None:
+        """
+        流式结果集创建后的回调
+        
+        Args:
+            result: 流式结果集
+        """
+        self.partial_result = result
+    
+    def cancel(self) -> None:
+        """取消查询，中断正在执行的DuckDB查询"""
+        self.cancelled = True
+        try:
+            self.cursor.interrupt()
+        except Exception:
+            pass
+    
+    def is_done(self) -> bool:
+        """
+        查询是否已结束（成功、失败或取消）
+        
+        Returns:
+            bool: 是否已结束
+        """
+        return self.result is not None
+    
+    def get_elapsed(self) -> float:
+        """
+        获取已用时间
+        
+        Returns:
+            float: 已用时间(秒)
+        """
+        if self.start_time is None:
+            return 0.0
+        return (self.end_time or time.time()) - self.start_time 
\ No newline at end of file
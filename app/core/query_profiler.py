@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+查询性能分析模块
+开启DuckDB的JSON性能分析执行查询，解析得到算子树（每个算子的耗时、行数和输出大小），
+并把查询耗时拆分为解析/规划、执行、读取结果和转换为DataFrame四个阶段
+"""
+
+import os
+import json
+import time
+import tempfile
+from typing import Dict, Any
+
+import duckdb
+import pandas as pd
+
+# pyarrow为可选依赖，安装后结果先读取为Arrow表再转换为DataFrame，可以分别计时
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+from app.core.file_handler import sql_string_literal
+
+# 查询阶段 -> 显示名称，按执行顺序排列
+PROFILE_PHASES = {
+    'plan': '解析/规划',
+    'execute': '执行',
+    'fetch': '读取结果',
+    'convert': '转换为DataFrame'
+}
+
+# 需要DuckDB采集的指标，旧版本DuckDB不支持自定义指标时使用默认指标（没有规划耗时）
+PROFILING_METRICS = [
+    'QUERY_NAME', 'LATENCY', 'CPU_TIME', 'ROWS_RETURNED', 'RESULT_SET_SIZE', 'SYSTEM_PEAK_BUFFER_MEMORY',
+    'PLANNER', 'ALL_OPTIMIZERS', 'PHYSICAL_PLANNER', 'EXTRA_INFO',
+    'OPERATOR_TYPE', 'OPERATOR_NAME', 'OPERATOR_TIMING', 'OPERATOR_CARDINALITY'
+]
+
+# 规划阶段的指标：绑定和逻辑规划、优化器、物理规划
+PLANNING_METRICS = ['planner', 'all_optimizers', 'physical_planner']
+
+
+def _enable_profiling(connection: duckdb.DuckDBPyConnection, output_path: str) -> None:
+    """
+    在连接上开启JSON性能分析，分析结果写入指定文件
+    
+    Args:
+        connection: 执行查询的连接或游标
+        output_path: 分析结果文件路径
+    """
+    connection.execute("PRAGMA enable_profiling='json'")
+    connection.execute(f"PRAGMA profiling_output={sql_string_literal(output_path)}")
+    try:
+        metrics = json.dumps({metric: 'true' for metric in PROFILING_METRICS})
+        connection.execute(f"SET custom_profiling_settings={sql_string_literal(metrics)}")
+    except duckdb.Error:
+        pass
+
+
+def _disable_profiling(connection: duckdb.DuckDBPyConnection) -> None:
+    """
+    关闭连接上的性能分析
+    
+    Args:
+        connection: 执行查询的连接或游标
+    """
+    try:
+        connection.execute("PRAGMA disable_profiling")
+        connection.execute("RESET custom_profiling_settings")
+    except duckdb.Error:
+        pass
+
+
+def _parse_operator(node: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    解析算子树中的一个节点，兼容新旧版本DuckDB的字段名
+    
+    Args:
+        node: JSON分析结果中的算子节点
+    
+    Returns:
+        Dict[str, Any]: {'name': 算子名, 'timing': 耗时(秒), 'cardinality': 输出行数,
+            'size': 输出大小(字节), 'extra_info': 详细信息, 'children': 子算子列表}
+    """
+    extra_info = node.get('extra_info', node.get('extra-info', ''))
+    if isinstance(extra_info, dict):
+        extra_info = '; '.join(
+            f"{key}: {', '.join(value) if isinstance(value, list) else value}"
+            for key, value in extra_info.items()
+        )
+    return {
+        'name': (node.get('operator_name') or node.get('operator_type') or node.get('name') or '').strip(),
+        'timing': float(node.get('operator_timing', node.get('timing', 0)) or 0),
+        'cardinality': int(node.get('operator_cardinality', node.get('cardinality', 0)) or 0),
+        'size': node.get('result_set_size'),
+        'extra_info': ' '.join(str(extra_info).split()),
+        'children': [_parse_operator(child) for child in node.get('children', [])]
+    }
+
+
+def parse_profile(profile: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    解析DuckDB的JSON性能分析结果
+    
+    Args:
+        profile: JSON分析结果，根节点为查询，子节点为算子树
+    
+    Returns:
+        Dict[str, Any]: {'latency': 查询耗时(秒), 'cpu_time': CPU时间(秒), 'planning': 规划耗时(秒)，
+            不支持时为None, 'peak_memory': 缓冲区内存峰值(字节), 'rows': 返回行数, 'operators': 算子树}
+    """
+    planning = None
+    if any(metric in profile for metric in PLANNING_METRICS):
+        planning = sum(float(profile.get(metric, 0) or 0) for metric in PLANNING_METRICS)
+    
+    return {
+        'latency': float(profile.get('latency', profile.get('timing', 0)) or 0),
+        'cpu_time': profile.get('cpu_time'),
+        'planning': planning,
+        'peak_memory': profile.get('system_peak_buffer_memory'),
+        'rows': profile.get('rows_returned'),
+        'operators': [_parse_operator(child) for child in profile.get('children', [])]
+    }
+
+
+def profile_query(connection: duckdb.DuckDBPyConnection, query: str) -> Dict[str, Any]:
+    """
+    开启性能分析执行查询，包含多条语句时分析最后一条
+    
+    阶段耗时：解析/规划为单独解析SQL的耗时加上DuckDB报告的规划耗时；执行为执行语句的总耗时减去解析/规划；
+    读取结果为把结果读取为Arrow表的耗时，转换为DataFrame为Arrow表转换为pandas的耗时。
+    未安装pyarrow时直接读取为DataFrame，耗时计入读取结果
+    
+    Args:
+        connection: 执行查询的连接或游标
+        query: SQL查询语句
+    
+    Returns:
+        Dict[str, Any]: {'result': 结果DataFrame, 'phases': {阶段: 耗时(秒)，不可用时为None},
+            'total': 总耗时(秒)}，以及parse_profile返回的查询指标和算子树
+    """
+    fd, output_path = tempfile.mkstemp(prefix='queryx_profile_', suffix='.json')
+    os.close(fd)
+    try:
+        start_time = time.perf_counter()
+        connection.extract_statements(query)
+        parse_time = time.perf_counter() - start_time
+        
+        _enable_profiling(connection, output_path)
+        try:
+            start_time = time.perf_counter()
+            connection.execute(query)
+            execute_time = time.perf_counter() - start_time
+            
+            # 关闭分析的语句会丢弃未读取的结果，读取结果后再关闭
+            convert_time = None
+            start_time = time.perf_counter()
+            if connection.description is None:
+                result = pd.DataFrame()
+                fetch_time = time.perf_counter() - start_time
+            elif pyarrow is None:
+                result = connection.fetchdf()
+                fetch_time = time.perf_counter() - start_time
+            else:
+                # 新版本DuckDB使用to_arrow_table，旧版本使用fetch_arrow_table
+                fetch_arrow = getattr(connection, 'to_arrow_table', None) or connection.fetch_arrow_table
+                table = fetch_arrow()
+                fetch_time = time.perf_counter() - start_time
+                
+                start_time = time.perf_counter()
+                result = table.to_pandas()
+                convert_time = time.perf_counter() - start_time
+            
+            # 分析结果在结果读取完成时写入，关闭分析的语句会覆盖文件，先读取
+            with open(output_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+        finally:
+            _disable_profiling(connection)
+    finally:
+        try:
+            os.remove(output_path)
+        except OSError:
+            pass
+    
+    profile = parse_profile(json.loads(content) if content.strip() else {})
+    plan_time = parse_time + (profile['planning'] or 0)
+    profile['phases'] = {
+        'plan': plan_time,
+        'execute': max(execute_time - plan_time, 0.0),
+        'fetch': fetch_time,
+        'convert': convert_time
+    }
+    profile['total'] = parse_time + execute_time + fetch_time + (convert_time or 0)
+    profile['result'] = result
+    return profile
+
@@ -0,0 +1,400 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+抽样查询模块
+把查询中最大的一张表改写为TABLESAMPLE抽样读取，用于快速探索大表；
+外层查询的SELECT列表和HAVING中的COUNT/SUM按抽样比例放大为全表的估计值，逐行抽样时为COUNT/SUM/AVG附加95%置信区间的误差范围；
+COUNT/SUM无法换算的查询（如抽样的表在子查询中）不抽样
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple, Any
+
+import sqlparse
+from sqlparse import tokens as T
+from sqlparse.sql import Identifier, IdentifierList, Function, Parenthesis, Over, Token
+
+# 抽样方法 -> 显示名称，默认按行抽样；按数据块抽样小比例时可能抽不到行，换算的估计值偏差大，只在明确选择时使用
+SAMPLE_METHODS = {
+    'bernoulli': '按行抽样',
+    'reservoir': '蓄水池抽样',
+    'system': '按数据块抽样'
+}
+
+# 默认的抽样方法
+DEFAULT_SAMPLE_METHOD = 'bernoulli'
+
+# 逐行抽样的方法，可以按独立抽样估计误差范围；按数据块抽样时同一块中的行一起入选，误差无法按行估计
+ROW_SAMPLE_METHODS = ('bernoulli', 'reservoir')
+
+# 95%置信区间对应的正态分布分位数
+CONFIDENCE_Z = 1.96
+
+# 误差范围列名的后缀
+ERROR_SUFFIX = ' ±'
+
+# 查询已自行指定抽样时不再改写
+EXISTING_SAMPLE_PATTERN = re.compile(r'\b(tablesample|using\s+sample)\b', re.IGNORECASE)
+
+# 需要按抽样比例换算的聚合函数调用
+SCALED_AGGREGATE_PATTERN = re.compile(r'\b(count|sum)\s*\(', re.IGNORECASE)
+
+# HAVING子句之后的子句
+HAVING_END_KEYWORDS = ('ORDER BY', 'LIMIT', 'OFFSET', 'FETCH', 'QUALIFY', 'WINDOW')
+
+
+def _quote_identifier(name: str) -> str:
+    """用双引号引用标识符"""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _is_keyword(token: Token, *values: str) -> bool:
+    """判断标记是否为指定的关键字，values为空时判断是否为任意关键字"""
+    return token.ttype in T.Keyword and (not values or token.normalized in values)
+
+
+def _is_table_name(identifier: Identifier) -> bool:
+    """判断FROM/JOIN后的标识符是否为不带模式名的表名（而不是子查询或表函数）"""
+    first = identifier.token_first(skip_cm=True)
+    return (first is not None and first.ttype in (T.Name, T.String.Symbol)
+            and identifier.get_parent_name() is None)
+
+
+def _find_table_references(token_list: Any, depth: int, references: List[Dict[str, Any]]) -> None:
+    """
+    递归查找FROM和JOIN后引用的表
+    
+    Args:
+        token_list: 语句或语法分组
+        depth: 子查询嵌套层数，0为最外层查询
+        references: 找到的引用 {'identifier': 标识符, 'name': 表名, 'depth': 嵌套层数}，追加到该列表
+    """
+    expect_table = False
+    for token in token_list.tokens:
+        if token.is_whitespace or token.ttype in T.Comment:
+            continue
+        if _is_keyword(token, 'FROM') or (_is_keyword(token) and token.normalized.endswith('JOIN')):
+            expect_table = True
+            continue
+        
+        if expect_table and isinstance(token, (Identifier, IdentifierList)):
+            identifiers = [token] if isinstance(token, Identifier) else list(token.get_identifiers())
+            for identifier in identifiers:
+                if isinstance(identifier, Identifier) and _is_table_name(identifier):
+                    references.append({'identifier': identifier, 'name': identifier.get_real_name(), 'depth': depth})
+                elif identifier.is_group:
+                    _find_table_references(identifier, depth, references)
+        elif token.is_group:
+            # 括号中为子查询或CTE的定义
+            _find_table_references(token, depth + 1 if isinstance(token, Parenthesis) else depth, references)
+        expect_table = False
+
+
+def _find_cte_names(statement: Any) -> set:
+    """获取WITH子句定义的CTE名称（小写），与表同名时引用的是CTE"""
+    names = set()
+    tokens = [token for token in statement.tokens if not token.is_whitespace]
+    for index, token in enumerate(tokens):
+        if token.ttype is T.Keyword.CTE and index + 1 < len(tokens):
+            definitions = tokens[index + 1]
+            if isinstance(definitions, Identifier):
+                definitions = [definitions]
+            elif isinstance(definitions, IdentifierList):
+                definitions = list(definitions.get_identifiers())
+            else:
+                continue
+            names.update(definition.get_real_name().lower() for definition in definitions
+                         if isinstance(definition, Identifier) and definition.get_real_name())
+    return names
+
+
+def _is_subquery(token: Token) -> bool:
+    """判断括号中是否为子查询"""
+    if not isinstance(token, Parenthesis):
+        return False
+    first = next((child for child in token.tokens[1:] if not child.is_whitespace and child.ttype not in T.Comment), None)
+    return first is not None and (first.ttype is T.Keyword.DML or first.ttype is T.Keyword.CTE)
+
+
+def _has_set_operation(tokens: List[Token]) -> bool:
+    """判断最外层查询是否为UNION/INTERSECT/EXCEPT"""
+    return any(_is_keyword(token, 'UNION', 'UNION ALL', 'INTERSECT', 'EXCEPT') for token in tokens)
+
+
+def _find_aggregate_calls(tokens: List[Token]) -> List[Function]:
+    """
+    查找COUNT/SUM调用，不包括子查询中的调用
+    
+    Args:
+        tokens: 语法标记列表
+    
+    Returns:
+        List[Function]: 函数调用列表
+    """
+    functions = []
+    pending = list(tokens)
+    while pending:
+        token = pending.pop(0)
+        if isinstance(token, Function) and (token.get_name() or '').lower() in ('count', 'sum'):
+            functions.append(token)
+        elif token.is_group and not _is_subquery(token):
+            pending.extend(token.tokens)
+    return functions
+
+
+def _is_scalable_call(function: Function) -> bool:
+    """判断COUNT/SUM调用能否按抽样比例换算，DISTINCT、FILTER和窗口函数不能换算"""
+    parenthesis = next((token for token in function.tokens if isinstance(token, Parenthesis)), None)
+    if parenthesis is None or any(isinstance(token, Over) for token in function.tokens):
+        return False
+    arguments = str(parenthesis)[1:-1].strip()
+    return bool(arguments) and not arguments.lower().startswith('distinct')
+
+
+def _find_having_aggregates(statement: Any) -> Optional[List[Function]]:
+    """
+    查找最外层查询HAVING子句中的COUNT/SUM调用，不包括子查询中的调用
+    
+    Args:
+        statement: 已解析的SELECT语句
+    
+    Returns:
+        Optional[List[Function]]: 函数调用列表，没有HAVING子句时为空列表；
+            有无法按比例换算的调用（DISTINCT、FILTER、窗口函数）时返回None
+    """
+    tokens = [token for token in statement.tokens if not token.is_whitespace and token.ttype not in T.Comment]
+    start = next((index + 1 for index, token in enumerate(tokens) if _is_keyword(token, 'HAVING')), None)
+    if start is None:
+        return []
+    end = next((index for index in range(start, len(tokens)) if _is_keyword(tokens[index], *HAVING_END_KEYWORDS)),
+               len(tokens))
+    clause = tokens[start:end]
+    if re.search(r'\b(filter|over)\s*\(', ''.join(str(token) for token in clause), re.IGNORECASE):
+        return None
+    
+    functions = _find_aggregate_calls(clause)
+    return functions if all(_is_scalable_call(function) for function in functions) else None
+
+
+def _find_select_aggregates(statement: Any) -> Optional[List[Tuple[Any, Function]]]:
+    """
+    查找最外层查询SELECT列表中可以改写的聚合项：直接写出的COUNT/SUM/AVG，可带别名
+    
+    Args:
+        statement: 已解析的SELECT语句
+    
+    Returns:
+        Optional[List[Tuple[Any, Function]]]: [(SELECT列表项, 聚合函数调用)]；
+            有无法按比例换算的COUNT/SUM（嵌在表达式中，或带DISTINCT、FILTER、窗口函数）时返回None
+    """
+    tokens = [token for token in statement.tokens if not token.is_whitespace and token.ttype not in T.Comment]
+    select_index = next((index for index, token in enumerate(tokens) if token.ttype is T.Keyword.DML), None)
+    if select_index is None:
+        return []
+    from_index = next((index for index in range(select_index + 1, len(tokens)) if _is_keyword(tokens[index], 'FROM')),
+                      len(tokens))
+    region = tokens[select_index + 1:from_index]
+    if len(region) != 1:
+        # 解析器无法完整分组的SELECT列表（如带FILTER子句）
+        return None if _find_aggregate_calls(region) else []
+    
+    select_list = region[0]
+    items = list(select_list.get_identifiers()) if isinstance(select_list, IdentifierList) else [select_list]
+    aggregates = []
+    for item in items:
+        function = item.token_first(skip_cm=True) if isinstance(item, Identifier) else item
+        # 函数之后只能是别名（可带AS），否则函数嵌在表达式中（如COUNT(*)+1、SUM(x)::DOUBLE）
+        rest = [token for token in item.tokens[1:] if not token.is_whitespace] if isinstance(item, Identifier) else []
+        bare = (isinstance(function, Function) and len(rest) <= 2
+                and all(_is_keyword(token, 'AS') or isinstance(token, Identifier) for token in rest))
+        name = (function.get_name() or '').lower() if isinstance(function, Function) else ''
+        if bare and name in ('count', 'sum') and _is_scalable_call(function):
+            aggregates.append((item, function))
+        elif bare and name in ('avg', 'mean') and _is_scalable_call(function):
+            # AVG不需要换算，只追加误差范围列
+            aggregates.append((item, function))
+        elif _find_aggregate_calls([item]):
+            return None
+    return aggregates
+
+
+def _scaled_expression(name: str, expression: str, fraction: float) -> str:
+    """生成按抽样比例换算COUNT/SUM的表达式"""
+    if name == 'count':
+        return f"CAST(round({expression} / {fraction:.12g}) AS BIGINT)"
+    return f"({expression} / {fraction:.12g})"
+
+
+def _sample_clause(percent: float, method: str, seed: Optional[int]) -> str:
+    """生成TABLESAMPLE子句"""
+    options = method if seed is None else f"{method}, {int(seed)}"
+    return f" TABLESAMPLE {percent:g}% ({options})"
+
+
+def _rewrite_aggregates(statement: Any, fraction: float, error_bars: bool) -> Optional[List[str]]:
+    """
+    改写最外层查询：SELECT列表和HAVING中的COUNT/SUM按抽样比例放大，SELECT列表中的COUNT/SUM/AVG追加误差范围列
+    
+    SELECT列表中只改写直接写出的聚合函数，其余COUNT/SUM无法换算，调用方应先确认（见_find_select_aggregates）
+    
+    Args:
+        statement: 已解析的SELECT语句，直接修改
+        fraction: 抽样比例(0-1]
+        error_bars: 是否追加误差范围列
+    
+    Returns:
+        Optional[List[str]]: 追加的误差范围列名，没有可改写的聚合函数或有无法换算的COUNT/SUM时返回None
+    """
+    tokens = [token for token in statement.tokens if not token.is_whitespace and token.ttype not in T.Comment]
+    aggregates = _find_select_aggregates(statement)
+    having = _find_having_aggregates(statement)
+    if _has_set_operation(tokens) or aggregates is None or having is None:
+        return None
+    for function in having:
+        function.tokens = [Token(T.Text, _scaled_expression(function.get_name().lower(), str(function), fraction))]
+    
+    rewritten_columns = []
+    extra = []
+    for item, function in aggregates:
+        name = function.get_name().lower()
+        parenthesis = next(token for token in function.tokens if isinstance(token, Parenthesis))
+        arguments = str(parenthesis)[1:-1].strip()
+        
+        alias = item.get_alias() if isinstance(item, Identifier) else None
+        column = alias or str(function)
+        expression = str(function)
+        if name == 'count':
+            rewritten = _scaled_expression(name, expression, fraction)
+            error = f"{CONFIDENCE_Z} * sqrt({expression} * {1 - fraction:.12g}) / {fraction:.12g}"
+        elif name == 'sum':
+            rewritten = _scaled_expression(name, expression, fraction)
+            error = f"{CONFIDENCE_Z} * sqrt({1 - fraction:.12g} * sum(power(({arguments}), 2))) / {fraction:.12g}"
+        else:
+            rewritten = expression
+            error = f"{CONFIDENCE_Z} * stddev_samp({arguments}) / sqrt(count({arguments}))"
+        
+        item.tokens = [Token(T.Text, f"{rewritten} AS {_quote_identifier(column)}")]
+        rewritten_columns.append(column)
+        if error_bars:
+            extra.append(f"{error} AS {_quote_identifier(column + ERROR_SUFFIX)}")
+    
+    if not rewritten_columns:
+        return [] if having else None
+    if extra:
+        # 误差范围列追加在SELECT列表末尾，不影响GROUP BY/ORDER BY中按位置引用的列；SELECT列表只有一项时追加在该项之后
+        item = aggregates[0][0]
+        select_list = item.parent if isinstance(item.parent, IdentifierList) else item
+        select_list.tokens.append(Token(T.Text, ', ' + ', '.join(extra)))
+    return [column + ERROR_SUFFIX for column in rewritten_columns] if error_bars else []
+
+
+def sample_query(query: str, table_rows: Dict[str, Optional[int]], percent: float,
+                 method: str = DEFAULT_SAMPLE_METHOD, seed: Optional[int] = None, min_rows: int = 0) -> Optional[Dict[str, Any]]:
+    """
+    把查询改写为抽样查询
+    
+    只抽样查询引用的表中行数最多的一张（行数未知的表视为大表），其余表（如维表）读取全部数据，
+    放大后的COUNT/SUM才是全表的无偏估计。误差范围按逐行独立抽样计算，只在逐行抽样时提供；
+    按数据块抽样最快，但同一块中的行一起入选，小比例时可能抽不到任何行，实际误差比逐行抽样大。
+    抽样的表在子查询中、被多次引用或在UNION中，或SELECT列表、HAVING中有无法换算的COUNT/SUM
+    （嵌在表达式中，或带DISTINCT、FILTER、OVER）时，COUNT/SUM只能得到样本上的值，
+    这类查询不抽样，返回的抽样信息中skipped为原因
+    
+    Args:
+        query: SQL查询语句
+        table_rows: 可抽样的表 {表名: 行数或None}
+        percent: 抽样百分比(0-100]
+        method: 抽样方法，见SAMPLE_METHODS
+        seed: 随机种子，为None时每次抽样结果不同
+        min_rows: 行数少于该值的表不抽样
+    
+    Returns:
+        Optional[Dict[str, Any]]: {'query': 改写后的SQL, 'table': 抽样的表, 'percent': 抽样百分比,
+            'method': 抽样方法, 'seed': 随机种子, 'scaled': 外层的COUNT/SUM是否已按抽样比例换算,
+            'error_columns': 误差范围列名列表, 'skipped': 未抽样的原因，已抽样时为None}，未抽样时query为原查询；
+            不是单条SELECT语句、已指定抽样或没有需要抽样的表时返回None
+    """
+    if method not in SAMPLE_METHODS or not 0 < percent <= 100 or EXISTING_SAMPLE_PATTERN.search(query):
+        return None
+    statements = [statement for statement in sqlparse.parse(query) if str(statement).strip(' \t\r\n;')]
+    if len(statements) != 1 or statements[0].get_type() != 'SELECT':
+        return None
+    statement = statements[0]
+    
+    tables = {table_name.lower(): table_name for table_name in table_rows}
+    cte_names = _find_cte_names(statement)
+    references = []
+    _find_table_references(statement, 0, references)
+    references = [reference for reference in references
+                  if reference['name'] and reference['name'].lower() in tables
+                  and reference['name'].lower() not in cte_names]
+    
+    # 选择行数最多的表，行数未知的表按查询中出现的顺序排在已知行数的表之后
+    candidates = []
+    for reference in references:
+        table_name = tables[reference['name'].lower()]
+        rows = table_rows[table_name]
+        if table_name not in candidates and (rows is None or rows >= min_rows):
+            candidates.append(table_name)
+    if not candidates:
+        return None
+    known = [table_name for table_name in candidates if table_rows[table_name] is not None]
+    table_name = max(known, key=lambda name: table_rows[name]) if known else candidates[0]
+    
+    sampled = [reference for reference in references if tables[reference['name'].lower()] == table_name]
+    info = {
+        'query': query,
+        'table': table_name,
+        'percent': percent,
+        'method': method,
+        'seed': seed,
+        'scaled': False,
+        'error_columns': [],
+        'skipped': None
+    }
+    
+    # 表只被最外层查询（不含UNION）引用一次时，聚合值才能按抽样比例换算
+    tokens = [token for token in statement.tokens if not token.is_whitespace and token.ttype not in T.Comment]
+    scalable = len(sampled) == 1 and sampled[0]['depth'] == 0 and not _has_set_operation(tokens)
+    if not scalable and SCALED_AGGREGATE_PATTERN.search(query):
+        info['skipped'] = "抽样的表在子查询或UNION中，其中的COUNT/SUM无法按抽样比例换算"
+        return info
+    if scalable and _find_having_aggregates(statement) is None:
+        info['skipped'] = "HAVING中的COUNT/SUM无法按抽样比例换算"
+        return info
+    if scalable and _find_select_aggregates(statement) is None:
+        info['skipped'] = "SELECT列表中的COUNT/SUM嵌在表达式中或带DISTINCT、FILTER、OVER，无法按抽样比例换算"
+        return info
+    
+    clause = _sample_clause(percent, method, seed)
+    for reference in sampled:
+        leaf = list(reference['identifier'].flatten())[-1]
+        leaf.value += clause
+    
+    error_columns = _rewrite_aggregates(statement, percent / 100, method in ROW_SAMPLE_METHODS) if scalable else None
+    info.update(query=str(statement), scaled=error_columns is not None, error_columns=error_columns or [])
+    return info
+
+
+def describe_sample(sample_info: Dict[str, Any]) -> str:
+    """
+    生成抽样信息的说明文字，显示在结果面板中
+    
+    Args:
+        sample_info: 抽样信息，见sample_query
+    
+    Returns:
+        str: 说明文字
+    """
+    if sample_info['skipped']:
+        return f"未抽样：{sample_info['skipped']}，已使用全部数据执行"
+    text = (f"近似结果：表 {sample_info['table']} 抽样 {sample_info['percent']:g}%"
+            f"（{SAMPLE_METHODS[sample_info['method']]}）")
+    if sample_info['error_columns']:
+        text += "，COUNT/SUM已按抽样比例换算，“±”列为95%置信区间的误差范围"
+    elif sample_info['scaled'] and sample_info['method'] not in ROW_SAMPLE_METHODS:
+        text += "，COUNT/SUM已按抽样比例换算，按数据块抽样不计算误差范围"
+    elif sample_info['scaled']:
+        text += "，COUNT/SUM已按抽样比例换算"
+    return text
@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+查询结果缓存模块
+按规范化的SQL和查询引用的表版本缓存查询结果，重复执行相同的查询时直接返回结果，
+超出容量时淘汰最久未使用的结果
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple, Any
+
+import sqlparse
+from sqlparse import tokens as T
+import pandas as pd
+
+from app.core.config import config_manager
+from app.core.memory_report import dataframe_size
+
+# 结果随时间或外部文件变化的函数，调用这些函数的查询不缓存
+VOLATILE_PATTERN = re.compile(
+    r"\b(random|setseed|uuid|gen_random_uuid|nextval|currval|now|today|current_date|current_time|"
+    r"current_timestamp|get_current_time|get_current_timestamp|glob|read_\w+)\b|\bfrom\s+'",
+    re.IGNORECASE
+)
+
+# 运算符字符，规范化时两个这样的字符之间不能去掉空白
+OPERATOR_CHARS = set("+-*/<>=~!@#%^&|?")
+
+
+def result_data_size(data: Any) -> int:
+    """
+    统计缓存数据占用的内存
+    
+    Args:
+        data: Arrow表或DataFrame
+    
+    Returns:
+        int: 字节数
+    """
+    if isinstance(data, pd.DataFrame):
+        return dataframe_size(data)
+    return int(data.nbytes)
+
+
+def is_read_only_query(query: str) -> bool:
+    """
+    判断SQL是否只包含只读查询（SELECT/WITH）
+    
+    Args:
+        query: SQL语句
+    
+    Returns:
+        bool: 是否只读，包含CREATE、INSERT、UPDATE等语句时为False
+    """
+    return all(statement.get_type() == 'SELECT'
+               for statement in sqlparse.parse(query) if str(statement).strip(' \t\r\n;'))
+
+
+def normalize_sql(query: str) -> Optional[str]:
+    """
+    规范化SQL语句：关键字统一大写，未加引号的标识符和函数名统一小写（DuckDB不区分大小写），
+    去掉注释和末尾的分号，连续空白合并为一个空格，运算符和标点两侧不留空白；
+    加引号的标识符和字符串保持原样
+    
+    Args:
+        query: SQL语句
+    
+    Returns:
+        Optional[str]: 规范化的SQL，不是单条只读查询（SELECT/WITH）或包含不确定函数时返回None
+    """
+    statements = [statement for statement in sqlparse.parse(query) if str(statement).strip(' \t\r\n;')]
+    if len(statements) != 1 or statements[0].get_type() != 'SELECT':
+        return None
+    
+    parts = []
+    space = False     # 上一个标记之后是否有空白
+    previous = None   # 上一个非空白标记的类型
+    for token in statements[0].flatten():
+        if token.is_whitespace or token.ttype in T.Comment:
+            space = True
+            continue
+        value = token.value
+        if token.ttype in T.Keyword:
+            value = value.upper()
+        elif token.ttype in T.Name:
+            value = value.lower()
+        if space and previous is not None:
+            tight = (token.ttype in T.Punctuation or token.ttype in T.Operator
+                     or previous in T.Punctuation or previous in T.Operator)
+            # 运算符字符相邻时保留空白，避免"- -1"拼成注释"--1"
+            if not tight or (parts[-1][-1] in OPERATOR_CHARS and value[0] in OPERATOR_CHARS):
+                parts.append(' ')
+        parts.append(value)
+        space, previous = False, token.ttype
+    normalized = ''.join(parts).rstrip(';')
+    if VOLATILE_PATTERN.search(normalized):
+        return None
+    return normalized
+
+
+class ResultCache:
+    """
+    查询结果缓存，按占用内存计算容量，超出容量时淘汰最久未使用的结果
+    
+    DuckDB中的分页结果以Arrow表缓存，命中时复制回DuckDB临时表，不经过pandas；
+    已经是DataFrame的结果直接缓存DataFrame
+    """
+    
+    SAMPLE_ROWS = 10000  # 估算结果大小时读取的行数
+    
+    def __init__(self):
+        """初始化结果缓存"""
+        self.entries = OrderedDict()  # {缓存键: (Arrow表或DataFrame, 字节数)}，按使用时间排序
+        self.size = 0                 # 已缓存结果的总字节数
+        self.hits = 0                 # 命中次数
+        self.misses = 0               # 未命中次数
+        self.lock = threading.Lock()  # 查询在后台线程中读写缓存
+    
+    @property
+    def enabled(self) -> bool:
+        """是否启用结果缓存"""
+        return bool(config_manager.get_config("result_cache", "enabled", True))
+    
+    @property
+    def max_size(self) -> int:
+        """缓存容量上限（字节）"""
+        return int(config_manager.get_config("result_cache", "max_size_mb", 256)) * 1024 * 1024
+    
+    @property
+    def max_entry_size(self) -> int:
+        """单个结果的容量上限（字节），更大的结果不缓存，避免一个结果挤掉其他所有结果"""
+        return self.max_size // 4
+    
+    def make_key(self, query: str, table_versions: Dict[str, str]) -> Optional[Tuple[str, Tuple[Tuple[str, str], ...]]]:
+        """
+        计算查询的缓存键
+        
+        Args:
+            query: SQL查询语句
+            table_versions: 查询引用的表 {表名: 版本指纹}，表的数据变化时版本随之变化
+        
+        Returns:
+            Optional[Tuple]: (规范化的SQL, 引用表的版本)，查询不可缓存或未启用缓存时返回None
+        """
+        if not self.enabled:
+            return None
+        normalized = normalize_sql(query)
+        if normalized is None:
+            return None
+        return normalized, tuple(sorted((name, str(version)) for name, version in table_versions.items()))
+    
+    def get(self, key: Tuple) -> Optional[Any]:
+        """
+        读取缓存的结果
+        
+        Args:
+            key: 缓存键
+        
+        Returns:
+            Optional[Any]: 缓存的Arrow表或DataFrame，调用方不能修改；未命中时返回None
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+    
+    def fits(self, size: int) -> bool:
+        """
+        判断结果能否缓存，调用方在复制或读取结果前检查
+        
+        Args:
+            size: 结果占用的字节数或估算值
+        
+        Returns:
+            bool: 是否不超过单个结果的容量上限
+        """
+        return size <= self.max_entry_size
+    
+    def estimate_size(self, sample: Any, row_count: int) -> int:
+        """
+        按读取的前若干行估算整个结果占用的内存
+        
+        Args:
+            sample: 结果前若干行的Arrow表或DataFrame
+            row_count: 结果的总行数
+        
+        Returns:
+            int: 估算的字节数
+        """
+        if len(sample) >= row_count:
+            return result_data_size(sample)
+        return result_data_size(sample) * row_count // max(len(sample), 1)
+    
+    def put(self, key: Tuple, data: Any) -> bool:
+        """
+        缓存查询结果，超出容量时淘汰最久未使用的结果
+        
+        Args:
+            key: 缓存键
+            data: 查询结果的Arrow表或DataFrame
+        
+        Returns:
+            bool: 是否已缓存，超过单个结果的容量上限时不缓存
+        """
+        size = result_data_size(data)
+        if not self.fits(size):
+            return False
+        
+        with self.lock:
+            if key in self.entries:
+                self.size -= self.entries.pop(key)[1]
+            self.entries[key] = (data, size)
+            self.size += size
+            while self.size > self.max_size and self.entries:
+                self.size -= self.entries.popitem(last=False)[1][1]
+        return True
+    
+    def clear(self) -> None:
+        """清空缓存"""
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
@@ -0,0 +1,545 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+查询结果模块
+提供统一的结果集接口，支持完整DataFrame结果和保存在DuckDB中的分页结果
+"""
+
+import itertools
+import threading
+import duckdb
+import pandas as pd
+from typing import List, Optional, Iterator, Any
+
+# pyarrow为可选依赖，安装后通过Arrow记录批次流式读取结果，否则退回DataFrame分块读取
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+# 流式读取时每批的行数
+STREAM_BATCH_SIZE = 100000
+
+
+def iter_relation_batches(relation: duckdb.DuckDBPyRelation, batch_size: int = STREAM_BATCH_SIZE) -> Iterator[Any]:
+    """
+    流式读取关系的结果，不一次性构建完整的DataFrame
+    
+    Args:
+        relation: DuckDB关系
+        batch_size: 每批行数
+    
+    Returns:
+        Iterator[Any]: 安装pyarrow时为Arrow记录批次，否则为DataFrame分块
+    """
+    if pyarrow is not None:
+        # 新版本DuckDB使用to_arrow_reader，旧版本使用fetch_record_batch
+        reader_factory = getattr(relation, 'to_arrow_reader', None) or relation.fetch_record_batch
+        for batch in reader_factory(batch_size):
+            if batch.num_rows > 0:
+                yield batch
+    else:
+        # DuckDB每个向量2048行
+        vectors_per_chunk = max(1, batch_size // 2048)
+        while True:
+            chunk = relation.fetch_df_chunk(vectors_per_chunk)
+            if chunk is None or len(chunk) == 0:
+                break
+            yield chunk
+
+
+def batch_to_dataframe(batch: Any) -> pd.DataFrame:
+    """
+    将Arrow记录批次或DataFrame分块转换为DataFrame
+    
+    Args:
+        batch: Arrow记录批次或DataFrame
+    
+    Returns:
+        pd.DataFrame: 数据框
+    """
+    if isinstance(batch, pd.DataFrame):
+        return batch
+    return batch.to_pandas()
+
+
+class ResultSet:
+    """结果集基类，定义结果面板和导出功能使用的接口"""
+    
+    @property
+    def columns(self) -> List[str]:
+        """
+        获取列名列表
+        
+        Returns:
+            List[str]: 列名列表
+        """
+        raise NotImplementedError
+    
+    @property
+    def row_count(self) -> int:
+        """
+        获取总行数
+        
+        Returns:
+            int: 总行数
+        """
+        raise NotImplementedError
+    
+    def fetch_page(self, offset: int, limit: int) -> pd.DataFrame:
+        """
+        获取一页数据
+        
+        Args:
+            offset: 起始行（从0开始）
+            limit: 行数
+        
+        Returns:
+            pd.DataFrame: 该页数据
+        """
+        raise NotImplementedError
+    
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        获取全部数据
+        
+        Returns:
+            pd.DataFrame: 全部数据
+        """
+        raise NotImplementedError
+    
+    def iter_batches(self, batch_size: int = STREAM_BATCH_SIZE) -> Iterator[pd.DataFrame]:
+        """
+        分批读取全部数据，内存占用只与批大小有关
+        
+        Args:
+            batch_size: 每批行数
+        
+        Returns:
+            Iterator[pd.DataFrame]: 数据批次
+        """
+        offset = 0
+        while offset < self.row_count:
+            yield self.fetch_page(offset, batch_size)
+            offset += batch_size
+    
+    def filter_sort(self, filter_column: Optional[str] = None, filter_value: str = "",
+                    sort_column: Optional[str] = None, ascending: bool = True) -> 'ResultSet':
+        """
+        在DuckDB中过滤和排序结果，返回新的结果集（只按页读取数据）
+        
+        Args:
+            filter_column: 过滤列，值转为字符串后进行不区分大小写的模糊匹配
+            filter_value: 过滤值
+            sort_column: 排序列，空值排在最后
+            ascending: 是否升序
+        
+        Returns:
+            ResultSet: 过滤排序后的结果集，与原结果集共用数据，关闭时不释放原结果
+        """
+        raise NotImplementedError
+    
+    def close(self) -> None:
+        """释放结果占用的资源"""
+        pass
+    
+    def __len__(self) -> int:
+        """获取总行数"""
+        return self.row_count
+
+
+class DataFrameResult(ResultSet):
+    """以pandas DataFrame保存的完整结果集"""
+    
+    def __init__(self, df: pd.DataFrame):
+        """
+        初始化结果集
+        
+        Args:
+            df: 结果数据框
+        """
+        self.df = df
+        self._paged = None  # 过滤排序时复制到DuckDB的分页结果
+    
+    @property
+    def columns(self) -> List[str]:
+        """获取列名列表"""
+        return list(self.df.columns)
+    
+    @property
+    def row_count(self) -> int:
+        """获取总行数"""
+        return len(self.df)
+    
+    def fetch_page(self, offset: int, limit: int) -> pd.DataFrame:
+        """获取一页数据"""
+        return self.df.iloc[offset:offset + limit]
+    
+    def to_dataframe(self) -> pd.DataFrame:
+        """获取全部数据"""
+        return self.df
+    
+    def filter_sort(self, filter_column: Optional[str] = None, filter_value: str = "",
+                    sort_column: Optional[str] = None, ascending: bool = True) -> ResultSet:
+        """在DuckDB中过滤和排序结果，首次调用时将数据框复制到内存数据库"""
+        if self._paged is None:
+            cursor = duckdb.connect()
+            cursor.register("queryx_frame", self.df)
+            try:
+                cursor.execute(f'CREATE TEMP TABLE "{PagedResult.TABLE_NAME}" AS SELECT * FROM queryx_frame')
+            finally:
+                cursor.unregister("queryx_frame")
+            self._paged = PagedResult(cursor)
+        return self._paged.filter_sort(filter_column, filter_value, sort_column, ascending)
+    
+    def close(self) -> None:
+        """释放过滤排序使用的内存数据库"""
+        if self._paged is not None:
+            self._paged.close()
+            self._paged = None
+
+
+class PagedResult(ResultSet):
+    """
+    保存在DuckDB临时表中的分页结果集
+    
+    查询结果以列式格式保存在游标连接的临时表中，界面只按需读取可见页，
+    不会为整个结果构建pandas DataFrame。
+    """
+    
+    TABLE_NAME = "queryx_result"  # 临时表只对所在游标可见，不会与其他结果冲突
+    
+    def __init__(self, cursor: duckdb.DuckDBPyConnection):
+        """
+        初始化分页结果集，结果需已保存到游标的临时表中
+        
+        Args:
+            cursor: 保存结果临时表的游标，由结果集负责关闭
+        """
+        self.cursor = cursor
+        self._columns = [row[0] for row in cursor.execute(f'DESCRIBE "{self.TABLE_NAME}"').fetchall()]
+        self._row_count = cursor.execute(f'SELECT COUNT(*) FROM "{self.TABLE_NAME}"').fetchone()[0]
+        self.closed = False
+        self.lock = threading.Lock()  # 与过滤排序结果共用游标
+    
+    @classmethod
+    def create(cls, cursor: duckdb.DuckDBPyConnection, query: str) -> Optional['PagedResult']:
+        """
+        执行查询并将结果保存到临时表
+        
+        Args:
+            cursor: 执行查询的游标
+            query: SQL查询语句
+        
+        Returns:
+            Optional[PagedResult]: 分页结果集，语句没有返回结果（如CREATE、INSERT）时返回None
+        """
+        relation = cursor.sql(query)
+        if relation is None:
+            return None
+        
+        # 通过临时视图引用关系，支持SELECT以外的DESCRIBE、SHOW等返回结果的语句
+        cursor.register("queryx_query", relation)
+        try:
+            cursor.execute(f'CREATE OR REPLACE TEMP TABLE "{cls.TABLE_NAME}" AS SELECT * FROM queryx_query')
+        finally:
+            cursor.unregister("queryx_query")
+        return cls(cursor)
+    
+    @property
+    def columns(self) -> List[str]:
+        """获取列名列表"""
+        return self._columns
+    
+    @property
+    def row_count(self) -> int:
+        """获取总行数（创建时统计一次）"""
+        return self._row_count
+    
+    @property
+    def has_rowid(self) -> bool:
+        """rowid伪列是否可用（结果中有名为rowid的列时会遮盖伪列）"""
+        return 'rowid' not in (col.lower() for col in self._columns)
+    
+    @staticmethod
+    def page_sql(table_name: str, offset: int, limit: int, has_rowid: bool) -> str:
+        """
+        生成读取临时表中一页数据的SQL
+        
+        Args:
+            table_name: 临时表名
+            offset: 起始行
+            limit: 行数
+            has_rowid: rowid伪列是否可用
+        
+        Returns:
+            str: SQL语句
+        """
+        offset, limit = int(offset), int(limit)
+        
+        # rowid伪列被遮盖时退回LIMIT/OFFSET
+        if not has_rowid:
+            return f'SELECT * FROM "{table_name}" LIMIT {limit} OFFSET {offset}'
+        # 临时表按插入顺序分配rowid，按rowid范围读取无需扫描前面的行
+        return (f'SELECT * FROM "{table_name}" '
+                f'WHERE rowid >= {offset} AND rowid < {offset + limit} ORDER BY rowid')
+    
+    def fetch_page(self, offset: int, limit: int) -> pd.DataFrame:
+        """获取一页数据，只从DuckDB读取该页的行"""
+        return self.cursor.execute(self.page_sql(self.TABLE_NAME, offset, limit, self.has_rowid)).fetchdf()
+    
+    def to_dataframe(self) -> pd.DataFrame:
+        """获取全部数据（会构建完整的DataFrame，仅用于导出等需要全部数据的场景）"""
+        return self.cursor.execute(f'SELECT * FROM "{self.TABLE_NAME}"').fetchdf()
+    
+    def fetch_table(self, limit: Optional[int] = None) -> Any:
+        """
+        读取结果为Arrow表，不经过pandas；未安装pyarrow时为DataFrame
+        
+        Args:
+            limit: 读取的行数，为None时读取全部
+        
+        Returns:
+            Any: Arrow表或DataFrame
+        """
+        sql = f'SELECT * FROM "{self.TABLE_NAME}"' + (f' LIMIT {int(limit)}' if limit is not None else '')
+        cursor = self.cursor.execute(sql)
+        if pyarrow is None:
+            return cursor.fetchdf()
+        # 新版本DuckDB使用to_arrow_table，旧版本使用fetch_arrow_table
+        return (getattr(cursor, 'to_arrow_table', None) or cursor.fetch_arrow_table)()
+    
+    @classmethod
+    def from_table(cls, cursor: duckdb.DuckDBPyConnection, data: Any) -> 'PagedResult':
+        """
+        将Arrow表或DataFrame复制到游标的临时表，创建分页结果集
+        
+        Args:
+            cursor: 保存结果临时表的游标，由结果集负责关闭
+            data: Arrow表或DataFrame，见fetch_table
+        
+        Returns:
+            PagedResult: 分页结果集
+        """
+        cursor.register("queryx_table", data)
+        try:
+            cursor.execute(f'CREATE OR REPLACE TEMP TABLE "{cls.TABLE_NAME}" AS SELECT * FROM queryx_table')
+        finally:
+            cursor.unregister("queryx_table")
+        return cls(cursor)
+    
+    def iter_batches(self, batch_size: int = STREAM_BATCH_SIZE) -> Iterator[pd.DataFrame]:
+        """分批读取全部数据，通过流式扫描临时表，不构建完整的DataFrame"""
+        relation = self.cursor.sql(f'SELECT * FROM "{self.TABLE_NAME}"')
+        for batch in iter_relation_batches(relation, batch_size):
+            yield batch_to_dataframe(batch)
+    
+    def filter_sort(self, filter_column: Optional[str] = None, filter_value: str = "",
+                    sort_column: Optional[str] = None, ascending: bool = True) -> ResultSet:
+        """在DuckDB中过滤和排序结果，生成临时表上的查询，不复制数据"""
+        return FilteredResult(self, filter_column, filter_value, sort_column, ascending)
+    
+    def close(self) -> None:
+        """关闭游标，释放临时表"""
+        if not self.closed:
+            self.closed = True
+            try:
+                self.cursor.close()
+            except Exception:
+                pass
+
+
+class StreamingResult(PagedResult):
+    """
+    边执行边填充的分页结果集
+    
+    查询在执行游标上流式读取，每读到一批就追加到结果游标的临时表中，
+    第一批到达后界面即可显示首页，无需等待整个查询完成。
+    """
+    
+    def __init__(self, cursor: duckdb.DuckDBPyConnection, relation: duckdb.DuckDBPyRelation):
+        """
+        初始化流式结果集，按关系的列类型创建空的临时表
+        
+        Args:
+            cursor: 保存结果临时表的游标（不能与执行查询的游标相同），由结果集负责关闭
+            relation: 查询关系，只读取列信息，不执行查询
+        """
+        self.cursor = cursor
+        self.closed = False
+        self.complete = False  # 是否已读取全部结果
+        self.loading = True  # 是否仍在读取（取消或出错后停止读取，但结果不完整）
+        self.lock = threading.Lock()  # 后台线程追加数据与界面读取页数据共用结果游标
+        self._row_count = 0
+        
+        # 与CREATE TABLE AS一致，重复列名追加序号
+        self._columns = []
+        for name in relation.columns:
+            unique_name, index = name, 0
+            while unique_name in self._columns:
+                index += 1
+                unique_name = f"{name}_{index}"
+            self._columns.append(unique_name)
+        
+        column_defs = ", ".join(
+            '"{}" {}'.format(name.replace('"', '""'), col_type)
+            for name, col_type in zip(self._columns, relation.types)
+        )
+        cursor.execute(f'CREATE OR REPLACE TEMP TABLE "{self.TABLE_NAME}" ({column_defs})')
+    
+    @property
+    def row_count(self) -> int:
+        """获取当前已读取的行数"""
+        return self._row_count
+    
+    def fill(self, relation: duckdb.DuckDBPyRelation, batch_size: int = STREAM_BATCH_SIZE) -> None:
+        """
+        执行查询并逐批追加到临时表，在后台线程中调用
+        
+        Args:
+            relation: 查询关系，所在游标被中断时抛出异常，已追加的数据保留
+            batch_size: 每批行数
+        """
+        try:
+            for batch in iter_relation_batches(relation, batch_size):
+                with self.lock:
+                    if self.closed:
+                        return
+                    # 批次中的重复列名无法按名称扫描，使用去重后的列名
+                    if isinstance(batch, pd.DataFrame):
+                        batch.columns = self._columns
+                    else:
+                        batch = batch.rename_columns(self._columns)
+                    self.cursor.register("queryx_batch", batch)
+                    try:
+                        self.cursor.execute(f'INSERT INTO "{self.TABLE_NAME}" SELECT * FROM queryx_batch')
+                    finally:
+                        self.cursor.unregister("queryx_batch")
+                    self._row_count += len(batch)
+            self.complete = True
+        finally:
+            self.loading = False
+    
+    def fetch_page(self, offset: int, limit: int) -> pd.DataFrame:
+        """获取一页数据，只从DuckDB读取该页的行"""
+        with self.lock:
+            return super().fetch_page(offset, limit)
+    
+    def to_dataframe(self) -> pd.DataFrame:
+        """获取当前已读取的全部数据"""
+        with self.lock:
+            return super().to_dataframe()
+    
+    def fetch_table(self, limit: Optional[int] = None) -> Any:
+        """读取当前已读取的数据为Arrow表，见PagedResult.fetch_table"""
+        with self.lock:
+            return super().fetch_table(limit)
+    
+    def iter_batches(self, batch_size: int = STREAM_BATCH_SIZE) -> Iterator[pd.DataFrame]:
+        """分批读取当前已读取的全部数据，按页加锁，读取期间不阻塞后台追加"""
+        return ResultSet.iter_batches(self, batch_size)
+    
+    def close(self) -> None:
+        """关闭游标，释放临时表"""
+        with self.lock:
+            super().close()
+
+
+class FilteredResult(ResultSet):
+    """
+    分页结果集上的过滤排序结果
+    
+    过滤和排序编译为临时表上的SQL（WHERE ... ILIKE ... ORDER BY ...），由DuckDB执行一次，
+    结果按顺序保存到同一游标的另一张临时表，翻页时按rowid范围读取，不重新过滤和排序。
+    """
+    
+    _table_ids = itertools.count()  # 临时表名序号，同一结果集上可以同时存在多个过滤结果
+    
+    def __init__(self, base: PagedResult, filter_column: Optional[str] = None, filter_value: str = "",
+                 sort_column: Optional[str] = None, ascending: bool = True):
+        """
+        初始化过滤排序结果集
+        
+        Args:
+            base: 原分页结果集，由原结果集负责释放；过滤结果的临时表由close释放
+            filter_column: 过滤列
+            filter_value: 过滤值
+            sort_column: 排序列
+            ascending: 是否升序
+        """
+        self.base = base
+        self.table_name = f"queryx_filtered_{next(self._table_ids)}"
+        self.closed = False
+        conditions = []
+        params = []
+        
+        if filter_column and filter_value:
+            # 转义通配符，按字面值进行包含匹配
+            escaped = filter_value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            conditions.append(f"CAST({self._quote(filter_column)} AS VARCHAR) ILIKE ? ESCAPE '\\'")
+            params.append(f"%{escaped}%")
+        
+        orders = []
+        if sort_column:
+            orders.append(f"{self._quote(sort_column)} {'ASC' if ascending else 'DESC'} NULLS LAST")
+        
+        with base.lock:
+            if base.has_rowid:
+                # 只包含应用时已读取的行（流式结果仍在追加），并按rowid保持原有顺序
+                conditions.append(f"rowid < {int(base.row_count)}")
+                orders.append("rowid")
+            
+            sql = f'SELECT * FROM "{base.TABLE_NAME}"'
+            if conditions:
+                sql += " WHERE " + " AND ".join(conditions)
+            if orders:
+                sql += " ORDER BY " + ", ".join(orders)
+            
+            # 按插入顺序分配rowid，保持排序后的顺序
+            base.cursor.execute(f'CREATE TEMP TABLE "{self.table_name}" AS {sql}', params)
+            self._row_count = base.cursor.execute(f'SELECT COUNT(*) FROM "{self.table_name}"').fetchone()[0]
+    
+    @staticmethod
+    def _quote(column: str) -> str:
+        """为列名加引号"""
+        return '"{}"'.format(str(column).replace('"', '""'))
+    
+    @property
+    def columns(self) -> List[str]:
+        """获取列名列表"""
+        return self.base.columns
+    
+    @property
+    def row_count(self) -> int:
+        """获取过滤后的总行数（创建时统计一次）"""
+        return self._row_count
+    
+    def fetch_page(self, offset: int, limit: int) -> pd.DataFrame:
+        """获取一页数据，只从过滤结果的临时表读取该页的行"""
+        sql = PagedResult.page_sql(self.table_name, offset, limit, self.base.has_rowid)
+        with self.base.lock:
+            return self.base.cursor.execute(sql).fetchdf()
+    
+    def to_dataframe(self) -> pd.DataFrame:
+        """获取过滤排序后的全部数据"""
+        order = " ORDER BY rowid" if self.base.has_rowid else ""
+        with self.base.lock:
+            return self.base.cursor.execute(f'SELECT * FROM "{self.table_name}"{order}').fetchdf()
+    
+    def filter_sort(self, filter_column: Optional[str] = None, filter_value: str = "",
+                    sort_column: Optional[str] = None, ascending: bool = True) -> ResultSet:
+        """在原结果集上重新过滤和排序"""
+        return self.base.filter_sort(filter_column, filter_value, sort_column, ascending)
+    
+    def close(self) -> None:
+        """删除过滤结果的临时表，原结果集已关闭时临时表已随游标释放"""
+        with self.base.lock:
+            if self.closed or self.base.closed:
+                self.closed = True
+                return
+            self.closed = True
+            try:
+                self.base.cursor.execute(f'DROP TABLE IF EXISTS "{self.table_name}"')
+            except Exception:
+                pass
\ No newline at end of file
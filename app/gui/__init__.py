@@ -12,7 +12,8 @@ from app.gui.sql_editor import SQLEditor
 from app.gui.result_panel import ResultPanel
 from app.gui.history_panel import HistoryPanel
 from app.gui.schema_panel import SchemaPanel
-from app.gui.settings_dialog import SqlFormatSettingsDialog
+from app.gui.profiler_panel import ProfilerPanel
+from app.gui.settings_dialog import SqlFormatSettingsDialog, PerformanceSettingsDialog, SamplingSettingsDialog
 
 __all__ = [
     'MainWindow',
@@ -21,5 +22,8 @@ __all__ = [
     'ResultPanel',
     'HistoryPanel',
     'SchemaPanel',
-    'SqlFormatSettingsDialog'
+    'ProfilerPanel',
+    'SqlFormatSettingsDialog',
+    'PerformanceSettingsDialog',
+    'SamplingSettingsDialog'
 ] 
\ No newline at end of file
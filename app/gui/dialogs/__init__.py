@@ -8,5 +8,6 @@
 
 from app.gui.dialogs.help_dialog import HelpDialog
 from app.gui.dialogs.about_dialog import AboutDialog
+from app.gui.dialogs.memory_dialog import MemoryDialog
 
-__all__ = ['HelpDialog', 'AboutDialog']
+__all__ = ['HelpDialog', 'AboutDialog', 'MemoryDialog']
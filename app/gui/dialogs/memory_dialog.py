@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+内存占用对话框模块
+按表和查询结果显示数据的存储方式和内存占用
+"""
+
+import tkinter as tk
+from tkinter import ttk
+from typing import Dict, Any, Callable
+
+from app.core.memory_report import STORAGE_LABELS
+from app.utils.helpers import format_file_size
+from app.utils.ui_helpers import scrollbar_autohide
+
+
+class MemoryDialog(tk.Toplevel):
+    """内存占用对话框，显示每张表和每个查询结果的占用"""
+    
+    def __init__(self, parent, report_callback: Callable[[], Dict[str, Any]]):
+        """
+        初始化对话框
+        
+        Args:
+            parent: 父窗口
+            report_callback: 获取内存占用明细的函数，返回值见memory_report.build_memory_report
+        """
+        super().__init__(parent)
+        self.parent = parent
+        self.report_callback = report_callback
+        
+        # 设置对话框属性
+        self.title("内存占用")
+        self.transient(parent)
+        
+        # 创建UI组件
+        self._create_widgets()
+        self._on_refresh()
+        
+        # 居中显示
+        self.update_idletasks()
+        width, height = 680, 420
+        x = (self.winfo_screenwidth() // 2) - (width // 2)
+        y = (self.winfo_screenheight() // 2) - (height // 2)
+        self.geometry(f'{width}x{height}+{x}+{y}')
+        
+        # 绑定Escape键关闭对话框
+        self.bind("<Escape>", lambda event: self.destroy())
+    
+    def _create_widgets(self):
+        """创建对话框组件"""
+        # 主框架
+        main_frame = ttk.Frame(self, padding=10)
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        
+        # 汇总信息
+        self.summary_label = ttk.Label(main_frame, text="", justify=tk.LEFT)
+        self.summary_label.pack(side=tk.TOP, fill=tk.X)
+        
+        # 按钮区域
+        btn_frame = ttk.Frame(main_frame)
+        btn_frame.pack(side=tk.BOTTOM, fill=tk.X, pady=(10, 0))
+        
+        ttk.Label(btn_frame, text="带*的占用为按数据量分摊DuckDB内存的估算值", foreground="gray").pack(side=tk.LEFT)
+        ttk.Button(btn_frame, text="关闭", command=self.destroy).pack(side=tk.RIGHT, padx=5)
+        ttk.Button(btn_frame, text="刷新", command=self._on_refresh).pack(side=tk.RIGHT, padx=5)
+        
+        # 明细列表
+        tree_frame = ttk.Frame(main_frame)
+        tree_frame.pack(side=tk.TOP, fill=tk.BOTH, expand=True, pady=(10, 0))
+        
+        columns = ("storage", "rows", "columns", "size")
+        self.detail_tree = ttk.Treeview(tree_frame, columns=columns, show="tree headings")
+        self.detail_tree.heading("#0", text="名称")
+        self.detail_tree.heading("storage", text="存储方式")
+        self.detail_tree.heading("rows", text="行数")
+        self.detail_tree.heading("columns", text="列数")
+        self.detail_tree.heading("size", text="内存占用")
+        self.detail_tree.column("#0", width=200)
+        self.detail_tree.column("storage", width=180)
+        self.detail_tree.column("rows", width=90, anchor=tk.E)
+        self.detail_tree.column("columns", width=50, anchor=tk.E)
+        self.detail_tree.column("size", width=100, anchor=tk.E)
+        
+        yscrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.detail_tree.yview)
+        self.detail_tree.configure(yscrollcommand=scrollbar_autohide(yscrollbar, 'pack'))
+        self.detail_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        yscrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+    
+    @staticmethod
+    def _format_size(size: Any, estimated: bool = False) -> str:
+        """格式化内存占用，未知时显示为-，估算值加*"""
+        if size is None:
+            return "-"
+        return f"{'*' if estimated else ''}{format_file_size(int(size))}"
+    
+    def _on_refresh(self):
+        """重新统计并显示内存占用"""
+        report = self.report_callback()
+        self.detail_tree.delete(*self.detail_tree.get_children())
+        
+        # 按类别分组显示，类别节点显示合计
+        for category in ("表", "查询结果"):
+            items = [item for item in report['items'] if item['category'] == category]
+            known = [item['size'] for item in items if item['size'] is not None]
+            estimated = any(item['estimated'] for item in items)
+            group = self.detail_tree.insert(
+                "", "end", text=f"{category} ({len(items)})", open=True,
+                values=("", "", "", self._format_size(sum(known), estimated) if known else "-")
+            )
+            for item in sorted(items, key=lambda item: item['size'] or 0, reverse=True):
+                self.detail_tree.insert(group, "end", text=item['name'], values=(
+                    STORAGE_LABELS.get(item['storage'], item['storage']),
+                    f"{item['rows']:,}" if item['rows'] is not None else "-",
+                    item['columns'] if item['columns'] is not None else "-",
+                    self._format_size(item['size'], item['estimated'])
+                ))
+        
+        entries, cache_size = report['result_cache']
+        self.detail_tree.insert("", "end", text=f"结果缓存 ({entries})",
+                                values=("Arrow表/pandas DataFrame", "", "", self._format_size(cache_size)))
+        
+        lines = []
+        if report['duckdb'] is not None:
+            memory, temporary, limit = report['duckdb']
+            line = f"DuckDB内存: {format_file_size(memory)} / {limit}"
+            if temporary:
+                line += f"，换出到磁盘: {format_file_size(temporary)}"
+            lines.append(line)
+        if report['process'] is not None:
+            lines.append(f"进程内存: {format_file_size(report['process'])}")
+        self.summary_label.config(text="\n".join(lines) or "DuckDB正在执行操作，请稍后刷新")
@@ -8,10 +8,11 @@
 
 import os
 import tkinter as tk
-from tkinter import ttk, filedialog, messagebox
-from typing import List, Dict, Callable
+from tkinter import ttk, filedialog, messagebox, simpledialog
+from typing import List, Dict, Callable, Optional
 import pandas as pd
 
+from app.core.file_handler import resolve_file_set
 from app.utils.helpers import is_supported_file, get_file_extension
 from app.utils.ui_helpers import scrollbar_autohide
 
@@ -19,7 +20,8 @@ from app.utils.ui_helpers import scrollbar_autohide
 class FilePanel(ttk.Frame):
     """文件选择面板，提供文件选择和管理功能"""
     
-    def __init__(self, parent, load_callback: Callable = None, remove_callback: Callable = None):
+    def __init__(self, parent, load_callback: Callable = None, remove_callback: Callable = None,
+                 batch_load_callback: Callable = None):
         """
         初始化文件选择面板
         
@@ -27,14 +29,18 @@ class FilePanel(ttk.Frame):
             parent: 父容器
             load_callback: 加载文件的回调函数
             remove_callback: 移除文件的回调函数
+            batch_load_callback: 同时添加多个文件时并行加载的回调函数
         """
         super().__init__(parent)
         self.parent = parent
         self.load_callback = load_callback
         self.remove_callback = remove_callback
+        self.batch_load_callback = batch_load_callback
         self.selected_files = []  # 已选择的文件路径列表
-        self.file_table_map = {}  # 文件路径到表名的映射
+        self.file_table_map = {}  # 文件路径到表名列表的映射（Excel文件每个工作表一张表）
+        self.item_table_map = {}  # 工作表子项到表名的映射
         self.query_callback = None  # 查询回调函数
+        self.materialize_callback = None  # 将表转换为原生表的回调函数
         self.query_engine = None  # 查询引擎实例
         self.preview_visible = False  # 预览区域是否可见
         self.current_preview_file = None  # 当前预览的文件路径
@@ -60,6 +66,14 @@ class FilePanel(ttk.Frame):
         )
         self.add_btn.pack(side=tk.LEFT, padx=(0, 5))  # 左侧边距为0，右侧为5
         
+        # 添加文件夹按钮，文件夹中的同结构文件合并为一张表
+        self.add_folder_btn = ttk.Button(
+            btn_frame,
+            text="添加文件夹",
+            command=self._on_add_folder
+        )
+        self.add_folder_btn.pack(side=tk.LEFT, padx=5)
+        
         # 移除选中文件按钮
         self.remove_btn = ttk.Button(
             btn_frame, 
@@ -177,6 +191,7 @@ class FilePanel(ttk.Frame):
         self.context_menu = tk.Menu(self, tearoff=0)
         self.context_menu.add_command(label="预览", command=self._on_preview_selected)
         self.context_menu.add_command(label="查询", command=self._on_query_selected)
+        self.context_menu.add_command(label="转为原生表", command=self._on_materialize_selected)
         self.context_menu.add_separator()
         self.context_menu.add_command(label="移除", command=self._on_remove_selected)
         
@@ -205,11 +220,12 @@ class FilePanel(ttk.Frame):
         
         # 获取文件路径
         values = self.file_tree.item(item_id, "values")
-        file_name = values[1]
+        file_name = values[1].strip()
         file_path = values[-1]  # 文件路径存储在隐藏列
         
         # 调用预览切换功能，显示预览区域并加载内容
-        self._toggle_preview(show_preview=True, file_path=file_path, file_name=file_name)
+        self._toggle_preview(show_preview=True, file_path=file_path, file_name=file_name,
+                             table_name=self._get_item_table(item_id))
     
     def _on_preview_selected(self):
         """预览选中的文件"""
@@ -220,11 +236,12 @@ class FilePanel(ttk.Frame):
         # 获取选中项对应的文件路径
         item_id = selected_items[0]  # 只预览第一个选中的文件
         values = self.file_tree.item(item_id, "values")
-        file_name = values[1]
+        file_name = values[1].strip()
         file_path = values[-1]  # 文件路径存储在隐藏列
         
         # 调用预览切换功能，显示预览区域并加载内容
-        self._toggle_preview(show_preview=True, file_path=file_path, file_name=file_name)
+        self._toggle_preview(show_preview=True, file_path=file_path, file_name=file_name,
+                             table_name=self._get_item_table(item_id))
     
     def _on_query_selected(self):
         """查询选中的文件"""
@@ -235,12 +252,11 @@ class FilePanel(ttk.Frame):
         # 获取选中项对应的文件路径
         item_id = selected_items[0]  # 只查询第一个选中的文件
         values = self.file_tree.item(item_id, "values")
-        file_name = values[1]
-        file_path = values[-1]  # 文件路径存储在隐藏列
+        file_name = values[1].strip()
         
         # 获取表名
-        if file_path in self.file_table_map:
-            table_name = self.file_table_map[file_path]
+        table_name = self._get_item_table(item_id)
+        if table_name:
             
             # 如果设置了查询回调函数，则调用
             if self.query_callback:
@@ -252,15 +268,47 @@ class FilePanel(ttk.Frame):
         else:
             self.status_label.config(text=f"无法获取 {file_name} 的表名")
     
+    def _on_materialize_selected(self):
+        """将选中的表转换为DuckDB原生表"""
+        selected_items = self.file_tree.selection()
+        if not selected_items or not self.materialize_callback:
+            return
+        
+        table_name = self._get_item_table(selected_items[0])
+        if table_name:
+            success, message = self.materialize_callback(table_name)
+            self.status_label.config(text=message)
+    
+    def _get_item_table(self, item_id: str) -> Optional[str]:
+        """
+        获取列表项对应的表名，文件项对应文件的第一张表，工作表子项对应该工作表
+        
+        Args:
+            item_id: 列表项ID
+        
+        Returns:
+            Optional[str]: 表名，未找到时返回None
+        """
+        if item_id in self.item_table_map:
+            return self.item_table_map[item_id]
+        file_path = self.file_tree.item(item_id, "values")[-1]
+        table_names = self.file_table_map.get(file_path)
+        return table_names[0] if table_names else None
+    
     def _on_add_files(self):
         """添加文件"""
         file_paths = filedialog.askopenfilenames(
             title="选择文件",
             filetypes=[
-                ("所有支持的文件", "*.xlsx *.xls *.xlsm *.csv *.json"),
+                ("所有支持的文件", "*.xlsx *.xls *.xlsm *.csv *.json *.jsonl *.ndjson *.gz *.zst *.bz2 *.zip "
+                                    "*.parquet *.arrow *.feather *.ipc *.duckdb *.ddb"),
                 ("Excel文件", "*.xlsx *.xls *.xlsm"),
                 ("CSV文件", "*.csv"),
-                ("JSON文件", "*.json"),
+                ("JSON文件", "*.json *.jsonl *.ndjson"),
+                ("Parquet文件", "*.parquet"),
+                ("Arrow/Feather文件", "*.arrow *.feather *.ipc"),
+                ("DuckDB数据库", "*.duckdb *.ddb"),
+                ("压缩文件", "*.gz *.zst *.bz2 *.zip"),
                 ("所有文件", "*.*")
             ]
         )
@@ -273,11 +321,34 @@ class FilePanel(ttk.Frame):
                 self.status_label.config(text="未选择有效文件")
                 return
             
-            # 调用回调函数加载文件
-            if self.load_callback:
+            # 多个文件并行加载，单个文件直接加载
+            if len(valid_files) > 1 and self.batch_load_callback:
+                self.batch_load_callback(valid_files)
+            elif self.load_callback:
                 for file_path in valid_files:
                     self.load_callback(file_path)
     
+    def _on_add_folder(self):
+        """添加文件夹，按通配符匹配的多个文件作为一张表"""
+        folder = filedialog.askdirectory(title="选择文件夹")
+        if not folder:
+            return
+        
+        pattern, _ = resolve_file_set(folder)
+        if pattern is None:
+            self.status_label.config(text="文件夹中没有CSV/JSON/JSON Lines文件")
+            return
+        
+        # 可修改通配符只匹配部分文件，如 sales_2024-*.csv
+        pattern = simpledialog.askstring(
+            "添加文件夹",
+            "匹配的文件将合并为一张表（附加filename列和Hive分区列）：",
+            initialvalue=pattern,
+            parent=self
+        )
+        if pattern and self.load_callback:
+            self.load_callback(pattern.strip())
+    
     def _on_remove_selected(self):
         """移除选中的文件"""
         selected_items = self.file_tree.selection()
@@ -285,17 +356,18 @@ class FilePanel(ttk.Frame):
         if not selected_items:
             return
         
-        # 获取选中项对应的文件路径
+        # 获取选中项对应的文件路径（选中工作表时移除整个文件）
         selected_paths = []
         for item_id in selected_items:
             file_path = self.file_tree.item(item_id, "values")[-1]  # 文件路径存储在隐藏列
-            selected_paths.append(file_path)
+            if file_path not in selected_paths:
+                selected_paths.append(file_path)
         
         # 检查是否有这些文件相关的可用表
         affected_tables = []
         for file_path in selected_paths:
             if file_path in self.file_table_map:
-                affected_tables.append(self.file_table_map[file_path])
+                affected_tables.extend(self.file_table_map[file_path])
         
         # 如果有相关表，提示用户确认
         if affected_tables:
@@ -328,7 +400,7 @@ class FilePanel(ttk.Frame):
             return
         
         # 检查是否有可用表
-        affected_tables = list(self.file_table_map.values())
+        affected_tables = [name for names in self.file_table_map.values() for name in names]
         
         # 如果有相关表，提示用户确认
         if affected_tables:
@@ -401,9 +473,11 @@ class FilePanel(ttk.Frame):
         Args:
             file_path: 文件路径
         """
-        # 查找对应的树项
+        # 查找对应的树项（工作表子项随文件项一起删除）
         for item_id in self.file_tree.get_children():
             if self.file_tree.item(item_id, "values")[-1] == file_path:
+                for child_id in self.file_tree.get_children(item_id):
+                    self.item_table_map.pop(child_id, None)
                 self.file_tree.delete(item_id)
                 break
         
@@ -441,7 +515,7 @@ class FilePanel(ttk.Frame):
         row_num = len(self.file_tree.get_children()) + 1
         
         # 添加到树视图
-        self.file_tree.insert(
+        item_id = self.file_tree.insert(
             "",
             tk.END,
             values=(
@@ -449,11 +523,13 @@ class FilePanel(ttk.Frame):
                 file_info["name"],
                 file_info["type"],
                 file_info["size"],
-                file_info["rows"],
-                file_info["columns"],
+                file_info["rows"] if file_info["rows"] is not None else "-",  # 延迟加载的文件行数未知
+                file_info["columns"] if file_info["columns"] is not None else "-",
                 file_path  # 隐藏列，存储文件路径
-            )
+            ),
+            open=True
         )
+        self._add_table_items(item_id, file_path, file_info)
         
         # 添加到已选择列表
         if file_path not in self.selected_files:
@@ -463,8 +539,71 @@ class FilePanel(ttk.Frame):
         self.status_label.config(text=f"已加载: {file_info['name']}")
         
         # 如果文件信息中包含表名，记录文件到表名的映射
-        if 'table_name' in file_info:
-            self.file_table_map[file_path] = file_info['table_name']
+        if 'table_names' in file_info:
+            self.file_table_map[file_path] = file_info['table_names']
+        elif 'table_name' in file_info:
+            self.file_table_map[file_path] = [file_info['table_name']]
+    
+    def update_file(self, file_path: str, file_info: Dict):
+        """
+        更新列表中已有文件的信息（文件变化后重新加载），文件不在列表中时添加
+        
+        Args:
+            file_path: 文件路径
+            file_info: 文件信息字典
+        """
+        for item_id in self.file_tree.get_children():
+            values = self.file_tree.item(item_id, "values")
+            if values[-1] != file_path:
+                continue
+            
+            self.file_tree.item(item_id, values=(
+                values[0],
+                file_info["name"],
+                file_info["type"],
+                file_info["size"],
+                file_info["rows"] if file_info["rows"] is not None else "-",
+                file_info["columns"] if file_info["columns"] is not None else "-",
+                file_path
+            ))
+            
+            # 工作表或成员文件可能增减，重新生成子项
+            for child_id in self.file_tree.get_children(item_id):
+                self.item_table_map.pop(child_id, None)
+                self.file_tree.delete(child_id)
+            self._add_table_items(item_id, file_path, file_info)
+            
+            if 'table_names' in file_info:
+                self.file_table_map[file_path] = file_info['table_names']
+            return
+        
+        self.add_file(file_path, file_info)
+    
+    def _add_table_items(self, item_id: str, file_path: str, file_info: Dict):
+        """
+        添加文件的表子项
+        
+        Args:
+            item_id: 文件项ID
+            file_path: 文件路径
+            file_info: 文件信息字典
+        """
+        # 多个工作表的文件（或多个成员的压缩包），每个工作表显示为子项
+        for table_info in file_info.get("tables", []):
+            child_id = self.file_tree.insert(
+                item_id,
+                tk.END,
+                values=(
+                    "",
+                    f"  {table_info['name']}",
+                    table_info.get("type", "SHEET"),
+                    "",
+                    table_info["rows"] if table_info["rows"] is not None else "-",  # 工作表在查询前不解析
+                    table_info["columns"] if table_info["columns"] is not None else "-",  # 压缩包成员在读取前列数未知
+                    file_path
+                )
+            )
+            self.item_table_map[child_id] = table_info["table_name"]
     
     def get_selected_files(self) -> List[str]:
         """
@@ -484,6 +623,15 @@ class FilePanel(ttk.Frame):
         """
         self.query_callback = callback
     
+    def set_materialize_callback(self, callback: Callable):
+        """
+        设置将表转换为原生表的回调函数
+        
+        Args:
+            callback: 回调函数，参数为表名，返回(是否成功, 信息)
+        """
+        self.materialize_callback = callback
+    
     def set_query_engine(self, query_engine):
         """
         设置查询引擎
@@ -493,7 +641,7 @@ class FilePanel(ttk.Frame):
         """
         self.query_engine = query_engine
     
-    def _toggle_preview(self, show_preview=None, file_path=None, file_name=None):
+    def _toggle_preview(self, show_preview=None, file_path=None, file_name=None, table_name=None):
         """
         切换预览区域的显示/隐藏
         
@@ -501,6 +649,7 @@ class FilePanel(ttk.Frame):
             show_preview: 是否显示预览，None表示切换状态
             file_path: 要预览的文件路径
             file_name: 要预览的文件名称
+            table_name: 要预览的表名，None表示文件的第一张表
         """
         # 如果指定了show_preview，使用指定值，否则切换状态
         if show_preview is not None:
@@ -519,7 +668,7 @@ class FilePanel(ttk.Frame):
                     self.preview_visible = True
                 
                 # 加载预览内容
-                self._load_preview_content(file_path, file_name or "文件")
+                self._load_preview_content(file_path, file_name or "文件", table_name)
                 
                 # 更新预览标题
                 if file_name:
@@ -543,14 +692,15 @@ class FilePanel(ttk.Frame):
         # 更新界面
         self.update_idletasks()
         
-    def _load_preview_content(self, file_path, file_name):
+    def _load_preview_content(self, file_path, file_name, table_name=None):
         """加载预览内容"""
         # 清空预览区域
         self._clear_preview()
         
-        # 如果设置了查询引擎，优先使用查询引擎的预览功能
-        if self.query_engine and file_path in self.file_table_map:
-            table_name = self.file_table_map[file_path]
+        # 如果设置了查询引擎，优先使用查询引擎的预览功能（首次预览工作表时解析该工作表）
+        if table_name is None and self.file_table_map.get(file_path):
+            table_name = self.file_table_map[file_path][0]
+        if self.query_engine and table_name:
             try:
                 # 使用查询引擎预览表数据（显示前100行）
                 df = self.query_engine.get_table_preview(table_name, limit=100)
@@ -7,17 +7,25 @@
 """
 
 import os
+import threading
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
+from typing import Dict, List, Tuple, Optional, Any
 
+from app.core.config import config_manager
 from app.core.file_handler import FileHandler
 from app.core.query_engine import QueryEngine
+from app.core.parallel_loader import ParallelLoader
+from app.core.memory_report import build_memory_report
+from app.core.query_sampler import describe_sample
 from app.gui.file_panel import FilePanel
 from app.gui.sql_editor import SQLEditor
 from app.gui.result_panel import ResultPanel
 from app.gui.history_panel import HistoryPanel
 from app.gui.schema_panel import SchemaPanel
-from app.gui.settings_dialog import SqlFormatSettingsDialog
+from app.gui.profiler_panel import ProfilerPanel
+from app.gui.settings_dialog import SqlFormatSettingsDialog, PerformanceSettingsDialog, SamplingSettingsDialog
+from app.utils.helpers import format_file_size
 
 # 导入项目资源
 from app.resources import ICON_PATH
@@ -45,10 +53,27 @@ class MainWindow:
         self.file_panel_visible = True
         self.history_panel_visible = False
         self.schema_panel_visible = False  # 表结构面板默认隐藏
+        self.profiler_panel_visible = False  # 性能分析面板在分析查询后显示
         
         # 表结构信息缓存
         self.tables_info = {}  # {表名: [字段列表]}
         
+        # 正在后台执行的查询任务
+        self.query_task = None
+        
+        # 正在进行的批量加载及其中加载失败的文件
+        self.parallel_loader = None
+        self.batch_errors = []
+        
+        # 正在后台重新加载已变化文件的线程及其结果 [(文件路径, 原有表名, 是否成功, 消息)]
+        self.reload_thread = None
+        self.reload_results = []
+        
+        # 在后台线程中逐个加载的文件队列、加载线程及其结果 [(文件路径, 是否成功, 消息)]
+        self.load_queue = []
+        self.load_thread = None
+        self.load_results = []
+        
         # 创建界面
         self._create_widgets()
         self._create_menu()
@@ -61,12 +86,29 @@ class MainWindow:
         
         # 定期更新表结构信息
         self.root.after(500, self._update_schema_info)
+        
+        # 定期检查已加载的文件是否变化
+        self.root.after(self._get_watch_interval(), self._poll_file_changes)
+        
+        # 打开上次使用的会话
+        self.root.after(100, self._restore_last_session)
+        
+        # 定期刷新内存占用
+        self.root.after(1000, self._update_memory_usage)
     
     def _create_widgets(self):
         """创建界面组件"""
         # 状态栏 - 先创建状态栏，确保它始终位于底部
-        self.status_bar = ttk.Label(self.root, text="就绪", relief=tk.SUNKEN, anchor=tk.W)
-        self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
+        status_frame = ttk.Frame(self.root)
+        status_frame.pack(side=tk.BOTTOM, fill=tk.X)
+        
+        # 右侧显示DuckDB当前的内存占用
+        self.memory_label = ttk.Label(status_frame, text="", relief=tk.SUNKEN, anchor=tk.E, width=32)
+        self.memory_label.pack(side=tk.RIGHT)
+        self.memory_label.bind("<Double-1>", lambda e: self._show_memory_report())
+        
+        self.status_bar = ttk.Label(status_frame, text="就绪", relief=tk.SUNKEN, anchor=tk.W)
+        self.status_bar.pack(side=tk.LEFT, fill=tk.X, expand=True)
         
         # 创建主分隔面板
         self.main_paned = ttk.PanedWindow(self.root, orient=tk.HORIZONTAL)
@@ -137,10 +179,12 @@ class MainWindow:
         self.file_panel_title.pack(side=tk.LEFT, padx=5, pady=2)
         
         # 文件选择面板
-        self.file_panel = FilePanel(self.file_panel_container, self._on_load_file, self.remove_file)
+        self.file_panel = FilePanel(self.file_panel_container, self._start_load_file, self.remove_file,
+                                    self._on_load_files)
         self.file_panel.pack(fill=tk.BOTH, expand=True)
         # 设置查询回调函数
         self.file_panel.set_query_callback(self._on_execute_query)
+        self.file_panel.set_materialize_callback(self._materialize_table)
         # 设置查询引擎实例
         self.file_panel.set_query_engine(self.query_engine)
         
@@ -175,12 +219,26 @@ class MainWindow:
         self.history_panel.pack(fill=tk.BOTH, expand=True)
         
         # SQL编辑器
-        self.sql_editor = SQLEditor(self.right_paned, self._on_execute_query)
+        self.sql_editor = SQLEditor(self.right_paned, self._on_execute_query, self._on_cancel_query)
         self.right_paned.add(self.sql_editor, weight=3)  # 增加SQL编辑器权重，从2到3
         
         # 结果显示面板
         self.result_panel = ResultPanel(self.right_paned)
         self.right_paned.add(self.result_panel, weight=2)  # 减少结果面板权重，从3到2
+        
+        # 性能分析面板容器，默认隐藏
+        self.profiler_panel_container = ttk.Frame(self.right_paned)
+        
+        # 性能分析面板标题栏
+        self.profiler_panel_header = ttk.Frame(self.profiler_panel_container)
+        self.profiler_panel_header.pack(fill=tk.X)
+        
+        self.profiler_panel_title = ttk.Label(self.profiler_panel_header, text="性能分析", font=("Arial", 10, "bold"))
+        self.profiler_panel_title.pack(side=tk.LEFT, padx=5, pady=2)
+        
+        # 性能分析面板
+        self.profiler_panel = ProfilerPanel(self.profiler_panel_container)
+        self.profiler_panel.pack(fill=tk.BOTH, expand=True)
     
     def _create_tooltip(self, widget, text):
         """为控件创建鼠标悬停提示"""
@@ -272,6 +330,30 @@ class MainWindow:
         except Exception as e:
             print(f"切换历史面板时出错: {str(e)}")
     
+    def _toggle_profiler_panel(self):
+        """切换性能分析面板的显示/隐藏状态"""
+        self._set_profiler_panel_visible(not self.profiler_panel_visible)
+    
+    def _set_profiler_panel_visible(self, visible: bool):
+        """
+        显示或隐藏性能分析面板，面板位于结果面板下方
+        
+        Args:
+            visible: 是否显示
+        """
+        try:
+            if visible and not self.profiler_panel_visible:
+                self.right_paned.add(self.profiler_panel_container, weight=2)
+            elif not visible and self.profiler_panel_visible:
+                self.right_paned.forget(self.profiler_panel_container)
+            self.profiler_panel_visible = visible
+            
+            # 调整主窗口布局
+            self.root.update_idletasks()
+        
+        except Exception as e:
+            print(f"切换性能分析面板时出错: {str(e)}")
+    
     def _on_schema_select(self, table_name: str, column_name: str = None, query: str = None):
         """
         从表结构面板选择表或字段时的回调函数
@@ -394,14 +476,33 @@ class MainWindow:
         file_menu.add_command(label="添加文件", command=self._menu_add_files)
         file_menu.add_command(label="清空所有文件", command=self._menu_clear_files)
         file_menu.add_separator()
+        session_menu = tk.Menu(file_menu, tearoff=0)
+        session_menu.add_command(label="新建会话...", command=self._menu_new_session)
+        session_menu.add_command(label="打开会话...", command=self._menu_open_session)
+        session_menu.add_command(label="压缩会话", command=self._menu_compact_session)
+        session_menu.add_command(label="关闭会话", command=self._menu_close_session)
+        file_menu.add_cascade(label="会话", menu=session_menu)
+        file_menu.add_separator()
+        self.lazy_load_var = tk.BooleanVar(value=bool(config_manager.get_config("loading", "lazy_load", False)))
+        file_menu.add_checkbutton(label="延迟加载（查询时读取）", variable=self.lazy_load_var, command=self._toggle_lazy_load)
+        self.watch_files_var = tk.BooleanVar(value=bool(config_manager.get_config("loading", "watch_files", True)))
+        file_menu.add_checkbutton(label="文件变化时自动重新加载", variable=self.watch_files_var, command=self._toggle_watch_files)
+        self.materialize_var = tk.BooleanVar(value=self.query_engine.materialize_tables)
+        file_menu.add_checkbutton(label="读入的数据转为原生表", variable=self.materialize_var, command=self._toggle_materialize)
+        file_menu.add_separator()
         file_menu.add_command(label="退出", command=self._on_close)
         menu_bar.add_cascade(label="文件", menu=file_menu)
         
         # 查询菜单
         query_menu = tk.Menu(menu_bar, tearoff=0)
         query_menu.add_command(label="执行查询", command=self._on_execute_query)
+        query_menu.add_command(label="取消查询", command=self._on_cancel_query)
+        query_menu.add_command(label="精确执行（不抽样）", command=self._menu_execute_exact)
+        query_menu.add_command(label="分析查询性能", command=self._menu_profile_query)
         query_menu.add_command(label="格式化SQL", command=self._menu_format_sql)
         query_menu.add_command(label="SQL格式化设置", command=self._show_sql_format_settings)
+        query_menu.add_command(label="性能设置", command=self._show_performance_settings)
+        query_menu.add_command(label="抽样设置", command=self._show_sampling_settings)
         query_menu.add_separator()
         query_menu.add_command(label="清空编辑器", command=self._menu_clear_editor)
         query_menu.add_separator()
@@ -413,6 +514,9 @@ class MainWindow:
         view_menu.add_command(label="显示/隐藏文件面板", command=self._toggle_file_panel)
         view_menu.add_command(label="显示/隐藏表结构面板", command=self._toggle_schema_panel)
         view_menu.add_command(label="显示/隐藏历史面板", command=self._toggle_history_panel)
+        view_menu.add_command(label="显示/隐藏性能分析面板", command=self._toggle_profiler_panel)
+        view_menu.add_separator()
+        view_menu.add_command(label="内存占用明细", command=self._show_memory_report)
         menu_bar.add_cascade(label="视图", menu=view_menu)
         
         # 结果菜单
@@ -438,43 +542,179 @@ class MainWindow:
         if self.history_panel_visible:
             self.history_panel_btn.config(style='Selected.TButton')
     
-    def _on_load_file(self, file_path: str):
+    def _on_load_files(self, file_paths: List[str]):
         """
-        加载文件回调函数
+        批量加载文件回调函数，在进程池中并行解析，每个文件完成后立即注册
+        
+        Args:
+            file_paths: 文件路径列表
+        """
+        # 上一批仍在加载时，新文件按单个文件依次在后台加载
+        if self.parallel_loader is not None:
+            for file_path in file_paths:
+                self._start_load_file(file_path)
+            return
+        
+        self.batch_errors = []
+        self.parallel_loader = ParallelLoader()
+        try:
+            self.parallel_loader.start(file_paths)
+        except Exception as e:
+            # 无法创建进程池时回退为逐个加载
+            print(f"并行加载失败，改为逐个加载: {str(e)}")
+            self.parallel_loader.shutdown()
+            self.parallel_loader = None
+            for file_path in file_paths:
+                self._start_load_file(file_path)
+            return
+        
+        self.status_bar.config(text=f"正在加载文件 (0/{len(file_paths)})...")
+        self.file_panel.status_label.config(text=f"正在加载 {len(file_paths)} 个文件...")
+        self.root.after(100, self._poll_parallel_loader)
+    
+    def _poll_parallel_loader(self):
+        """轮询批量加载进度，注册已完成预处理的文件"""
+        loader = self.parallel_loader
+        if loader is None:
+            return
+        
+        for file_path, prepared, error in loader.poll():
+            if error:
+                print(f"并行预处理文件失败，改为直接加载: {file_path}: {error}")
+            success, message = self._on_load_file(file_path, prepared, show_error=False)
+            if not success:
+                self.batch_errors.append(message)
+            done, total = loader.get_progress()
+            self.status_bar.config(text=f"正在加载文件 ({done}/{total}): {os.path.basename(file_path)}")
+        
+        if not loader.is_done():
+            self.root.after(100, self._poll_parallel_loader)
+            return
+        
+        # 子进程写入的缓存在全部完成后统一检查容量
+        self.parallel_loader = None
+        self.file_handler.cache.evict()
+        done, total = loader.get_progress()
+        self.status_bar.config(text=f"已加载 {total - len(self.batch_errors)}/{total} 个文件")
+        if self.batch_errors:
+            messagebox.showerror("加载失败", "\n".join(self.batch_errors))
+    
+    def _start_load_file(self, file_path: str):
+        """
+        加载文件回调函数，在后台线程中解析文件并注册到查询引擎，界面保持响应
         
         Args:
             file_path: 文件路径
         """
-        # 更新状态
+        self.load_queue.append(file_path)
         self.status_bar.config(text=f"正在加载文件: {os.path.basename(file_path)}...")
-        self.root.update()
+        if self.load_thread is None:
+            self._start_load_thread()
+            self.root.after(100, self._poll_load)
+    
+    def _start_load_thread(self):
+        """启动加载线程，依次加载队列中的文件"""
+        def run():
+            while self.load_queue:
+                file_path = self.load_queue.pop(0)
+                self.load_results.append((file_path, *self._load_and_register(file_path)))
+        
+        self.load_thread = threading.Thread(target=run, daemon=True)
+        self.load_thread.start()
+    
+    def _poll_load(self):
+        """轮询后台加载进度，已加载的文件添加到文件面板"""
+        while self.load_results:
+            file_path, success, message = self.load_results.pop(0)
+            self._show_loaded_file(file_path, success, message)
+        
+        if self.load_thread.is_alive():
+            self.root.after(100, self._poll_load)
+            return
+        if self.load_results:
+            self.root.after(0, self._poll_load)
+            return
+        # 线程退出前加入队列的文件由新线程加载
+        if self.load_queue:
+            self._start_load_thread()
+            self.root.after(100, self._poll_load)
+            return
+        self.load_thread = None
+    
+    def _on_load_file(self, file_path: str, prepared: Optional[Dict[str, Any]] = None,
+                      show_error: bool = True) -> Tuple[bool, str]:
+        """
+        在界面线程中加载文件，用于批量加载时注册已完成预处理的文件和打开会话
         
-        # 加载文件
-        success, message = self.file_handler.load_file(file_path)
+        Args:
+            file_path: 文件路径
+            prepared: 并行加载时子进程的预处理结果
+            show_error: 加载失败时是否弹出错误提示
         
+        Returns:
+            Tuple[bool, str]: (是否成功, 消息)
+        """
+        success, message = self._load_and_register(file_path, prepared)
+        self._show_loaded_file(file_path, success, message, show_error)
+        return success, message
+    
+    def _load_and_register(self, file_path: str, prepared: Optional[Dict[str, Any]] = None) -> Tuple[bool, str]:
+        """
+        加载文件并注册到查询引擎，不操作界面，可在后台线程中调用
+        
+        Args:
+            file_path: 文件路径
+            prepared: 并行加载时子进程的预处理结果
+        
+        Returns:
+            Tuple[bool, str]: (是否成功, 消息)
+        """
+        # 持有文件处理器的锁直到注册完成，与重新加载变化的文件互斥
+        with self.file_handler.lock:
+            success, message = self.file_handler.load_file(file_path, prepared)
+            if not success:
+                return False, message
+            
+            # 获取文件的所有表（Excel文件每个工作表一张表）
+            file_tables = self.file_handler.get_file_tables(file_path)
+            
+            # 只注册新增或变化的表，其他已注册的表保持不变
+            for name, source in file_tables.items():
+                registered, error = self.query_engine.register_table(name, source)
+                if not registered:
+                    # DuckDB原生读取失败时移除该文件
+                    for table_name in file_tables:
+                        self.query_engine.remove_table(table_name)
+                    self.file_handler.remove_file(file_path)
+                    return False, f"加载文件出错: {error}"
+            
+            # 原生读取的文件在此统计行数，界面线程中不再扫描数据
+            self._get_registered_file_info(file_path)
+            return True, message
+    
+    def _show_loaded_file(self, file_path: str, success: bool, message: str, show_error: bool = True):
+        """
+        将加载的文件添加到文件面板并更新状态，加载失败时显示错误
+        
+        Args:
+            file_path: 文件路径
+            success: 是否加载成功
+            message: 加载消息
+            show_error: 加载失败时是否弹出错误提示
+        """
         if success:
             # 获取文件信息
-            file_info = self.file_handler.get_loaded_files()[file_path]
-            
-            # 获取表名信息，并添加到file_info中
-            table_names = self.file_handler.get_table_names()
-            for table_name, path in table_names.items():
-                if path == file_path:
-                    file_info['table_name'] = table_name
-                    break
+            file_info = self._get_registered_file_info(file_path)
             
             # 添加到文件面板
             self.file_panel.add_file(file_path, file_info)
+            self._save_session()
             
             # 更新状态
             self.status_bar.config(text=message)
             
-            # 更新查询引擎中的数据
-            dataframes = self.file_handler.get_dataframes()
-            self.query_engine.register_dataframes(dataframes)
-            
             # 更新SQL编辑器状态
-            table_names = list(dataframes.keys())
+            table_names = list(self.file_handler.get_table_names().keys())
             if table_names:
                 example_query = f"SELECT * FROM {table_names[0]}"
                 self.sql_editor.set_status(f"可用表: {', '.join(table_names)}")
@@ -486,14 +726,137 @@ class MainWindow:
         else:
             # 显示错误消息
             self.status_bar.config(text=message)
-            messagebox.showerror("加载失败", message)
+            if show_error:
+                messagebox.showerror("加载失败", message)
+    
+    def _get_registered_file_info(self, file_path: str) -> Dict[str, Any]:
+        """
+        获取已注册到查询引擎的文件信息，补充表名和行数
+        
+        Args:
+            file_path: 文件路径
+        
+        Returns:
+            Dict[str, Any]: 文件信息
+        """
+        file_tables = self.file_handler.get_file_tables(file_path)
+        table_name = next(iter(file_tables))
+        file_info = self.file_handler.get_loaded_files()[file_path]
+        file_info['table_name'] = table_name
+        file_info['table_names'] = list(file_tables)
+        
+        # 原生读取的文件由DuckDB统计行数，延迟加载的文件不扫描数据
+        if 'tables' in file_info:
+            for table_info in file_info['tables']:
+                if table_info['rows'] is None and not file_tables[table_info['table_name']]['lazy']:
+                    table_info['rows'] = self.query_engine.get_row_count(table_info['table_name'])
+        elif file_info.get('rows') is None and not file_info.get('lazy'):
+            self.file_handler.update_file_info(file_path, rows=self.query_engine.get_row_count(table_name))
+        return file_info
+    
+    def _get_watch_interval(self) -> int:
+        """获取检查文件变化的间隔(毫秒)"""
+        return max(500, int(config_manager.get_config("loading", "watch_interval", 2000)))
+    
+    def _poll_file_changes(self):
+        """定期检查已加载的文件是否变化，变化的文件在后台线程中重新加载"""
+        try:
+            # 加载文件或上一轮重新加载未完成时等待下一次检查
+            if (self.watch_files_var.get() and self.reload_thread is None and self.parallel_loader is None
+                    and self.load_thread is None):
+                changed = self.file_handler.check_changes()
+                if changed:
+                    self._start_reload(changed)
+        except Exception as e:
+            print(f"检查文件变化时出错: {str(e)}")
+        
+        # 预览工作表或成员文件时读取了数据，刷新文件列表中的行数
+        self._refresh_deferred_files()
+        self.root.after(self._get_watch_interval(), self._poll_file_changes)
+    
+    def _refresh_deferred_files(self):
+        """读取工作表或压缩包成员的数据后，更新文件列表中的行数和列数"""
+        loaded_files = self.file_handler.get_loaded_files()
+        for file_path in self.file_handler.pop_deferred_updates():
+            if file_path in loaded_files:
+                self.file_panel.update_file(file_path, self._get_registered_file_info(file_path))
+    
+    def _start_reload(self, file_paths: List[str]):
+        """
+        在后台线程中重新加载已变化的文件并注册到查询引擎，界面保持响应
+        
+        Args:
+            file_paths: 已变化的文件路径列表
+        """
+        results = []
+        
+        def run():
+            for file_path in file_paths:
+                # 持有文件处理器的锁直到注册完成，期间移除的文件不会被重新注册
+                with self.file_handler.lock:
+                    old_tables = list(self.file_handler.get_file_tables(file_path))
+                    if not old_tables:
+                        continue
+                    success, message = self.file_handler.reload_file(file_path)
+                    if success:
+                        # 只追加了数据的原生表只插入新增的行，其他表重新注册
+                        file_tables = self.file_handler.get_file_tables(file_path)
+                        for name in old_tables:
+                            if name not in file_tables:
+                                self.query_engine.remove_table(name)
+                        for name, source in file_tables.items():
+                            registered, error = self.query_engine.register_table(name, source)
+                            if not registered:
+                                success, message = False, f"重新加载文件出错: {error}"
+                                break
+                results.append((file_path, old_tables, success, message))
+        
+        self.reload_results = results
+        self.reload_thread = threading.Thread(target=run, daemon=True)
+        self.reload_thread.start()
+        self.status_bar.config(text=f"检测到 {len(file_paths)} 个文件已变化，正在重新加载...")
+        self.root.after(100, self._poll_reload)
+    
+    def _poll_reload(self):
+        """轮询后台重新加载进度，更新文件面板和表结构"""
+        while self.reload_results:
+            file_path, old_tables, success, message = self.reload_results.pop(0)
+            self.status_bar.config(text=message)
+            if not success:
+                print(message)
+                continue
+            
+            # 文件可能在重新加载期间已被移除
+            if file_path not in self.file_handler.get_loaded_files():
+                continue
+            self.file_panel.update_file(file_path, self._get_registered_file_info(file_path))
+            self._save_session()
+            
+            # 表结构可能变化，重新读取
+            for table_name in old_tables:
+                self.tables_info.pop(table_name, None)
+            for table_name in self.file_handler.get_file_tables(file_path):
+                schema_df = self.query_engine.get_table_schema(table_name)
+                if schema_df is not None:
+                    self.tables_info[table_name] = schema_df['name'].tolist()
+            self.schema_panel.update_schema_info(self.tables_info)
+        
+        if self.reload_thread is not None and self.reload_thread.is_alive():
+            self.root.after(100, self._poll_reload)
+            return
+        if self.reload_results:
+            self.root.after(0, self._poll_reload)
+            return
+        self.reload_thread = None
     
-    def _on_execute_query(self, query: str = None):
+    def _on_execute_query(self, query: str = None, profile: bool = False, sample: Optional[bool] = None):
         """
         执行查询回调函数
         
         Args:
             query: SQL查询语句，如果为None则从编辑器获取
+            profile: 是否开启性能分析，完成后在性能分析面板中显示算子树和各阶段耗时
+            sample: 是否以抽样模式执行，为None时按编辑器工具栏中的抽样模式开关
         """
 
         # 获取查询语句
@@ -504,28 +867,101 @@ class MainWindow:
             messagebox.showinfo("提示", "请输入SQL查询语句")
             return
         
-        # 更新状态
-        self.status_bar.config(text="正在执行查询...")
-        self.root.update()
+        # 同一时间只执行一个查询
+        if self.query_task is not None:
+            messagebox.showinfo("提示", "已有查询正在执行，请等待完成或取消")
+            return
+        
+        # 在后台线程中执行查询，界面保持响应
+        if sample is None:
+            sample = self.sql_editor.sample_mode
+        self.query_task = self.query_engine.start_query(query, paged=True, profile=profile, sample=sample)
+        self.sql_editor.set_running(True)
+        self.status_bar.config(text="正在分析查询性能..." if profile else "正在执行查询...")
+        self.root.after(100, self._poll_query_task)
+    
+    def _poll_query_task(self):
+        """轮询后台查询任务，显示已用时间，完成后显示结果"""
+        task = self.query_task
+        if task is None:
+            return
+        
+        partial = task.partial_result
+        if not task.is_done():
+            status = "正在取消查询" if task.cancelled else "正在执行查询"
+            self.status_bar.config(text=f"{status}... 已用时 {task.get_elapsed():.1f} 秒")
+            # 流式结果读取到第一批数据后立即显示，之后随读取进度刷新
+            if partial is not None and not task.cancelled:
+                if task.partial_displayed:
+                    self.result_panel.refresh_result()
+                elif partial.row_count > 0:
+                    task.partial_displayed = True
+                    self.result_panel.display_result(partial)
+                    self.result_panel.refresh_result()
+            self.root.after(100, self._poll_query_task)
+            return
         
-        # 执行查询
-        success, result, message = self.query_engine.execute_query(query)
+        self.query_task = None
+        self.sql_editor.set_running(False)
+        success, result, message = task.result
+        
+        # 查询中首次读取的工作表或成员文件已统计行数
+        self._refresh_deferred_files()
+        
+        # 已显示的部分结果由结果面板保留，未显示的直接释放
+        if partial is not None and not task.partial_displayed and partial is not result:
+            partial.close()
         
         if success:
+            # 抽样查询的结果标记为近似结果
+            sample_info = self.query_engine.sample_info if task.sample else None
+            approximate = describe_sample(sample_info) if sample_info else ""
+            
             # 显示结果
-            self.result_panel.display_result(result, self.query_engine.execution_time)
+            if task.partial_displayed and result is partial:
+                self.result_panel.refresh_result(self.query_engine.execution_time, approximate=approximate)
+            else:
+                self.result_panel.display_result(result, self.query_engine.execution_time,
+                                                 cached=self.query_engine.cache_hit, approximate=approximate)
+            
+            # 显示性能分析结果
+            if task.profile_result is not None:
+                self.profiler_panel.display_profile(task.profile_result)
+                self._set_profiler_panel_visible(True)
             
             # 添加到历史记录
-            self.history_panel.add_history(query)
+            self.history_panel.add_history(task.query)
             
             # 更新状态
             self.status_bar.config(text=message)
+        elif task.cancelled:
+            self.status_bar.config(text=message)
+            if task.partial_displayed:
+                self.result_panel.refresh_result()
+                message = f"{message}，已显示读取的 {partial.row_count} 行"
+            self.result_panel.set_status(message)
         else:
             # 显示错误消息
             self.status_bar.config(text=message)
+            if task.partial_displayed:
+                self.result_panel.refresh_result()
             messagebox.showerror("查询失败", message)
             self.result_panel.set_status(f"查询失败: {message}")
     
+    def _menu_execute_exact(self):
+        """使用全部数据执行编辑器中的查询，不受抽样模式影响"""
+        self._on_execute_query(sample=False)
+    
+    def _menu_profile_query(self):
+        """开启性能分析执行编辑器中的查询"""
+        self._on_execute_query(profile=True)
+    
+    def _on_cancel_query(self):
+        """取消正在执行的查询"""
+        if self.query_task is not None and not self.query_task.is_done():
+            self.query_task.cancel()
+            self.status_bar.config(text="正在取消查询...")
+    
     def _on_history_select(self, query: str):
         """
         选择历史记录回调函数
@@ -547,6 +983,53 @@ class MainWindow:
         """菜单：清空所有文件"""
         self.file_panel._on_clear_all()
     
+    def _toggle_lazy_load(self):
+        """菜单：切换延迟加载模式，对之后添加的文件生效"""
+        lazy = self.lazy_load_var.get()
+        config_manager.set_config("loading", "lazy_load", lazy)
+        config_manager.save_config()
+        self.status_bar.config(text="已开启延迟加载，新添加的文件将在查询时读取" if lazy else "已关闭延迟加载")
+    
+    def _toggle_materialize(self):
+        """菜单：切换是否将经过pandas解析的数据写入DuckDB原生表，开启时同时转换已注册的表"""
+        materialize = self.materialize_var.get()
+        config_manager.set_config("loading", "materialize_tables", materialize)
+        config_manager.save_config()
+        if not materialize:
+            self.status_bar.config(text="已关闭转为原生表，之后读入的数据以DataFrame注册")
+            return
+        
+        table_names = self.query_engine.get_dataframe_tables()
+        errors = []
+        for table_name in table_names:
+            success, message = self._materialize_table(table_name)
+            if not success:
+                errors.append(message)
+        self.status_bar.config(text=f"已开启转为原生表，已转换 {len(table_names) - len(errors)} 个表")
+        if errors:
+            messagebox.showerror("转换失败", "\n".join(errors))
+    
+    def _materialize_table(self, table_name: str) -> Tuple[bool, str]:
+        """
+        将以DataFrame注册的表转换为DuckDB原生表，并释放文件处理器中的DataFrame
+        
+        Args:
+            table_name: 表名
+        
+        Returns:
+            Tuple[bool, str]: (是否成功, 成功/错误信息)
+        """
+        file_path = self.file_handler.get_table_names().get(table_name)
+        source = self.file_handler.get_file_tables(file_path).get(table_name) if file_path else None
+        return self.query_engine.materialize_table(table_name, source)
+    
+    def _toggle_watch_files(self):
+        """菜单：切换是否监视文件变化并自动重新加载"""
+        watch = self.watch_files_var.get()
+        config_manager.set_config("loading", "watch_files", watch)
+        config_manager.save_config()
+        self.status_bar.config(text="文件变化时将自动重新加载" if watch else "已关闭文件变化监视")
+    
     def remove_file(self, file_path: str):
         """
         从文件处理器中移除文件
@@ -555,25 +1038,25 @@ class MainWindow:
             file_path: 要移除的文件路径
         """
         # 获取要移除的表名
-        table_to_remove = None
-        table_names = self.file_handler.get_table_names()
-        for table_name, path in table_names.items():
-            if path == file_path:
-                table_to_remove = table_name
-                break
+        tables_to_remove = list(self.file_handler.get_file_tables(file_path))
         
         # 从文件处理器中移除
         self.file_handler.remove_file(file_path)
         
         # 从查询引擎中移除表
-        if table_to_remove:
+        schema_changed = False
+        for table_to_remove in tables_to_remove:
             self.query_engine.remove_table(table_to_remove)
             
             # 从表结构信息缓存中移除
             if table_to_remove in self.tables_info:
                 del self.tables_info[table_to_remove]
-                # 更新表结构面板
-                self.schema_panel.update_schema_info(self.tables_info)
+                schema_changed = True
+        
+        # 更新表结构面板
+        if schema_changed:
+            self.schema_panel.update_schema_info(self.tables_info)
+        self._save_session()
         
         # 更新SQL编辑器状态
         remaining_tables = list(self.file_handler.get_table_names().keys())
@@ -582,6 +1065,185 @@ class MainWindow:
         else:
             self.sql_editor.set_status("无可用表")
     
+    def _save_session(self):
+        """将已加载文件的状态保存到会话数据库，未打开会话时不做任何操作"""
+        try:
+            self.query_engine.save_session_files(self.file_handler.get_session_state())
+        except Exception as e:
+            print(f"保存会话失败: {str(e)}")
+    
+    def _check_session_idle(self) -> bool:
+        """
+        检查是否可以切换会话，查询、加载或重新加载文件时不能切换
+        
+        Returns:
+            bool: 是否可以切换
+        """
+        if (self.query_task is not None or self.parallel_loader is not None or self.reload_thread is not None
+                or self.load_thread is not None):
+            messagebox.showinfo("提示", "请等待查询或文件加载完成后再操作会话")
+            return False
+        return True
+    
+    def _restore_last_session(self):
+        """启动时打开上次使用的会话"""
+        database = config_manager.get_config("session", "path", "")
+        if not database:
+            return
+        if not os.path.exists(database):
+            self._set_session_path(None)
+            return
+        self._open_session(database)
+    
+    def _set_session_path(self, database: Optional[str]):
+        """
+        记录当前会话，下次启动时自动打开
+        
+        Args:
+            database: 会话数据库文件路径，为None时表示未打开会话
+        """
+        config_manager.set_config("session", "path", database or "")
+        config_manager.save_config()
+        title = "QueryX - SQL查询工具"
+        self.root.title(f"{title} [{os.path.basename(database)}]" if database else title)
+    
+    def _clear_files(self):
+        """清空文件列表和表结构，不提示确认"""
+        for file_path in list(self.file_handler.get_loaded_files()):
+            self.file_panel._remove_file(file_path)
+        self.tables_info = {}
+        self.schema_panel.update_schema_info(self.tables_info)
+    
+    def _open_session(self, database: Optional[str]):
+        """
+        打开会话：恢复会话中保存的文件和表，文件已变化时重新加载
+        
+        Args:
+            database: 会话数据库文件路径，为None时关闭会话
+        """
+        self.status_bar.config(text="正在打开会话...")
+        self.root.update()
+        self.result_panel._clear_result()
+        
+        # 先关闭当前会话再清空文件列表，当前会话文件中的表保持不变
+        self.query_engine.open_session(None)
+        self._clear_files()
+        
+        success, message = self.query_engine.open_session(database)
+        if not success:
+            self.query_engine.open_session(None)
+            self._set_session_path(None)
+            self.status_bar.config(text=message)
+            messagebox.showerror("打开会话失败", message)
+            return
+        
+        errors = []
+        for file_path, state in self.query_engine.load_session_files().items():
+            if not self.file_handler.restore_file(file_path, state, self.query_engine.table_versions):
+                # 文件已变化或已删除，重新加载
+                success, error = self._on_load_file(file_path, show_error=False)
+                if not success:
+                    errors.append(error)
+                continue
+            
+            # 会话中已有的表不会重复注册，尚未读取的工作表等待首次查询
+            for name, source in self.file_handler.get_file_tables(file_path).items():
+                registered, error = self.query_engine.register_table(name, source)
+                if not registered:
+                    errors.append(f"{name}: {error}")
+            self.file_panel.add_file(file_path, self._get_registered_file_info(file_path))
+        
+        # 移除会话中不再属于任何文件的表
+        table_names = self.file_handler.get_table_names()
+        for table_name in list(self.query_engine.registered_tables):
+            if table_name not in table_names:
+                self.query_engine.remove_table(table_name)
+        
+        self._save_session()
+        self._set_session_path(database)
+        self._update_table_status()
+        self.status_bar.config(text=message)
+        if errors:
+            messagebox.showerror("加载失败", "\n".join(errors))
+    
+    def _update_table_status(self):
+        """更新SQL编辑器中的可用表提示"""
+        table_names = list(self.file_handler.get_table_names().keys())
+        self.sql_editor.set_status(f"可用表: {', '.join(table_names)}" if table_names else "无可用表")
+    
+    def _menu_new_session(self):
+        """菜单：新建会话，当前已加载的表保存到新的会话文件"""
+        if not self._check_session_idle():
+            return
+        database = filedialog.asksaveasfilename(
+            title="新建会话",
+            defaultextension=".duckdb",
+            filetypes=[("会话文件", "*.duckdb"), ("所有文件", "*.*")]
+        )
+        if not database:
+            return
+        if self.query_engine.database and os.path.abspath(database) == os.path.abspath(self.query_engine.database):
+            messagebox.showinfo("提示", "该文件是当前打开的会话")
+            return
+        
+        self.status_bar.config(text="正在保存会话...")
+        self.root.update()
+        self.result_panel._clear_result()
+        success, message = self.query_engine.create_session(database, self.file_handler.get_session_state())
+        
+        # 文件上的视图和尚未读取的表重新注册到当前连接
+        errors = []
+        for file_path in list(self.file_handler.get_loaded_files()):
+            for name, source in self.file_handler.get_file_tables(file_path).items():
+                registered, error = self.query_engine.register_table(name, source)
+                if not registered:
+                    errors.append(f"{name}: {error}")
+        
+        self.status_bar.config(text=message)
+        if not success:
+            messagebox.showerror("新建会话失败", message)
+            return
+        self._save_session()
+        self._set_session_path(database)
+        if errors:
+            messagebox.showerror("加载失败", "\n".join(errors))
+    
+    def _menu_open_session(self):
+        """菜单：打开会话"""
+        if not self._check_session_idle():
+            return
+        database = filedialog.askopenfilename(
+            title="打开会话",
+            filetypes=[("会话文件", "*.duckdb"), ("所有文件", "*.*")]
+        )
+        if database:
+            self._open_session(database)
+    
+    def _menu_compact_session(self):
+        """菜单：压缩会话文件，回收删除和替换表后留下的空间"""
+        if self.query_engine.database is None:
+            messagebox.showinfo("提示", "当前没有打开会话")
+            return
+        if not self._check_session_idle():
+            return
+        
+        self.status_bar.config(text="正在压缩会话...")
+        self.root.update()
+        self.result_panel._clear_result()
+        success, message = self.query_engine.compact_session()
+        self.status_bar.config(text=message)
+        if not success:
+            messagebox.showerror("压缩会话失败", message)
+    
+    def _menu_close_session(self):
+        """菜单：关闭会话，清空已加载的文件，之后使用内存数据库"""
+        if self.query_engine.database is None:
+            messagebox.showinfo("提示", "当前没有打开会话")
+            return
+        if not self._check_session_idle():
+            return
+        self._open_session(None)
+    
     def _menu_clear_editor(self):
         """菜单：清空编辑器"""
         self.sql_editor._on_clear()
@@ -600,6 +1262,48 @@ class MainWindow:
         # 更新状态栏
         self.status_bar.config(text="SQL格式化设置已更新")
     
+    def _show_performance_settings(self):
+        """菜单：显示性能设置对话框"""
+        PerformanceSettingsDialog(self.root, on_save_callback=self._on_performance_settings_saved)
+    
+    def _show_sampling_settings(self):
+        """菜单：显示抽样设置对话框"""
+        SamplingSettingsDialog(self.root, on_save_callback=self._on_sampling_settings_saved)
+    
+    def _on_sampling_settings_saved(self):
+        """抽样设置保存后同步编辑器工具栏中的抽样比例"""
+        self.sql_editor.set_sample_percent(config_manager.get_sampling_options().get("percent", 1))
+        self.status_bar.config(text="抽样设置已更新")
+    
+    def _on_performance_settings_saved(self):
+        """性能设置保存后立即应用到查询引擎"""
+        success, message = self.query_engine.apply_settings()
+        self.status_bar.config(text=message)
+        if not success:
+            messagebox.showerror("性能设置", message)
+        self._show_memory_usage()
+    
+    def _update_memory_usage(self):
+        """定期刷新状态栏中的内存占用"""
+        self._show_memory_usage()
+        self.root.after(1000, self._update_memory_usage)
+    
+    def _show_memory_usage(self):
+        """在状态栏中显示DuckDB当前的内存占用和上限，数据换出到磁盘时一并显示"""
+        usage = self.query_engine.get_memory_usage()
+        if usage is None:
+            return
+        memory, temporary, limit = usage
+        text = f"内存: {format_file_size(memory)} / {limit}"
+        if temporary:
+            text += f"，磁盘: {format_file_size(temporary)}"
+        self.memory_label.config(text=text)
+    
+    def _show_memory_report(self):
+        """显示内存占用对话框，按表和查询结果列出存储方式和占用"""
+        from app.gui.dialogs.memory_dialog import MemoryDialog
+        MemoryDialog(self.root, lambda: build_memory_report(self.query_engine, self.result_panel.get_results()))
+    
     def _menu_clear_history(self):
         """菜单：清空历史记录"""
         self.history_panel._on_clear_history()
@@ -631,7 +1335,15 @@ class MainWindow:
     def _on_close(self):
         """关闭窗口"""
         if messagebox.askyesno("确认退出", "确定要退出程序吗？"):
+            # 中断仍在执行的查询
+            if self.query_task is not None:
+                self.query_task.cancel()
+            # 取消尚未完成的批量加载
+            if self.parallel_loader is not None:
+                self.parallel_loader.shutdown()
             self.root.destroy()
+            # 会话数据库中的数据写入文件
+            self.query_engine.close()
     
     def start(self):
         """启动应用程序"""
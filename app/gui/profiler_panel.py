@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+性能分析面板
+显示查询各阶段的耗时和DuckDB的算子树（每个算子的耗时、行数和输出大小）
+"""
+
+import tkinter as tk
+from tkinter import ttk
+from typing import Dict, List, Optional, Any
+
+from app.core.query_profiler import PROFILE_PHASES
+from app.utils.helpers import format_file_size
+from app.utils.ui_helpers import scrollbar_autohide
+
+# 各阶段在耗时条中的颜色，与PROFILE_PHASES的顺序对应
+PHASE_COLORS = ['#8FB8DE', '#E8A87C', '#85C88A', '#C3A6D9']
+
+
+class ProfilerPanel(ttk.Frame):
+    """性能分析面板，显示阶段耗时条和算子树"""
+    
+    def __init__(self, parent):
+        """
+        初始化性能分析面板
+        
+        Args:
+            parent: 父容器
+        """
+        super().__init__(parent)
+        self.parent = parent
+        self.profile = None  # 当前显示的性能分析结果
+        
+        self._create_widgets()
+    
+    def _create_widgets(self):
+        """创建组件"""
+        # 状态栏 - 在方法开头创建，确保它始终在底部显示
+        self.status_label = ttk.Label(self, text="执行\"查询 > 分析查询性能\"后在此显示结果", anchor=tk.W)
+        self.status_label.pack(side=tk.BOTTOM, fill=tk.X, padx=5, pady=2)
+        
+        # 阶段耗时条和图例
+        phase_frame = ttk.Frame(self)
+        phase_frame.pack(side=tk.TOP, fill=tk.X, padx=5, pady=(5, 0))
+        
+        self.phase_canvas = tk.Canvas(phase_frame, height=16, highlightthickness=0, background="#F0F0F0")
+        self.phase_canvas.pack(side=tk.TOP, fill=tk.X)
+        self.phase_canvas.bind("<Configure>", lambda e: self._draw_phases())
+        
+        legend_frame = ttk.Frame(phase_frame)
+        legend_frame.pack(side=tk.TOP, fill=tk.X, pady=2)
+        self.phase_labels = {}
+        for phase, color in zip(PROFILE_PHASES, PHASE_COLORS):
+            tk.Label(legend_frame, width=2, background=color).pack(side=tk.LEFT, padx=(5, 2))
+            label = ttk.Label(legend_frame, text=f"{PROFILE_PHASES[phase]}: -")
+            label.pack(side=tk.LEFT, padx=(0, 10))
+            self.phase_labels[phase] = label
+        
+        # 算子树
+        tree_frame = ttk.Frame(self)
+        tree_frame.pack(side=tk.TOP, fill=tk.BOTH, expand=True, padx=5, pady=5)
+        
+        columns = ("time", "percent", "rows", "size", "info")
+        self.operator_tree = ttk.Treeview(tree_frame, columns=columns, show="tree headings")
+        self.operator_tree.heading("#0", text="算子")
+        self.operator_tree.heading("time", text="耗时(ms)")
+        self.operator_tree.heading("percent", text="占比")
+        self.operator_tree.heading("rows", text="行数")
+        self.operator_tree.heading("size", text="输出大小")
+        self.operator_tree.heading("info", text="详细信息")
+        self.operator_tree.column("#0", width=220, stretch=False)
+        self.operator_tree.column("time", width=80, anchor=tk.E, stretch=False)
+        self.operator_tree.column("percent", width=60, anchor=tk.E, stretch=False)
+        self.operator_tree.column("rows", width=90, anchor=tk.E, stretch=False)
+        self.operator_tree.column("size", width=90, anchor=tk.E, stretch=False)
+        self.operator_tree.column("info", width=300)
+        # 耗时最多的算子高亮显示
+        self.operator_tree.tag_configure("hot", background="#FDE2D0")
+        
+        yscrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.operator_tree.yview)
+        xscrollbar = ttk.Scrollbar(tree_frame, orient=tk.HORIZONTAL, command=self.operator_tree.xview)
+        self.operator_tree.configure(yscrollcommand=scrollbar_autohide(yscrollbar, 'grid'),
+                                     xscrollcommand=scrollbar_autohide(xscrollbar, 'grid'))
+        
+        self.operator_tree.grid(row=0, column=0, sticky="nsew")
+        yscrollbar.grid(row=0, column=1, sticky="ns")
+        xscrollbar.grid(row=1, column=0, sticky="ew")
+        tree_frame.rowconfigure(0, weight=1)
+        tree_frame.columnconfigure(0, weight=1)
+    
+    def display_profile(self, profile: Dict[str, Any]):
+        """
+        显示性能分析结果
+        
+        Args:
+            profile: 性能分析结果，见query_profiler.profile_query
+        """
+        self.profile = profile
+        
+        total = profile['total'] or 0
+        for phase, label in self.phase_labels.items():
+            seconds = profile['phases'].get(phase)
+            if seconds is None:
+                label.config(text=f"{PROFILE_PHASES[phase]}: -")
+            else:
+                percent = seconds / total * 100 if total else 0
+                label.config(text=f"{PROFILE_PHASES[phase]}: {seconds * 1000:.2f}ms ({percent:.0f}%)")
+        self._draw_phases()
+        
+        # 算子耗时占比按所有算子的耗时之和计算
+        self.operator_tree.delete(*self.operator_tree.get_children())
+        operator_total = self._sum_timing(profile['operators'])
+        hottest = self._find_hottest(profile['operators'])
+        self._add_operators("", profile['operators'], operator_total, hottest)
+        
+        summary = [f"总耗时: {total * 1000:.2f}ms"]
+        if profile.get('cpu_time') is not None:
+            summary.append(f"CPU时间: {float(profile['cpu_time']) * 1000:.2f}ms")
+        if profile.get('peak_memory'):
+            summary.append(f"内存峰值: {format_file_size(int(profile['peak_memory']))}")
+        if profile.get('rows') is not None:
+            summary.append(f"返回 {profile['rows']} 行")
+        self.status_label.config(text="，".join(summary))
+    
+    def _draw_phases(self):
+        """按各阶段的耗时比例绘制耗时条"""
+        self.phase_canvas.delete("all")
+        if self.profile is None:
+            return
+        
+        width = self.phase_canvas.winfo_width()
+        height = self.phase_canvas.winfo_height()
+        total = sum(seconds or 0 for seconds in self.profile['phases'].values())
+        if total <= 0 or width <= 1:
+            return
+        
+        x = 0.0
+        for phase, color in zip(PROFILE_PHASES, PHASE_COLORS):
+            segment = (self.profile['phases'].get(phase) or 0) / total * width
+            if segment > 0:
+                self.phase_canvas.create_rectangle(x, 0, x + segment, height, fill=color, outline="")
+            x += segment
+    
+    def _sum_timing(self, operators: List[Dict[str, Any]]) -> float:
+        """计算算子树中所有算子的耗时之和(秒)"""
+        return sum(operator['timing'] + self._sum_timing(operator['children']) for operator in operators)
+    
+    def _find_hottest(self, operators: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """查找算子树中耗时最多的算子，没有算子时返回None"""
+        hottest = None
+        stack = list(operators)
+        while stack:
+            operator = stack.pop()
+            if hottest is None or operator['timing'] > hottest['timing']:
+                hottest = operator
+            stack.extend(operator['children'])
+        return hottest
+    
+    def _add_operators(self, parent: str, operators: List[Dict[str, Any]], operator_total: float,
+                       hottest: Optional[Dict[str, Any]]):
+        """
+        递归添加算子节点
+        
+        Args:
+            parent: 父节点ID
+            operators: 算子列表
+            operator_total: 所有算子的耗时之和(秒)
+            hottest: 耗时最多的算子
+        """
+        for operator in operators:
+            percent = operator['timing'] / operator_total * 100 if operator_total else 0
+            size = operator.get('size')
+            node = self.operator_tree.insert(
+                parent, "end",
+                text=operator['name'],
+                values=(
+                    f"{operator['timing'] * 1000:.3f}",
+                    f"{percent:.1f}%",
+                    f"{operator['cardinality']:,}",
+                    format_file_size(int(size)) if size is not None else "-",
+                    operator['extra_info']
+                ),
+                open=True,
+                tags=("hot",) if operator is hottest and operator['timing'] > 0 else ()
+            )
+            self._add_operators(node, operator['children'], operator_total, hottest)
+    
+    def clear(self):
+        """清空面板"""
+        self.profile = None
+        self.operator_tree.delete(*self.operator_tree.get_children())
+        self.phase_canvas.delete("all")
+        for phase, label in self.phase_labels.items():
+            label.config(text=f"{PROFILE_PHASES[phase]}: -")
+        self.status_label.config(text="")
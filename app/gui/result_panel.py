@@ -13,7 +13,8 @@ import pandas as pd
 from typing import List, Dict, Callable, Optional, Any
 
 from app.core.exporter import Exporter
-from app.utils.ui_helpers import scrollbar_autohide
+from app.core.result_set import ResultSet, DataFrameResult
+from app.gui.virtual_grid import VirtualGrid
 
 
 class ResultPanel(ttk.Frame):
@@ -29,7 +30,7 @@ class ResultPanel(ttk.Frame):
         super().__init__(parent)
         self.parent = parent
         
-        # 结果数据
+        # 结果数据（ResultSet，分页结果只在需要时从DuckDB读取当前页）
         self.result_data = None  # 完整结果数据
         self.filtered_data = None  # 过滤后的数据
         self.current_page = 1    # 当前页码
@@ -153,34 +154,15 @@ class ResultPanel(ttk.Frame):
         self.table_frame = ttk.Frame(self.center_area)
         self.table_frame.pack(side=tk.TOP, fill=tk.BOTH, expand=True, padx=5, pady=(0, 5))  # 调整上部边距
         
-        # 创建Treeview显示结果
-        self.result_tree = ttk.Treeview(
-            self.table_frame,
-            show="headings",
-            selectmode="extended"
-        )
-        
-        # 添加水平和垂直滚动条，使用自定义滚动条样式
+        # 滚动条样式
         style = ttk.Style()
-        # 配置水平滚动条只在需要时显示
         style.configure("Horizontal.TScrollbar", gripcount=0)
         style.configure("Vertical.TScrollbar", gripcount=0)
         
-        h_scrollbar = ttk.Scrollbar(self.table_frame, orient=tk.HORIZONTAL, command=self.result_tree.xview, style="Horizontal.TScrollbar")
-        v_scrollbar = ttk.Scrollbar(self.table_frame, orient=tk.VERTICAL, command=self.result_tree.yview, style="Vertical.TScrollbar")
-        
-        # 修改滚动条配置，设置当不需要滚动时隐藏滚动条
-        self.result_tree.configure(xscrollcommand=scrollbar_autohide(h_scrollbar, 'grid'), 
-                                   yscrollcommand=scrollbar_autohide(v_scrollbar, 'grid'))
-        
-        # 放置组件 - 使用grid布局确保滚动条在同一水平高度
-        self.result_tree.grid(row=0, column=0, sticky='nsew')
-        h_scrollbar.grid(row=1, column=0, sticky='ew')
-        v_scrollbar.grid(row=0, column=1, sticky='ns')
-        
-        # 配置表格框架的行列权重，使其可以正确调整大小
-        self.table_frame.grid_rowconfigure(0, weight=1)
-        self.table_frame.grid_columnconfigure(0, weight=1)
+        # 虚拟滚动表格显示结果，只渲染可见行
+        self.result_grid = VirtualGrid(self.table_frame, heading_command=self._on_heading_click)
+        self.result_grid.pack(fill=tk.BOTH, expand=True)
+        self.result_tree = self.result_grid.tree
         
         # === 底部区域 ===
         # 状态栏
@@ -256,25 +238,38 @@ class ResultPanel(ttk.Frame):
         # 强制一次布局更新
         self.after(500, self.ensure_bottom_area_visible)
     
-    def display_result(self, data: pd.DataFrame, query_time: float = 0):
+    def display_result(self, data: Any, query_time: float = 0, cached: bool = False, approximate: str = ""):
         """
         显示查询结果
         
         Args:
-            data: 结果数据框
+            data: 结果数据框或结果集(ResultSet)
             query_time: 查询时间(毫秒)
+            cached: 结果是否来自结果缓存
+            approximate: 抽样查询的说明，非空时结果标记为近似结果
         """
-        if data is None or data.empty:
-            self.status_bar.config(text="查询返回空结果")
+        if isinstance(data, pd.DataFrame):
+            data = DataFrameResult(data)
+        
+        if data is None or data.row_count == 0:
             self._clear_result()
+            if data is not None:
+                data.close()
+            self.status_bar.config(text="查询返回空结果")
             return
         
+        # 释放上一次的结果
+        self._release_result()
+        
+        # 新结果重新创建列并计算列宽
+        self.result_grid.reset_columns()
+        
         # 存储结果数据
         self.result_data = data
-        self.filtered_data = data.copy()  # 初始时过滤后的数据与原始数据相同
+        self.filtered_data = data  # 初始时过滤后的数据与原始数据相同
         
         # 计算分页信息
-        total_rows = len(self.filtered_data)
+        total_rows = self.filtered_data.row_count
         self.total_pages = (total_rows + self.page_size - 1) // self.page_size
         self.current_page = 1
         
@@ -285,7 +280,10 @@ class ResultPanel(ttk.Frame):
         self._update_table()
         
         # 更新状态栏
-        self.status_bar.config(text=f"查询完成，耗时: {query_time:.2f}ms，返回 {total_rows} 行数据")
+        cache_text = "（缓存命中）" if cached else ""
+        approximate_text = f"；{approximate}" if approximate else ""
+        self.status_bar.config(text=f"查询完成{cache_text}，耗时: {query_time:.2f}ms，返回 {total_rows} 行数据"
+                                    f"{approximate_text}")
         
         # 启用导出按钮和重置按钮
         self.export_btn.config(state=tk.NORMAL)
@@ -298,62 +296,70 @@ class ResultPanel(ttk.Frame):
         # 延迟一点确保底部区域可见
         self.after(100, self.ensure_bottom_area_visible)
     
-    def _update_table(self):
-        """更新结果表格"""
-        if self.result_data is None or self.filtered_data is None:
+    def refresh_result(self, query_time: Optional[float] = None, approximate: str = ""):
+        """
+        刷新正在填充的流式结果，更新总行数和分页，当前页未满时重新读取
+        
+        Args:
+            query_time: 查询时间(毫秒)，查询完成时提供
+            approximate: 抽样查询的说明，非空时结果标记为近似结果
+        """
+        if self.result_data is None:
             return
         
-        # 清空表格
-        for col in self.result_tree["columns"]:
-            self.result_tree.heading(col, text="")
+        total_rows = self.result_data.row_count
+        if query_time is not None:
+            approximate_text = f"；{approximate}" if approximate else ""
+            self.status_bar.config(text=f"查询完成，耗时: {query_time:.2f}ms，返回 {total_rows} 行数据"
+                                        f"{approximate_text}")
+        else:
+            self.status_bar.config(text=f"正在读取结果，已读取 {total_rows} 行数据...")
         
-        self.result_tree.delete(*self.result_tree.get_children())
+        # 过滤和排序基于应用时已读取的数据，不随后台读取更新，读取完成后重新应用
+        if self.filtered_data is not self.result_data:
+            if query_time is not None:
+                self._apply_filter_and_sort()
+            return
         
-        # 计算当前页数据范围
-        start_idx = (self.current_page - 1) * self.page_size
-        end_idx = min(start_idx + self.page_size, len(self.filtered_data))
+        self.total_pages = (total_rows + self.page_size - 1) // self.page_size
+        if self.result_grid.row_count < self.page_size and self.current_page <= self.total_pages:
+            self._update_table(keep_position=True)
+        self._update_pagination_controls()
+    
+    def _update_table(self, keep_position: bool = False):
+        """
+        更新结果表格，当前页的数据由虚拟表格按可见窗口读取
         
-        # 获取当前页数据
-        page_data = self.filtered_data.iloc[start_idx:end_idx]
+        Args:
+            keep_position: 是否保持表格的滚动位置
+        """
+        if self.result_data is None or self.filtered_data is None:
+            return
         
-        # 设置列，添加序号列
-        data_columns = list(page_data.columns)
-        display_columns = ["#"] + data_columns
-        self.result_tree["columns"] = display_columns
+        # 计算当前页数据范围
+        start_idx = (self.current_page - 1) * self.page_size
+        page_rows = max(0, min(self.page_size, self.filtered_data.row_count - start_idx))
+        data = self.filtered_data
         
-        # 设置列标题
-        for i, col in enumerate(display_columns):
-            if i == 0:  # 序号列
-                self.result_tree.heading(col, text="#", anchor=tk.CENTER)
-                self.result_tree.column(col, width=40, anchor=tk.CENTER, stretch=tk.NO)
-            else:
-                col_name = str(col)
-                # 如果是排序列，添加指示箭头
-                if self.sort_column == col:
-                    if self.sort_ascending:
-                        col_name += " ▲"  # 升序
-                    else:
-                        col_name += " ▼"  # 降序
-                self.result_tree.heading(col, text=col_name, anchor=tk.CENTER)
-                # 为列标题添加点击事件，用于排序
-                self.result_tree.heading(col, command=lambda c=col: self._on_heading_click(c))
-                # 根据内容设置列宽
-                max_width = max(
-                    len(str(col)),
-                    page_data[data_columns[i-1]].astype(str).str.len().max() if len(page_data) > 0 else 0
-                )
-                self.result_tree.column(col, width=min(max_width * 10, 300), anchor=tk.CENTER)
+        # 设置表格数据源，只读取可见的行
+        try:
+            self.result_grid.set_data(
+                data.columns,
+                page_rows,
+                lambda offset, limit: data.fetch_page(start_idx + offset, limit),
+                row_number_start=start_idx + 1,
+                keep_position=keep_position
+            )
+        except Exception as e:
+            self.status_bar.config(text=f"读取结果失败: {str(e)}")
+            return
         
-        # 添加数据行
-        for i, (_, row) in enumerate(page_data.iterrows(), 1):
-            # 计算实际行号（考虑分页）
-            row_num = start_idx + i
-            values = [row_num] + [str(row[col]) for col in data_columns]
-            self.result_tree.insert("", tk.END, values=values)
+        # 排序列标题显示指示箭头
+        self.result_grid.set_sort_indicator(self.sort_column, self.sort_ascending)
         
         # 更新页码信息
         self.page_info.config(
-            text=f"第 {self.current_page} 页，共 {self.total_pages} 页，总计 {len(self.filtered_data)} 行 (原始数据: {len(self.result_data)} 行)"
+            text=f"第 {self.current_page} 页，共 {self.total_pages} 页，总计 {self.filtered_data.row_count} 行 (原始数据: {self.result_data.row_count} 行)"
         )
     
     def _update_pagination_controls(self):
@@ -371,11 +377,15 @@ class ResultPanel(ttk.Frame):
             self.show_all_btn.config(state=tk.NORMAL)
             
         # 更新页码信息
-        if self.filtered_data is not None and not self.filtered_data.empty:
-            total_rows = len(self.filtered_data)
+        if self.filtered_data is not None and self.filtered_data.row_count > 0:
+            total_rows = self.filtered_data.row_count
             start_idx = (self.current_page - 1) * self.page_size + 1
             end_idx = min(self.current_page * self.page_size, total_rows)
-            self.page_info.config(text=f"第 {start_idx}-{end_idx} 行 / 共 {total_rows} 行 (第 {self.current_page}/{self.total_pages} 页)")
+            page_text = f"第 {start_idx}-{end_idx} 行 / 共 {total_rows} 行 (第 {self.current_page}/{self.total_pages} 页)"
+            # 流式结果尚未读取完成时总行数仍在增长
+            if getattr(self.filtered_data, 'loading', False):
+                page_text += " (加载中…)"
+            self.page_info.config(text=page_text)
         else:
             self.page_info.config(text="无数据")
     
@@ -409,20 +419,13 @@ class ResultPanel(ttk.Frame):
     
     def _on_show_all(self):
         """显示所有数据"""
-        if self.filtered_data is None or len(self.filtered_data) <= self.page_size:
+        if self.filtered_data is None or self.filtered_data.row_count <= self.page_size:
             return
         
-        # 如果数据量很大，给出警告
-        if len(self.filtered_data) > 1000:
-            if not messagebox.askyesno(
-                "警告",
-                f"数据量较大({len(self.filtered_data)}行)，显示全部可能会导致界面卡顿。是否继续？"
-            ):
-                return
-        
+        # 虚拟表格只渲染可见行，数据量大时也无需警告
         # 临时设置页大小为数据总量
         old_page_size = self.page_size
-        self.page_size = len(self.filtered_data)
+        self.page_size = self.filtered_data.row_count
         self.current_page = 1
         self.total_pages = 1
         
@@ -432,7 +435,7 @@ class ResultPanel(ttk.Frame):
         
         # 恢复原页大小
         self.page_size = old_page_size
-        self.total_pages = (len(self.filtered_data) + self.page_size - 1) // self.page_size
+        self.total_pages = (self.filtered_data.row_count + self.page_size - 1) // self.page_size
     
     def _on_page_size_change(self, event):
         """页大小改变事件"""
@@ -443,7 +446,7 @@ class ResultPanel(ttk.Frame):
                 
                 # 重新计算分页信息
                 if self.filtered_data is not None:
-                    self.total_pages = (len(self.filtered_data) + self.page_size - 1) // self.page_size
+                    self.total_pages = (self.filtered_data.row_count + self.page_size - 1) // self.page_size
                     self.current_page = min(self.current_page, self.total_pages)
                     self._update_table()
                     self._update_pagination_controls()
@@ -452,28 +455,29 @@ class ResultPanel(ttk.Frame):
     
     def _on_export(self):
         """导出结果"""
-        if self.result_data is None or self.result_data.empty:
+        if self.result_data is None or self.result_data.row_count == 0:
             messagebox.showinfo("提示", "没有可导出的数据")
             return
         
         # 确定导出数据源
-        data_source = self.filtered_data if len(self.filtered_data) != len(self.result_data) else self.result_data
+        data_source = self.filtered_data if self.filtered_data.row_count != self.result_data.row_count else self.result_data
+        
+        # 获取导出格式
+        export_format = self.export_format.get()
         
         # 确定导出数据范围
+        export_data = None
         if self.export_scope.get() == "current":
             # 导出当前页
             start_idx = (self.current_page - 1) * self.page_size
-            end_idx = min(start_idx + self.page_size, len(data_source))
-            export_data = data_source.iloc[start_idx:end_idx]
-        else:
-            # 导出全部数据
-            export_data = data_source
+            export_data = data_source.fetch_page(start_idx, self.page_size)
+        elif export_format == "xlsx":
+            # 导出全部数据，Excel需要完整的数据框
+            export_data = data_source.to_dataframe()
+        # CSV和JSON导出全部数据时分批读取写入，不构建完整的数据框
         
         # 注意：导出时不包含序号列，直接使用原始数据
         
-        # 获取导出格式
-        export_format = self.export_format.get()
-        
         # 根据选择的格式设置文件类型过滤器
         filetypes = []
         defaultextension = f".{export_format}"
@@ -502,9 +506,15 @@ class ResultPanel(ttk.Frame):
         if export_format == "xlsx":
             success, message = Exporter.export_to_excel(export_data, file_path)
         elif export_format == "csv":
-            success, message = Exporter.export_to_csv(export_data, file_path)
+            if export_data is not None:
+                success, message = Exporter.export_to_csv(export_data, file_path)
+            else:
+                success, message = Exporter.export_batches_to_csv(data_source.iter_batches(), file_path)
         elif export_format == "json":
-            success, message = Exporter.export_to_json(export_data, file_path)
+            if export_data is not None:
+                success, message = Exporter.export_to_json(export_data, file_path)
+            else:
+                success, message = Exporter.export_batches_to_json(data_source.iter_batches(), file_path)
         
         # 显示结果
         if success:
@@ -517,15 +527,10 @@ class ResultPanel(ttk.Frame):
     def _clear_result(self):
         """清空结果"""
         # 清空表格
-        for col in self.result_tree["columns"]:
-            self.result_tree.heading(col, text="")
-        
-        self.result_tree["columns"] = []
-        self.result_tree.delete(*self.result_tree.get_children())
+        self.result_grid.clear()
         
         # 重置分页信息
-        self.result_data = None
-        self.filtered_data = None
+        self._release_result()
         self.current_page = 1
         self.total_pages = 0
         self.page_info.config(text="无数据")
@@ -561,9 +566,32 @@ class ResultPanel(ttk.Frame):
         """
         self.status_bar.config(text=message)
     
+    def get_results(self) -> Dict[str, ResultSet]:
+        """
+        获取结果面板持有的结果集，用于统计内存占用
+        
+        Returns:
+            Dict[str, ResultSet]: {名称: 结果集}，过滤排序结果与原结果相同时只包含原结果
+        """
+        results = {}
+        if self.result_data is not None:
+            results["当前结果"] = self.result_data
+        if self.filtered_data is not None and self.filtered_data is not self.result_data:
+            results["过滤排序结果"] = self.filtered_data
+        return results
+    
+    def _release_result(self):
+        """释放当前结果占用的资源（分页结果的DuckDB临时表）"""
+        if self.filtered_data is not None and self.filtered_data is not self.result_data:
+            self.filtered_data.close()
+        if self.result_data is not None:
+            self.result_data.close()
+        self.result_data = None
+        self.filtered_data = None
+    
     def _update_filter_sort_controls(self):
         """更新过滤和排序控件"""
-        if self.result_data is None or self.result_data.empty:
+        if self.result_data is None or self.result_data.row_count == 0:
             return
         
         # 获取所有列名（不包括序号列）
@@ -661,47 +689,38 @@ class ResultPanel(ttk.Frame):
         
         # 恢复原始数据
         if self.result_data is not None:
-            self.filtered_data = self.result_data.copy()
-            self.total_pages = (len(self.filtered_data) + self.page_size - 1) // self.page_size
+            if self.filtered_data is not self.result_data:
+                self.filtered_data.close()
+            self.filtered_data = self.result_data
+            self.total_pages = (self.filtered_data.row_count + self.page_size - 1) // self.page_size
             self.current_page = 1
             self._update_table()
             self._update_pagination_controls()
     
     def _apply_filter_and_sort(self):
         """应用过滤和排序"""
-        if self.result_data is None or self.result_data.empty:
+        if self.result_data is None or self.result_data.row_count == 0:
             return
         
-        # 先复制原始数据
-        filtered_df = self.result_data.copy()
-        
-        # 应用过滤
-        if self.filter_column and self.filter_value:
-            try:
-                # 将列值转为字符串，然后进行不区分大小写的模糊匹配
-                mask = filtered_df[self.filter_column].astype(str).str.contains(
-                    self.filter_value, case=False, na=False
-                )
-                filtered_df = filtered_df[mask]
-            except Exception as e:
-                self.status_bar.config(text=f"过滤错误: {str(e)}")
-        
-        # 应用排序
-        if self.sort_column:
+        # 过滤和排序在DuckDB中执行，只读取可见页，不复制原始数据
+        if (self.filter_column and self.filter_value) or self.sort_column:
             try:
-                filtered_df = filtered_df.sort_values(
-                    by=self.sort_column, 
-                    ascending=self.sort_ascending,
-                    na_position='last'
+                filtered_data = self.result_data.filter_sort(
+                    self.filter_column, self.filter_value, self.sort_column, self.sort_ascending
                 )
             except Exception as e:
-                self.status_bar.config(text=f"排序错误: {str(e)}")
+                self.status_bar.config(text=f"过滤/排序错误: {str(e)}")
+                return
+        else:
+            filtered_data = self.result_data
         
-        # 更新过滤后的数据
-        self.filtered_data = filtered_df
+        # 更新过滤后的数据，释放上一次的过滤结果
+        if self.filtered_data is not None and self.filtered_data is not self.result_data:
+            self.filtered_data.close()
+        self.filtered_data = filtered_data
         
         # 重新计算分页
-        self.total_pages = (len(self.filtered_data) + self.page_size - 1) // self.page_size
+        self.total_pages = (self.filtered_data.row_count + self.page_size - 1) // self.page_size
         self.current_page = min(self.current_page, max(1, self.total_pages))
         
         # 更新表格和分页控制
@@ -709,10 +728,10 @@ class ResultPanel(ttk.Frame):
         self._update_pagination_controls()
         
         # 更新状态栏
-        filter_status = "已过滤" if len(self.filtered_data) != len(self.result_data) else "全部"
+        filter_status = "已过滤" if self.filtered_data.row_count != self.result_data.row_count else "全部"
         sort_status = f"已排序({self.sort_column})" if self.sort_column else "未排序"
         self.status_bar.config(
-            text=f"显示: {filter_status} {len(self.filtered_data)}/{len(self.result_data)} 行, {sort_status}"
+            text=f"显示: {filter_status} {self.filtered_data.row_count}/{self.result_data.row_count} 行, {sort_status}"
         )
 
     def _toggle_filter_frame(self):
@@ -6,11 +6,17 @@
 提供应用程序各种设置的配置界面
 """
 
+import os
+import re
 import tkinter as tk
-from tkinter import ttk
+from tkinter import ttk, messagebox, filedialog
 from typing import Dict, Any, Optional, Callable
 
-from app.core.config import config_manager
+from app.core.config import config_manager, DEFAULT_CONFIG
+from app.core.query_sampler import SAMPLE_METHODS, DEFAULT_SAMPLE_METHOD
+
+# 内存上限格式，如 4GB、512MB、2.5GiB
+MEMORY_LIMIT_PATTERN = re.compile(r'^\d+(\.\d+)?\s*([KMGT]i?B|B)?$', re.IGNORECASE)
 
 
 class SqlFormatSettingsDialog(tk.Toplevel):
@@ -147,7 +153,7 @@ class SqlFormatSettingsDialog(tk.Toplevel):
     def _on_reset(self):
         """重置为默认设置"""
         # 重置为默认设置
-        default_options = config_manager.DEFAULT_CONFIG["sql_format"]
+        default_options = DEFAULT_CONFIG["sql_format"]
         
         # 更新UI
         self.keyword_case_var.set(default_options["keyword_case"])
@@ -156,4 +162,279 @@ class SqlFormatSettingsDialog(tk.Toplevel):
         self.reindent_var.set(default_options["reindent"])
         self.indent_width_var.set(default_options["indent_width"])
         self.comma_first_var.set(default_options["comma_first"])
-        self.use_space_around_operators_var.set(default_options["use_space_around_operators"]) 
\ No newline at end of file
+        self.use_space_around_operators_var.set(default_options["use_space_around_operators"])
+
+
+class PerformanceSettingsDialog(tk.Toplevel):
+    """性能设置对话框，配置DuckDB的内存上限、线程数和临时目录"""
+    
+    def __init__(self, parent, on_save_callback: Optional[Callable] = None):
+        """
+        初始化对话框
+        
+        Args:
+            parent: 父窗口
+            on_save_callback: 保存设置后的回调函数
+        """
+        super().__init__(parent)
+        self.parent = parent
+        self.on_save_callback = on_save_callback
+        
+        # 设置对话框属性
+        self.title("性能设置")
+        self.resizable(False, False)
+        self.grab_set()  # 模态对话框
+        
+        # 获取当前配置
+        self.performance_options = config_manager.get_performance_options()
+        
+        # 创建UI组件
+        self._create_widgets()
+        
+        # 设置初始值
+        self._set_initial_values(self.performance_options)
+        
+        # 居中显示
+        self.update_idletasks()
+        width = self.winfo_width()
+        height = self.winfo_height()
+        x = (self.winfo_screenwidth() // 2) - (width // 2)
+        y = (self.winfo_screenheight() // 2) - (height // 2)
+        self.geometry(f'{width}x{height}+{x}+{y}')
+    
+    def _create_widgets(self):
+        """创建对话框组件"""
+        # 主框架
+        main_frame = ttk.Frame(self, padding=10)
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        
+        # 内存上限
+        ttk.Label(main_frame, text="内存上限:").grid(row=0, column=0, sticky=tk.W, pady=5)
+        self.memory_limit_var = tk.StringVar()
+        ttk.Entry(main_frame, textvariable=self.memory_limit_var, width=17).grid(row=0, column=1, sticky=tk.W, pady=5, padx=5)
+        ttk.Label(main_frame, text="如 4GB、512MB，留空为物理内存的80%").grid(row=0, column=2, sticky=tk.W, pady=5)
+        
+        # 线程数
+        ttk.Label(main_frame, text="线程数:").grid(row=1, column=0, sticky=tk.W, pady=5)
+        self.threads_var = tk.IntVar()
+        ttk.Spinbox(main_frame, from_=0, to=max(os.cpu_count() or 1, 1) * 2, textvariable=self.threads_var, width=5).grid(row=1, column=1, sticky=tk.W, pady=5, padx=5)
+        ttk.Label(main_frame, text=f"0为使用全部CPU核数（本机 {os.cpu_count() or 1} 核）").grid(row=1, column=2, sticky=tk.W, pady=5)
+        
+        # 临时目录
+        ttk.Label(main_frame, text="临时目录:").grid(row=2, column=0, sticky=tk.W, pady=5)
+        self.temp_directory_var = tk.StringVar()
+        ttk.Entry(main_frame, textvariable=self.temp_directory_var, width=30).grid(row=2, column=1, columnspan=2, sticky=tk.W, pady=5, padx=5)
+        ttk.Button(main_frame, text="浏览...", command=self._on_browse_temp_directory).grid(row=2, column=3, sticky=tk.W, pady=5)
+        ttk.Label(main_frame, text="内存不足时数据换出到该目录，留空使用默认目录").grid(row=3, column=1, columnspan=3, sticky=tk.W)
+        
+        # 保持插入顺序
+        self.preserve_insertion_order_var = tk.BooleanVar()
+        ttk.Checkbutton(main_frame, text="保持结果的插入顺序（关闭后大数据量查询占用内存更少）", variable=self.preserve_insertion_order_var).grid(row=4, column=0, columnspan=4, sticky=tk.W, pady=5)
+        
+        # 按钮区域
+        btn_frame = ttk.Frame(main_frame)
+        btn_frame.grid(row=5, column=0, columnspan=4, pady=10)
+        
+        # 保存按钮
+        ttk.Button(btn_frame, text="保存", command=self._on_save).pack(side=tk.LEFT, padx=5)
+        
+        # 取消按钮
+        ttk.Button(btn_frame, text="取消", command=self.destroy).pack(side=tk.LEFT, padx=5)
+        
+        # 重置按钮
+        ttk.Button(btn_frame, text="重置为默认", command=self._on_reset).pack(side=tk.LEFT, padx=5)
+    
+    def _set_initial_values(self, options: Dict[str, Any]):
+        """
+        设置控件值
+        
+        Args:
+            options: 性能配置选项
+        """
+        self.memory_limit_var.set(options.get("memory_limit", ""))
+        self.threads_var.set(options.get("threads", 0))
+        self.temp_directory_var.set(options.get("temp_directory", ""))
+        self.preserve_insertion_order_var.set(options.get("preserve_insertion_order", True))
+    
+    def _on_browse_temp_directory(self):
+        """选择临时目录"""
+        directory = filedialog.askdirectory(parent=self, title="选择临时目录")
+        if directory:
+            self.temp_directory_var.set(directory)
+    
+    def _on_save(self):
+        """保存设置"""
+        memory_limit = self.memory_limit_var.get().strip()
+        if memory_limit and not MEMORY_LIMIT_PATTERN.match(memory_limit):
+            messagebox.showerror("设置错误", "内存上限格式不正确，应为数字加单位，如 4GB", parent=self)
+            return
+        try:
+            threads = int(self.threads_var.get())
+        except (tk.TclError, ValueError):
+            threads = -1
+        if threads < 0:
+            messagebox.showerror("设置错误", "线程数应为不小于0的整数", parent=self)
+            return
+        
+        # 收集设置值
+        options = {
+            "memory_limit": memory_limit,
+            "threads": threads,
+            "temp_directory": self.temp_directory_var.get().strip(),
+            "preserve_insertion_order": self.preserve_insertion_order_var.get(),
+        }
+        
+        # 更新配置
+        for key, value in options.items():
+            config_manager.set_config("performance", key, value)
+        
+        # 保存配置到文件
+        config_manager.save_config()
+        
+        # 调用回调函数
+        if self.on_save_callback:
+            self.on_save_callback()
+        
+        # 关闭对话框
+        self.destroy()
+    
+    def _on_reset(self):
+        """重置为默认设置"""
+        self._set_initial_values(DEFAULT_CONFIG["performance"])
+
+
+class SamplingSettingsDialog(tk.Toplevel):
+    """抽样模式设置对话框"""
+    
+    def __init__(self, parent, on_save_callback: Optional[Callable] = None):
+        """
+        初始化对话框
+        
+        Args:
+            parent: 父窗口
+            on_save_callback: 保存设置后的回调函数
+        """
+        super().__init__(parent)
+        self.parent = parent
+        self.on_save_callback = on_save_callback
+        
+        # 设置对话框属性
+        self.title("抽样设置")
+        self.resizable(False, False)
+        self.grab_set()  # 模态对话框
+        
+        # 创建UI组件
+        self._create_widgets()
+        
+        # 设置初始值
+        self._set_initial_values(config_manager.get_sampling_options())
+        
+        # 居中显示
+        self.update_idletasks()
+        width = self.winfo_width()
+        height = self.winfo_height()
+        x = (self.winfo_screenwidth() // 2) - (width // 2)
+        y = (self.winfo_screenheight() // 2) - (height // 2)
+        self.geometry(f'{width}x{height}+{x}+{y}')
+    
+    def _create_widgets(self):
+        """创建对话框组件"""
+        # 主框架
+        main_frame = ttk.Frame(self, padding=10)
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        
+        # 抽样方法
+        ttk.Label(main_frame, text="抽样方法:").grid(row=0, column=0, sticky=tk.W, pady=5)
+        self.method_var = tk.StringVar()
+        ttk.Combobox(main_frame, textvariable=self.method_var, values=list(SAMPLE_METHODS.values()),
+                     state="readonly", width=14).grid(row=0, column=1, sticky=tk.W, pady=5, padx=5)
+        ttk.Label(main_frame, text="按行抽样和蓄水池抽样可计算误差范围；按数据块抽样最快，但小比例时可能抽不到行，估计值偏差大").grid(row=1, column=1, sticky=tk.W)
+        
+        # 抽样百分比
+        ttk.Label(main_frame, text="抽样比例(%):").grid(row=2, column=0, sticky=tk.W, pady=5)
+        self.percent_var = tk.StringVar()
+        ttk.Entry(main_frame, textvariable=self.percent_var, width=10).grid(row=2, column=1, sticky=tk.W, pady=5, padx=5)
+        
+        # 随机种子
+        ttk.Label(main_frame, text="随机种子:").grid(row=3, column=0, sticky=tk.W, pady=5)
+        self.seed_var = tk.StringVar()
+        ttk.Entry(main_frame, textvariable=self.seed_var, width=10).grid(row=3, column=1, sticky=tk.W, pady=5, padx=5)
+        ttk.Label(main_frame, text="相同种子重复执行结果相同，留空每次抽样不同").grid(row=4, column=1, sticky=tk.W)
+        
+        # 最少行数
+        ttk.Label(main_frame, text="最少行数:").grid(row=5, column=0, sticky=tk.W, pady=5)
+        self.min_rows_var = tk.StringVar()
+        ttk.Entry(main_frame, textvariable=self.min_rows_var, width=10).grid(row=5, column=1, sticky=tk.W, pady=5, padx=5)
+        ttk.Label(main_frame, text="行数少于该值的表不抽样").grid(row=6, column=1, sticky=tk.W)
+        
+        # 按钮区域
+        btn_frame = ttk.Frame(main_frame)
+        btn_frame.grid(row=7, column=0, columnspan=2, pady=10)
+        
+        # 保存按钮
+        ttk.Button(btn_frame, text="保存", command=self._on_save).pack(side=tk.LEFT, padx=5)
+        
+        # 取消按钮
+        ttk.Button(btn_frame, text="取消", command=self.destroy).pack(side=tk.LEFT, padx=5)
+        
+        # 重置按钮
+        ttk.Button(btn_frame, text="重置为默认", command=self._on_reset).pack(side=tk.LEFT, padx=5)
+    
+    def _set_initial_values(self, options: Dict[str, Any]):
+        """
+        设置控件值
+        
+        Args:
+            options: 抽样配置选项
+        """
+        self.method_var.set(SAMPLE_METHODS.get(options.get("method"), SAMPLE_METHODS[DEFAULT_SAMPLE_METHOD]))
+        self.percent_var.set(f"{float(options.get('percent', 1)):g}")
+        seed = options.get("seed")
+        self.seed_var.set("" if seed is None else str(seed))
+        self.min_rows_var.set(str(options.get("min_rows", 0)))
+    
+    def _on_save(self):
+        """保存设置"""
+        try:
+            percent = float(self.percent_var.get())
+        except ValueError:
+            percent = 0
+        if not 0 < percent <= 100:
+            messagebox.showerror("设置错误", "抽样比例应为大于0且不超过100的数字", parent=self)
+            return
+        
+        seed = self.seed_var.get().strip()
+        if seed and not re.match(r'^\d+$', seed):
+            messagebox.showerror("设置错误", "随机种子应为不小于0的整数，或留空", parent=self)
+            return
+        
+        min_rows = self.min_rows_var.get().strip()
+        if not re.match(r'^\d+$', min_rows):
+            messagebox.showerror("设置错误", "最少行数应为不小于0的整数", parent=self)
+            return
+        
+        # 收集设置值
+        options = {
+            "method": next(method for method, label in SAMPLE_METHODS.items() if label == self.method_var.get()),
+            "percent": percent,
+            "seed": int(seed) if seed else None,
+            "min_rows": int(min_rows),
+        }
+        
+        # 更新配置
+        for key, value in options.items():
+            config_manager.set_config("sampling", key, value)
+        
+        # 保存配置到文件
+        config_manager.save_config()
+        
+        # 调用回调函数
+        if self.on_save_callback:
+            self.on_save_callback()
+        
+        # 关闭对话框
+        self.destroy()
+    
+    def _on_reset(self):
+        """重置为默认设置"""
+        self._set_initial_values(DEFAULT_CONFIG["sampling"]) 
\ No newline at end of file
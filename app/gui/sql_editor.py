@@ -17,6 +17,7 @@ from pygments import lex
 from pygments.lexers import SqlLexer
 from pygments.token import Token, Keyword, Name, String, Number, Operator, Comment
 
+from app.core.config import config_manager
 from app.utils.helpers import get_sql_keywords, format_sql
 from app.utils.ui_helpers import scrollbar_autohide
 
@@ -24,17 +25,19 @@ from app.utils.ui_helpers import scrollbar_autohide
 class SQLEditor(ttk.Frame):
     """SQL编辑器组件，提供SQL查询输入和语法高亮功能"""
     
-    def __init__(self, parent, execute_callback: Callable = None):
+    def __init__(self, parent, execute_callback: Callable = None, cancel_callback: Callable = None):
         """
         初始化SQL编辑器
         
         Args:
             parent: 父容器
             execute_callback: 执行查询的回调函数
+            cancel_callback: 取消查询的回调函数
         """
         super().__init__(parent)
         self.parent = parent
         self.execute_callback = execute_callback
+        self.cancel_callback = cancel_callback
         self.keywords = get_sql_keywords()
         
         # 定义语法高亮颜色
@@ -76,6 +79,15 @@ class SQLEditor(ttk.Frame):
         )
         self.execute_btn.pack(side=tk.LEFT, padx=(0, 5), pady=5)  # 左侧边距为0
         
+        # 取消查询按钮，查询执行期间可用
+        self.cancel_btn = ttk.Button(
+            toolbar,
+            text="取消查询",
+            command=self._on_cancel,
+            state=tk.DISABLED
+        )
+        self.cancel_btn.pack(side=tk.LEFT, padx=5, pady=5)
+        
         # 清空按钮
         self.clear_btn = ttk.Button(
             toolbar, 
@@ -92,6 +104,29 @@ class SQLEditor(ttk.Frame):
         )
         self.format_btn.pack(side=tk.LEFT, padx=5, pady=5)
         
+        # 抽样模式：查询中最大的表按比例抽样读取，快速得到近似结果
+        ttk.Separator(toolbar, orient=tk.VERTICAL).pack(side=tk.LEFT, fill=tk.Y, padx=5, pady=5)
+        self.sample_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(toolbar, text="抽样模式", variable=self.sample_var).pack(side=tk.LEFT, padx=5, pady=5)
+        
+        self.sample_percent_var = tk.StringVar()
+        self.set_sample_percent(config_manager.get_sampling_options().get("percent", 1))
+        sample_percent = ttk.Combobox(toolbar, textvariable=self.sample_percent_var, width=5,
+                                      values=["0.1", "1", "5", "10"])
+        sample_percent.pack(side=tk.LEFT, pady=5)
+        sample_percent.bind("<<ComboboxSelected>>", self._on_sample_percent_changed)
+        sample_percent.bind("<Return>", self._on_sample_percent_changed)
+        sample_percent.bind("<FocusOut>", self._on_sample_percent_changed)
+        ttk.Label(toolbar, text="%").pack(side=tk.LEFT, padx=(2, 5), pady=5)
+        
+        # 使用全部数据重新执行，不受抽样模式影响
+        self.exact_btn = ttk.Button(
+            toolbar,
+            text="精确执行",
+            command=self._on_execute_exact
+        )
+        self.exact_btn.pack(side=tk.LEFT, padx=5, pady=5)
+        
         # 创建主编辑器框架，使用普通Frame但添加清晰的边框
         editor_frame = ttk.Frame(self, borderwidth=1, relief=tk.SOLID)  # 使用普通Frame并添加边框
         editor_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
@@ -227,6 +262,57 @@ class SQLEditor(ttk.Frame):
             query = self.get_query()
             self.execute_callback(query)
     
+    def _on_execute_exact(self):
+        """使用全部数据执行查询，不抽样"""
+        if self.execute_callback:
+            query = self.get_query()
+            self.execute_callback(query, sample=False)
+    
+    def _on_sample_percent_changed(self, event=None):
+        """抽样百分比修改后保存到配置，输入无效时恢复为当前配置"""
+        current = config_manager.get_sampling_options().get("percent", 1)
+        try:
+            percent = float(self.sample_percent_var.get())
+        except ValueError:
+            percent = 0
+        if not 0 < percent <= 100:
+            self.set_sample_percent(current)
+            return
+        if percent != current:
+            config_manager.set_config("sampling", "percent", percent)
+            config_manager.save_config()
+        self.set_sample_percent(percent)
+    
+    @property
+    def sample_mode(self) -> bool:
+        """是否开启了抽样模式"""
+        return self.sample_var.get()
+    
+    def set_sample_percent(self, percent: float):
+        """
+        设置工具栏中显示的抽样百分比
+        
+        Args:
+            percent: 抽样百分比
+        """
+        self.sample_percent_var.set(f"{float(percent):g}")
+    
+    def _on_cancel(self):
+        """取消查询"""
+        if self.cancel_callback:
+            self.cancel_callback()
+    
+    def set_running(self, running: bool):
+        """
+        设置查询执行状态，执行期间禁用执行按钮并启用取消按钮
+        
+        Args:
+            running: 是否正在执行查询
+        """
+        self.execute_btn.config(state=tk.DISABLED if running else tk.NORMAL)
+        self.exact_btn.config(state=tk.DISABLED if running else tk.NORMAL)
+        self.cancel_btn.config(state=tk.NORMAL if running else tk.DISABLED)
+    
     def _on_clear(self):
         """清空编辑器"""
         self.editor.delete("1.0", tk.END)
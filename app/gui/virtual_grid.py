@@ -0,0 +1,384 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+虚拟滚动表格
+只渲染可见行，滚动时按需从结果集读取数据，任意大小的结果占用固定的界面资源
+"""
+
+import tkinter as tk
+from tkinter import ttk, font as tkfont
+import numpy as np
+import pandas as pd
+from typing import List, Callable, Optional
+
+from app.utils.ui_helpers import scrollbar_autohide
+
+
+# 列宽计算参数（像素）
+CHAR_WIDTH = 10
+MAX_COLUMN_WIDTH = 300
+
+
+# 逐元素调用str的数组函数，返回对象数组
+_to_str = np.frompyfunc(str, 1, 1)
+
+
+def _format_numbers(block: pd.DataFrame) -> np.ndarray:
+    """格式化整数和布尔列（没有空值），整块一次转换"""
+    return block.to_numpy().astype(str).astype(object)
+
+
+def _format_floats(block: pd.DataFrame) -> np.ndarray:
+    """格式化浮点列，整块一次转换，空值显示为空字符串"""
+    values = block.to_numpy()
+    text = values.astype(str).astype(object)
+    text[np.isnan(values)] = ""
+    return text
+
+
+def _format_datetimes(block: pd.DataFrame) -> np.ndarray:
+    """格式化日期时间列，空值显示为空字符串"""
+    text = np.empty(block.shape, dtype=object)
+    for i in range(block.shape[1]):
+        series = block.iloc[:, i]
+        values = series.dropna()
+        if series.dt.tz is not None or (values != values.dt.floor('s')).any():
+            # 有小数秒或时区的列逐个格式化，保留小数秒和时区
+            text[:, i] = _to_str(series.to_numpy(dtype=object))
+        else:
+            text[:, i] = series.dt.strftime('%Y-%m-%d %H:%M:%S').to_numpy(dtype=object)
+    text[block.isna().to_numpy()] = ""
+    return text
+
+
+def _format_objects(block: pd.DataFrame) -> np.ndarray:
+    """格式化字符串及其他类型的列，空值显示为空字符串"""
+    values = block.to_numpy(dtype=object)
+    # 单元格可能是列表等序列，不能用numpy的字符串类型转换
+    text = _to_str(values)
+    text[pd.isna(values)] = ""
+    return text
+
+
+def get_block_formatter(dtype) -> Callable[[pd.DataFrame], np.ndarray]:
+    """
+    按列类型选择格式化函数，同类型的列整块一次转换为字符串
+    
+    Args:
+        dtype: 列类型
+    
+    Returns:
+        Callable[[pd.DataFrame], np.ndarray]: 格式化函数，返回二维字符串数组
+    """
+    if isinstance(dtype, np.dtype):
+        if dtype.kind in 'iub':
+            return _format_numbers
+        if dtype.kind == 'f':
+            return _format_floats
+        if dtype.kind == 'M':
+            return _format_datetimes
+    return _format_objects
+
+
+class VirtualGrid(ttk.Frame):
+    """
+    虚拟滚动表格
+    
+    使用固定数量的Treeview行显示可见窗口，垂直滚动条映射到行偏移量，
+    滚动时只读取并更新可见窗口内的行，不为每一行创建组件。
+    """
+    
+    def __init__(self, parent, heading_command: Optional[Callable[[str], None]] = None):
+        """
+        初始化虚拟表格
+        
+        Args:
+            parent: 父容器
+            heading_command: 列标题点击回调，参数为列名
+        """
+        super().__init__(parent)
+        self.heading_command = heading_command
+        
+        self.columns = []  # 数据列名（不含序号列）
+        self.row_count = 0  # 总行数
+        self.fetch_rows = None  # 读取数据的函数 (偏移量, 行数) -> DataFrame
+        self.row_number_start = 1  # 第一行的序号
+        self.offset = 0  # 可见窗口第一行的偏移量
+        self.visible_rows = 20  # 可见行数（行组件池大小）
+        self.visible_data = pd.DataFrame()  # 当前可见窗口的数据
+        self._rendered_columns = []  # 当前可见窗口每列的显示字符串
+        self._formatters = {}  # 按列类型缓存的格式化方案
+        self._sort_indicator = (None, True)  # 标题中显示排序箭头的列和方向
+        
+        self._create_widgets()
+    
+    def _create_widgets(self):
+        """创建组件"""
+        self.tree = ttk.Treeview(self, show="headings", selectmode="extended")
+        
+        # 水平滚动由Treeview处理，垂直滚动条映射到结果的行偏移量
+        h_scrollbar = ttk.Scrollbar(self, orient=tk.HORIZONTAL, command=self.tree.xview, style="Horizontal.TScrollbar")
+        self.v_scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scrollbar, style="Vertical.TScrollbar")
+        self.tree.configure(xscrollcommand=scrollbar_autohide(h_scrollbar, 'grid'))
+        self._set_scrollbar = scrollbar_autohide(self.v_scrollbar, 'grid')
+        
+        self.tree.grid(row=0, column=0, sticky='nsew')
+        h_scrollbar.grid(row=1, column=0, sticky='ew')
+        self.v_scrollbar.grid(row=0, column=1, sticky='ns')
+        
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+        
+        # 窗口大小变化时重新计算可见行数
+        self.tree.bind("<Configure>", self._on_configure)
+        
+        # 鼠标滚轮和键盘滚动
+        self.tree.bind("<MouseWheel>", self._on_mousewheel)
+        self.tree.bind("<Button-4>", lambda e: self._scroll_by(-3))
+        self.tree.bind("<Button-5>", lambda e: self._scroll_by(3))
+        self.tree.bind("<Up>", lambda e: self._on_key_move(-1))
+        self.tree.bind("<Down>", lambda e: self._on_key_move(1))
+        self.tree.bind("<Prior>", lambda e: self._scroll_by(-self.visible_rows))
+        self.tree.bind("<Next>", lambda e: self._scroll_by(self.visible_rows))
+        self.tree.bind("<Control-Home>", lambda e: self.scroll_to(0))
+        self.tree.bind("<Control-End>", lambda e: self.scroll_to(self.row_count))
+    
+    def _row_height(self) -> int:
+        """
+        获取Treeview的行高
+        
+        Returns:
+            int: 行高（像素）
+        """
+        style = ttk.Style()
+        try:
+            row_height = int(style.lookup("Treeview", "rowheight") or 0)
+        except (ValueError, tk.TclError):
+            row_height = 0
+        if row_height <= 0:
+            row_font = style.lookup("Treeview", "font") or "TkDefaultFont"
+            try:
+                row_height = tkfont.Font(font=row_font).metrics("linespace") + 4
+            except tk.TclError:
+                row_height = 20
+        return row_height
+    
+    def _on_configure(self, event):
+        """窗口大小变化事件，调整行组件池大小"""
+        row_height = self._row_height()
+        # 减去标题行高度
+        visible_rows = max(1, (event.height - row_height - 4) // row_height)
+        if visible_rows != self.visible_rows:
+            self.visible_rows = visible_rows
+            self.scroll_to(self.offset)
+    
+    def set_data(self, columns: List[str], row_count: int, fetch_rows: Callable[[int, int], pd.DataFrame],
+                 row_number_start: int = 1, keep_position: bool = False):
+        """
+        设置表格数据源
+        
+        Args:
+            columns: 数据列名
+            row_count: 总行数
+            fetch_rows: 读取数据的函数，参数为(偏移量, 行数)，返回DataFrame
+            row_number_start: 第一行的序号
+            keep_position: 是否保持当前滚动位置（数据源追加数据时使用）
+        """
+        columns = list(columns)
+        columns_changed = columns != self.columns
+        if columns_changed:
+            self.columns = columns
+            self._formatters = {}
+            self._sort_indicator = (None, True)
+            self.tree.delete(*self.tree.get_children())
+            self.tree["columns"] = ["#"] + columns
+            self.tree.heading("#", text="#", anchor=tk.CENTER)
+            self.tree.column("#", width=60, anchor=tk.CENTER, stretch=tk.NO)
+            for col in columns:
+                self.tree.heading(col, text=str(col), anchor=tk.CENTER,
+                                  command=lambda c=col: self._on_heading_click(c))
+        
+        self.row_count = row_count
+        self.fetch_rows = fetch_rows
+        self.row_number_start = row_number_start
+        self.scroll_to(self.offset if keep_position else 0)
+        
+        # 列宽只在列变化时按第一个可见窗口的样本计算一次，翻页时不再重新计算
+        if columns_changed:
+            self._resize_columns()
+    
+    def reset_columns(self):
+        """清除列缓存，下次设置数据时重新创建列并计算列宽（显示新结果时调用）"""
+        self.columns = []
+    
+    def set_sort_indicator(self, column: Optional[str], ascending: bool = True):
+        """
+        在列标题中显示排序箭头，只更新变化的标题
+        
+        Args:
+            column: 排序列，为None时不显示
+            ascending: 是否升序
+        """
+        old_column, _ = self._sort_indicator
+        if (column, ascending) == self._sort_indicator:
+            return
+        self._sort_indicator = (column, ascending)
+        if old_column in self.columns:
+            self.tree.heading(old_column, text=str(old_column))
+        if column in self.columns:
+            self.tree.heading(column, text=f"{column} {'▲' if ascending else '▼'}")
+    
+    def _resize_columns(self):
+        """根据当前可见窗口的样本数据设置列宽"""
+        if not self.columns:
+            return
+        sample_widths = [len(str(col)) for col in self.columns]
+        for i, col in enumerate(self.columns):
+            width = sample_widths[i]
+            if self._rendered_columns and len(self._rendered_columns[i]) > 0:
+                width = max(width, max(len(value) for value in self._rendered_columns[i]))
+            self.tree.column(col, width=min(width * CHAR_WIDTH, MAX_COLUMN_WIDTH), anchor=tk.CENTER)
+    
+    def _format_columns(self, data: pd.DataFrame) -> List[np.ndarray]:
+        """
+        格式化可见窗口的数据，相同类型的列整块转换，不逐个单元格转换
+        
+        Args:
+            data: 可见窗口的数据
+        
+        Returns:
+            List[np.ndarray]: 每列的字符串数组
+        """
+        # 按列类型分组的格式化方案，列类型不变时复用
+        dtypes = tuple(data.dtypes)
+        plan = self._formatters.get(dtypes)
+        if plan is None:
+            groups = {}
+            for i, dtype in enumerate(dtypes):
+                groups.setdefault(dtype, []).append(i)
+            plan = self._formatters[dtypes] = [
+                (get_block_formatter(dtype), positions) for dtype, positions in groups.items()
+            ]
+        
+        # 按列位置读取，结果中可能有重复列名
+        text = np.empty(data.shape, dtype=object)
+        for formatter, positions in plan:
+            text[:, positions] = formatter(data.iloc[:, positions])
+        return list(text.T)
+    
+    def clear(self):
+        """清空表格"""
+        self.columns = []
+        self.row_count = 0
+        self.fetch_rows = None
+        self.offset = 0
+        self.visible_data = pd.DataFrame()
+        self._rendered_columns = []
+        self.tree.delete(*self.tree.get_children())
+        self.tree["columns"] = []
+        self._set_scrollbar(0.0, 1.0)
+    
+    def refresh(self):
+        """重新读取可见窗口的数据"""
+        self.scroll_to(self.offset)
+    
+    def scroll_to(self, offset: int):
+        """
+        滚动到指定行，只读取并渲染可见窗口
+        
+        Args:
+            offset: 可见窗口第一行的偏移量
+        """
+        offset = max(0, min(int(offset), self.row_count - self.visible_rows))
+        self.offset = offset
+        
+        if self.fetch_rows is None or self.row_count == 0:
+            self.visible_data = pd.DataFrame()
+            self._rendered_columns = []
+            self._render_rows([])
+            self._set_scrollbar(0.0, 1.0)
+            return
+        
+        limit = min(self.visible_rows, self.row_count - offset)
+        self.visible_data = self.fetch_rows(offset, limit)
+        
+        # 整列格式化后按行组合，不逐个单元格转换
+        self._rendered_columns = self._format_columns(self.visible_data)
+        start = self.row_number_start + offset
+        row_numbers = np.arange(start, start + len(self.visible_data)).astype(str).astype(object)
+        rows = np.column_stack([row_numbers] + self._rendered_columns).tolist() if len(self.visible_data) else []
+        self._render_rows(rows)
+        
+        self._set_scrollbar(offset / self.row_count, min(1.0, (offset + limit) / self.row_count))
+    
+    def _render_rows(self, rows: List[list]):
+        """
+        将数据写入行组件池，复用已有的行，只增删数量差异部分
+        
+        Args:
+            rows: 每行的显示值（包含序号）
+        """
+        items = self.tree.get_children()
+        for item, values in zip(items, rows):
+            self.tree.item(item, values=values)
+        if len(items) > len(rows):
+            self.tree.delete(*items[len(rows):])
+        for values in rows[len(items):]:
+            self.tree.insert("", tk.END, values=values)
+        
+        # 行组件只显示可见窗口，Treeview自身不滚动
+        self.tree.yview_moveto(0)
+    
+    def _on_scrollbar(self, *args):
+        """垂直滚动条事件，将滚动位置映射为行偏移量"""
+        if args[0] == "moveto":
+            self.scroll_to(int(float(args[1]) * self.row_count))
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            if args[2] == "pages":
+                amount *= self.visible_rows
+            self._scroll_by(amount)
+    
+    def _scroll_by(self, rows: int):
+        """
+        按行数滚动
+        
+        Args:
+            rows: 滚动行数，负数向上
+        """
+        self.scroll_to(self.offset + rows)
+        return "break"
+    
+    def _on_mousewheel(self, event):
+        """鼠标滚轮事件"""
+        if event.delta:
+            # Windows每格120，macOS为较小的值
+            steps = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+            return self._scroll_by(-steps * 3)
+        return "break"
+    
+    def _on_key_move(self, direction: int):
+        """
+        上下方向键事件，焦点行到达可见窗口边缘时滚动
+        
+        Args:
+            direction: -1向上，1向下
+        """
+        items = self.tree.get_children()
+        if not items:
+            return "break"
+        focus = self.tree.focus()
+        index = items.index(focus) if focus in items else 0
+        new_index = index + direction
+        if 0 <= new_index < len(items):
+            self.tree.focus(items[new_index])
+            self.tree.selection_set(items[new_index])
+        else:
+            self._scroll_by(direction)
+        return "break"
+    
+    def _on_heading_click(self, column: str):
+        """列标题点击事件"""
+        if self.heading_command is not None:
+            self.heading_command(column)
\ No newline at end of file
@@ -10,9 +10,14 @@
 HELP_TEXT = """QueryX - SQL查询工具使用帮助
         
 1. 文件操作：
-- 点击"添加文件"按钮选择Excel(.xlsx/.xls/.xlsm)、CSV(.csv)或JSON(.json)文件
+- 点击"添加文件"按钮选择Excel(.xlsx/.xls/.xlsm)、CSV(.csv)、JSON(.json)、JSON Lines(.jsonl/.ndjson)、Parquet(.parquet)、Arrow(.arrow/.feather/.ipc)文件或DuckDB数据库(.duckdb/.ddb)
 - 支持同时加载多个文件
+- 支持gz、zst、bz2压缩的CSV/JSON文件，以及zip压缩包（每个成员文件一张表，表名为"压缩包名__文件名"）
+- 支持Parquet、Arrow IPC/Feather文件和DuckDB数据库文件，查询时直接扫描文件，只读取需要的列和行组
+- 点击"添加文件夹"可将多个同结构的CSV/JSON文件合并为一张表，附加filename列和Hive分区列（如year=2024/month=01），按这些列过滤时只读取匹配的文件
 - 文件将显示在左侧文件面板中，包含文件名、类型、大小、行数和列数信息
+- 文件在磁盘上变化后自动重新加载，只追加了数据的CSV/JSON Lines文件只读取新增的行（可在"文件"菜单中关闭）
+- 经过pandas解析的数据默认在加载时写入DuckDB原生表并释放DataFrame，只保留一份数据；关闭"文件"菜单中的"读入的数据转为原生表"后以DataFrame注册，文件列表右键菜单中的"转为原生表"只转换选中的表
 - 可通过文件面板的"移除选中"或"清空所有"按钮管理文件
 - 支持右键点击文件，选择"预览"查看文件内容，或选择"查询"直接查询所有记录
 
@@ -43,6 +48,10 @@ HELP_TEXT = """QueryX - SQL查询工具使用帮助
 5. 执行查询：
 - 点击"执行查询"按钮或按Ctrl+Enter执行当前查询
 - 结果将显示在下方结果面板中
+- 勾选工具栏中的"抽样模式"后，查询中行数最多的表按右侧的比例抽样读取，适合在大表上快速试写查询，结果面板标记为近似结果
+- 抽样模式下SELECT列表和HAVING中的COUNT/SUM按抽样比例换算为全表的估计值；按行抽样或蓄水池抽样时追加"±"列，为95%置信区间的误差范围
+- 抽样的表在子查询或UNION中，或COUNT/SUM嵌在表达式中（如COUNT(*)+1）、带DISTINCT、FILTER、OVER时无法换算，这类查询不抽样，使用全部数据执行并在状态栏中说明
+- 点击"精确执行"使用全部数据重新执行当前查询；"查询"菜单中的"抽样设置"可修改抽样方法（默认按行抽样；按数据块抽样最快，但小比例时可能抽不到行、估计值偏差大）、随机种子和不抽样的最少行数
 
 6. 浏览和处理结果：
 - 结果以表格形式显示，支持分页浏览
@@ -56,10 +65,15 @@ HELP_TEXT = """QueryX - SQL查询工具使用帮助
 - 历史查询会自动保存在历史面板中
 - 双击历史记录或选中后点击"使用选中"按钮可以重新加载查询
 - 可以通过"清空历史"按钮清除所有历史记录
+- 通过"文件 > 会话"可将已加载的表保存到会话文件，下次启动时直接恢复，不重新解析文件；"压缩会话"可回收会话文件中的空闲空间
 
 8. 格式化设置：
 - 通过"编辑"菜单中的"SQL格式化设置"可以自定义格式化选项
 - 可设置关键字大小写、标识符大小写、缩进宽度等选项
+- 通过"查询"菜单中的"性能设置"可以设置内存上限、线程数、临时目录和是否保持插入顺序，保存后立即生效
+- 状态栏右侧实时显示DuckDB的内存占用和内存上限，双击或选择"视图"菜单中的"内存占用明细"可查看每张表和每个查询结果的存储方式和内存占用
+- 重复执行相同的查询（忽略大小写、空白和注释的差异）且引用的表未变化时直接返回缓存的结果，状态栏显示"缓存命中"；加载、重新加载文件或执行修改数据的语句后缓存自动失效
+- 通过"查询"菜单中的"分析查询性能"执行查询，结果面板下方的性能分析面板显示各阶段（解析/规划、执行、读取结果、转换为DataFrame）的耗时，以及DuckDB算子树中每个算子的耗时、占比、行数和输出大小，耗时最多的算子高亮显示
 
 9. 文件预览：
 - 双击文件或右键选择"预览"可查看文件内容
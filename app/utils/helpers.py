@@ -14,6 +14,7 @@ import sqlparse
 
 # 导入配置管理器
 from app.core.config import config_manager
+from app.core.compression import split_compression
 
 
 def format_file_size(size_bytes: int) -> str:
@@ -133,7 +134,7 @@ def get_file_extension(file_path: str) -> str:
 
 def is_supported_file(file_path: str) -> bool:
     """
-    检查文件是否为支持的格式
+    检查文件是否为支持的格式，CSV/JSON/JSON Lines文件可以为gz、zst、bz2压缩文件
     
     Args:
         file_path: 文件路径
@@ -141,6 +142,11 @@ def is_supported_file(file_path: str) -> bool:
     Returns:
         bool: 是否支持
     """
-    supported_extensions = ['xlsx', 'xls', 'xlsm', 'csv', 'json']
+    data_path, compression = split_compression(file_path)
+    if compression is not None:
+        return get_file_extension(data_path) in ['csv', 'json', 'jsonl', 'ndjson']
+    
+    supported_extensions = ['xlsx', 'xls', 'xlsm', 'csv', 'json', 'jsonl', 'ndjson', 'zip',
+                            'parquet', 'arrow', 'feather', 'ipc', 'duckdb', 'ddb']
     ext = get_file_extension(file_path)
     return ext in supported_extensions 
\ No newline at end of file
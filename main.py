@@ -7,6 +7,7 @@ QueryX - SQL查询工具
 """
 
 import sys
+import multiprocessing
 from app.gui.main_window import MainWindow
 
 def main():
@@ -15,4 +16,6 @@ def main():
     app.start()
 
 if __name__ == "__main__":
+    # 打包后的程序中，并行加载的子进程需要由此进入
+    multiprocessing.freeze_support()
     main() 
\ No newline at end of file
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+抽样查询改写的测试
+"""
+
+import duckdb
+import pytest
+
+from app.core.query_sampler import sample_query, describe_sample
+
+TABLE_ROWS = {'big': 2000000, 'dim': 7}
+
+
+def sample(query: str, method: str = 'bernoulli'):
+    """按1%抽样改写查询"""
+    return sample_query(query, TABLE_ROWS, 1, method, 42, 1000)
+
+
+def test_scales_select_aggregates_with_error_bars():
+    """SELECT列表中的COUNT/SUM按抽样比例换算，逐行抽样时附加误差范围列"""
+    info = sample('select g, count(*) c, sum(x) s from big group by g')
+    
+    assert info['skipped'] is None
+    assert info['scaled']
+    assert info['error_columns'] == ['c ±', 's ±']
+    assert 'big TABLESAMPLE 1% (bernoulli, 42)' in info['query']
+    assert 'CAST(round(count(*) / 0.01) AS BIGINT) AS "c"' in info['query']
+    assert '(sum(x) / 0.01) AS "s"' in info['query']
+
+
+def test_scaled_count_estimates_table_rows():
+    """换算后的COUNT在误差范围内接近全表行数"""
+    conn = duckdb.connect()
+    conn.execute("CREATE TABLE big AS SELECT range % 7 AS g, range AS x FROM range(2000000)")
+    info = sample('select count(*) c from big')
+    
+    count, error = conn.execute(info['query']).fetchone()
+    assert abs(count - 2000000) <= 2 * error
+    conn.close()
+
+
+def test_unaliased_aggregate_keeps_column_name():
+    """没有别名的聚合换算后列名不变"""
+    info = sample('select count(*) from big')
+    
+    assert 'AS "count(*)"' in info['query']
+    assert info['error_columns'] == ['count(*) ±']
+
+
+def test_avg_gets_error_bar_without_scaling():
+    """AVG不需要换算，只附加误差范围列"""
+    info = sample('select g, avg(x) from big group by g')
+    
+    assert 'avg(x) AS "avg(x)"' in info['query']
+    assert info['error_columns'] == ['avg(x) ±']
+
+
+def test_scales_having_aggregates():
+    """HAVING中的COUNT与换算后的值比较"""
+    info = sample('select g from big group by g having count(*) > 10')
+    
+    assert info['query'].endswith('having CAST(round(count(*) / 0.01) AS BIGINT) > 10')
+    assert info['scaled']
+    assert info['error_columns'] == []
+
+
+def test_block_sampling_has_no_error_bars():
+    """按数据块抽样只换算，不计算误差范围"""
+    info = sample('select count(*) from big', method='system')
+    
+    assert 'TABLESAMPLE 1% (system, 42)' in info['query']
+    assert info['error_columns'] == []
+    assert '按数据块抽样不计算误差范围' in describe_sample(info)
+
+
+@pytest.mark.parametrize('query', [
+    'select count(*)+1 from big',
+    'select count(distinct g) from big',
+    'select count(*) filter (where x > 0) from big',
+    'select sum(x) over () from big',
+    'select count(*)::double c from big',
+    'select g from big group by g having count(distinct x) > 10',
+    'select count(*) from big union all select count(*) from dim',
+    'select g, (select count(*) from big) from dim',
+])
+def test_skips_aggregates_that_cannot_be_scaled(query):
+    """无法换算的COUNT/SUM不抽样，返回原查询和原因"""
+    info = sample(query)
+    
+    assert info['skipped']
+    assert info['query'] == query
+    assert describe_sample(info).startswith('未抽样：')
+
+
+def test_samples_subquery_without_aggregates():
+    """子查询中的表没有COUNT/SUM时照常抽样，但不换算"""
+    info = sample('select * from dim where g in (select g from big)')
+    
+    assert info['skipped'] is None
+    assert info['query'] == 'select * from dim where g in (select g from big TABLESAMPLE 1% (bernoulli, 42))'
+    assert not info['scaled']
+    assert describe_sample(info) == '近似结果：表 big 抽样 1%（按行抽样）'
+
+
+def test_samples_largest_table_only():
+    """只抽样行数最多的表，维表读取全部数据"""
+    info = sample('select dim.nm, count(*) from big join dim using (g) group by 1')
+    
+    assert info['table'] == 'big'
+    assert 'big TABLESAMPLE' in info['query']
+    assert 'dim TABLESAMPLE' not in info['query']
+
+
+@pytest.mark.parametrize('query', [
+    'select * from dim',
+    'select * from big tablesample 1%',
+    'delete from big',
+    'select 1; select 2',
+])
+def test_returns_none_when_nothing_to_sample(query):
+    """没有需要抽样的表、已指定抽样或不是单条SELECT时不改写"""
+    assert sample(query) is None
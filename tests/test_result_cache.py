@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+结果缓存键的测试
+"""
+
+import pandas as pd
+import pytest
+
+from app.core.config import config_manager
+from app.core.result_cache import ResultCache, normalize_sql, is_read_only_query
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    """启用结果缓存，不读取用户的配置文件"""
+    monkeypatch.setitem(config_manager.config, 'result_cache', {'enabled': True, 'max_size_mb': 256})
+    return ResultCache()
+
+
+@pytest.mark.parametrize('query', [
+    'select * from t where i<5',
+    'SELECT * FROM T where I<5',
+    'select *\n  from t -- 注释\n where i < 5 ;',
+    'select /* 注释 */ * from t where i <5',
+])
+def test_normalize_case_whitespace_and_comments(query):
+    """关键字、标识符大小写，空白、注释和末尾分号不影响规范化结果"""
+    assert normalize_sql(query) == 'SELECT * FROM t WHERE i<5'
+
+
+def test_normalize_keeps_quoted_identifiers_and_strings():
+    """加引号的标识符和字符串保持原样"""
+    assert normalize_sql('select "T".X, \'Ab  c\' from "T"') == 'SELECT "T".x,\'Ab  c\' FROM "T"'
+    assert normalize_sql('select * from "T"') != normalize_sql('select * from "t"')
+    assert normalize_sql("select * from t where s = 'A'") != normalize_sql("select * from t where s = 'a'")
+
+
+def test_normalize_keeps_space_between_operators():
+    """相邻运算符之间保留空白，不会拼成注释"""
+    assert normalize_sql('select a - -1 from t') == 'SELECT a- -1 FROM t'
+    assert normalize_sql('select a - - b from t') != normalize_sql('select a -- b\nfrom t')
+
+
+@pytest.mark.parametrize('query', [
+    'select random() from t',
+    'select now()',
+    "select * from 'data.csv'",
+    "select * from read_csv('data.csv')",
+    'create table x as select 1',
+    'select 1; select 2',
+])
+def test_normalize_rejects_uncacheable_queries(query):
+    """结果随时间变化、直接读取文件、非SELECT或多条语句的查询不缓存"""
+    assert normalize_sql(query) is None
+
+
+def test_make_key_ignores_formatting_and_table_order(cache):
+    """格式不同的同一查询和顺序不同的表版本得到相同的缓存键"""
+    key = cache.make_key('select * from t join u using (id)', {'t': 'v1', 'u': 'v2'})
+    
+    assert key == cache.make_key('SELECT *\nFROM T JOIN U USING (ID);', {'u': 'v2', 't': 'v1'})
+    assert key == ('SELECT * FROM t JOIN u USING(id)', (('t', 'v1'), ('u', 'v2')))
+
+
+def test_make_key_changes_with_table_version(cache):
+    """表的数据变化后缓存键不同"""
+    assert cache.make_key('select * from t', {'t': 'v1'}) != cache.make_key('select * from t', {'t': 'v2'})
+
+
+def test_make_key_disabled(cache, monkeypatch):
+    """未启用结果缓存时不生成缓存键"""
+    monkeypatch.setitem(config_manager.config['result_cache'], 'enabled', False)
+    
+    assert cache.make_key('select * from t', {'t': 'v1'}) is None
+
+
+def test_cached_result_found_by_normalized_key(cache):
+    """按规范化的缓存键读取已缓存的结果"""
+    result = pd.DataFrame({'i': [1, 2]})
+    cache.put(cache.make_key('select * from t where i<5', {'t': 'v1'}), result)
+    
+    assert cache.get(cache.make_key('SELECT * FROM T where I<5', {'t': 'v1'})) is result
+    assert cache.get(cache.make_key('select * from t where i<6', {'t': 'v1'})) is None
+
+
+@pytest.mark.parametrize('query, expected', [
+    ('select 1', True),
+    ('with x as (select 1) select * from x', True),
+    ('select 1; select 2;', True),
+    ('select 1; drop table t', False),
+    ('insert into t values (1)', False),
+])
+def test_is_read_only_query(query, expected):
+    """只包含SELECT/WITH语句的查询才是只读的"""
+    assert is_read_only_query(query) is expected